@@ -29,11 +29,23 @@ from aim.common import utils
 LOG = logging.getLogger(__name__)
 EVENT_SERVE = 'serve'
 EVENT_RECONCILE = 'reconcile'
-EVENTS = [EVENT_SERVE, EVENT_RECONCILE]
+# Reconcile a single universe pair
+EVENT_RECONCILE_CONFIG = 'reconcile_config'
+EVENT_RECONCILE_OPERATIONAL = 'reconcile_operational'
+EVENT_RECONCILE_MONITORED = 'reconcile_monitored'
+EVENTS = [EVENT_SERVE, EVENT_RECONCILE, EVENT_RECONCILE_CONFIG,
+          EVENT_RECONCILE_OPERATIONAL, EVENT_RECONCILE_MONITORED]
 PAYLOAD_MAX_LEN = 1024
 SOCKET_RECONNECT_MAX_WAIT = 10
 
 
+def worker_socket_path(path, worker):
+    """Unix socket of an AID worker process, events are relayed to it."""
+    if worker is None:
+        return path
+    return '%s.%s' % (path, worker)
+
+
 @six.add_metaclass(abc.ABCMeta)
 class EventHandlerBase(object):
     """Event Handler for AID."""
@@ -88,18 +100,20 @@ class EventHandler(EventHandlerBase):
 
     q = None
 
-    def initialize(self, conf_manager):
+    def initialize(self, conf_manager, worker=None):
         LOG.info("Initialize Event Handler")
         self.recovery_retries = None
         self.conf_manager = conf_manager
+        self.worker = worker
         self.listener = self._spawn_listener()
         EventHandler.q = queue.Queue()
         time.sleep(0)
         return self
 
     def _connect(self):
-        self.us_path = self.conf_manager.get_option('unix_socket_path',
-                                                    group='aim')
+        self.us_path = worker_socket_path(
+            self.conf_manager.get_option('unix_socket_path', group='aim'),
+            self.worker)
         LOG.info("Connect to socket %s" % self.us_path)
         try:
             os.unlink(self.us_path)
@@ -143,6 +157,10 @@ class EventHandler(EventHandlerBase):
         if event.lower() in EVENTS:
             self._put_event(event)
 
+    def queue_depth(self):
+        """Number of events waiting to be handled."""
+        return self.q.qsize()
+
     def get_event(self, timeout=None):
         try:
             return self.q.get(timeout=timeout)
@@ -155,8 +173,8 @@ class EventHandler(EventHandlerBase):
         EventHandler._put_event(EVENT_SERVE)
 
     @staticmethod
-    def reconcile():
-        EventHandler._put_event(EVENT_RECONCILE)
+    def reconcile(event=EVENT_RECONCILE):
+        EventHandler._put_event(event)
 
     @staticmethod
     def _put_event(event):
@@ -0,0 +1,75 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+
+class ReconcileScheduler(object):
+    """Decides which universe pairs an AID cycle reconciles.
+
+    Every pair has its own cadence, the minimum number of seconds between
+    two of its reconciliations, and a priority: pairs due in the same cycle
+    are returned highest priority first. Events only make the pairs they
+    concern pending, and a pending pair becomes due once its cadence has
+    elapsed since it was last reconciled.
+    """
+
+    def __init__(self, priorities, cadences=None):
+        """Initialize scheduler
+
+        :param priorities: pair identifiers, highest priority first
+        :param cadences: dictionary of pair identifier to cadence in seconds,
+                         missing pairs are reconciled as soon as pending.
+        """
+        self.priorities = list(priorities)
+        self._cadences = dict(cadences or {})
+        self._pending = set()
+        self._last = {}
+
+    def set_cadence(self, pair, seconds):
+        self._cadences[pair] = seconds
+
+    def notify(self, pairs):
+        """Make pairs pending."""
+        self._pending.update(pairs)
+
+    def _next_time(self, pair):
+        return self._last.get(pair, 0) + (self._cadences.get(pair) or 0)
+
+    def due(self, now=None):
+        """Pending pairs whose cadence has elapsed, by priority."""
+        now = now or time.time()
+        return [x for x in self.priorities
+                if x in self._pending and self._next_time(x) <= now]
+
+    def time_to_next_due(self, now=None):
+        """Seconds before a pending pair is due, None if none is pending."""
+        if not self._pending:
+            return None
+        now = now or time.time()
+        return max(0, min(self._next_time(x) for x in self._pending) - now)
+
+    def pop_due(self, now=None):
+        """Return the pairs that are due and mark them as reconciled."""
+        now = now or time.time()
+        result = self.due(now)
+        self.reconciled(result, now)
+        return result
+
+    def reconciled(self, pairs, now=None):
+        now = now or time.time()
+        for pair in pairs:
+            self._pending.discard(pair)
+            self._last[pair] = now
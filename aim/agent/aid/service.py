@@ -13,8 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from multiprocessing import pool
 import signal
+import socket
 import sys
+import threading
 import time
 import traceback
 
@@ -22,13 +25,18 @@ from oslo_log import log as logging
 import semantic_version
 
 from aim.agent.aid import event_handler
+from aim.agent.aid import scheduler
+from aim.agent.aid import squash
+from aim.agent.aid import supervisor
 from aim.agent.aid.universes.aci import aci_universe
 from aim.agent.aid.universes import aim_universe
+from aim.agent.aid.universes import base_universe
 from aim.agent.aid.universes import constants as lcon
 from aim.agent.aid.universes.k8s import k8s_watcher
 from aim import aim_manager
 from aim.api import resource
 from aim.common import hashring
+from aim.common import metrics
 from aim.common import utils
 from aim import config as aim_cfg
 from aim import context
@@ -44,15 +52,52 @@ AGENT_DESCRIPTION = ('This Agent synchronizes the AIM state with ACI for a '
 DESIRED = 'desired'
 CURRENT = 'current'
 AID_EXIT_CHECK_INTERVAL = 5
+# Universe pairs by reconciliation priority, and the events concerning them
+PAIR_PRIORITIES = [base_universe.CONFIG_UNIVERSE,
+                   base_universe.MONITOR_UNIVERSE,
+                   base_universe.OPER_UNIVERSE]
+EVENT_PAIRS = {
+    event_handler.EVENT_SERVE: PAIR_PRIORITIES,
+    event_handler.EVENT_RECONCILE: PAIR_PRIORITIES,
+    event_handler.EVENT_RECONCILE_CONFIG: [base_universe.CONFIG_UNIVERSE],
+    event_handler.EVENT_RECONCILE_OPERATIONAL: [base_universe.OPER_UNIVERSE],
+    event_handler.EVENT_RECONCILE_MONITORED: [base_universe.MONITOR_UNIVERSE],
+}
+PAIR_CADENCE_OPTIONS = {
+    'agent_config_reconcile_interval': base_universe.CONFIG_UNIVERSE,
+    'agent_operational_reconcile_interval': base_universe.OPER_UNIVERSE,
+    'agent_monitored_reconcile_interval': base_universe.MONITOR_UNIVERSE,
+}
+
+CYCLE_TIME = metrics.Histogram('aim_aid_cycle_seconds',
+                               'Duration of the AID cycles.')
+CYCLE_PHASE_TIME = metrics.Histogram(
+    'aim_aid_cycle_phase_seconds',
+    'Duration of the serve, observe and reconcile phases of the AID cycles.',
+    labels=('phase',))
+EVENT_QUEUE_DEPTH = metrics.Gauge(
+    'aim_aid_event_queue_depth',
+    'Events queued when the last AID cycle started.')
+SQUASH_WINDOW = metrics.Gauge(
+    'aim_aid_squash_window_seconds',
+    'Seconds events were squashed before the last AID cycle.')
+SERVED_TENANTS = metrics.Gauge('aim_aid_served_tenants',
+                               'Tenants served by this agent.')
 
 logging.register_options(aim_cfg.CONF)
 
 
 class AID(object):
 
-    def __init__(self, conf):
+    def __init__(self, conf, worker=None):
+        """Initialize AID
+
+        :param worker: index of this process when AID runs as multiple
+                       worker processes, each of them is a different agent.
+        """
         self.run_daemon_loop = True
         self.host = conf.aim.aim_service_identifier
+        self.worker = worker
 
         aim_ctx = context.AimContext(store=api.get_store())
         # This config manager is shared between multiple threads. Therefore
@@ -72,19 +117,22 @@ class AID(object):
         self.multiverse += [
             # Configuration Universe (AIM to ACI)
             {DESIRED: aim_universe.AimDbUniverse().initialize(
-                api.get_store(), self.conf_manager, self.multiverse),
+                api.get_store(read_only=True), self.conf_manager,
+                self.multiverse),
              CURRENT: aci_universe.AciUniverse().initialize(
                  api.get_store(), self.conf_manager, self.multiverse)},
             # Operational Universe (ACI to AIM)
             {DESIRED: aci_universe.AciOperationalUniverse().initialize(
                 api.get_store(), self.conf_manager, self.multiverse),
              CURRENT: aim_universe.AimDbOperationalUniverse().initialize(
-                 api.get_store(), self.conf_manager, self.multiverse)},
+                 api.get_store(read_only=True), self.conf_manager,
+                 self.multiverse)},
             # Monitored Universe (ACI to AIM)
             {DESIRED: aci_universe.AciMonitoredUniverse().initialize(
                 api.get_store(), self.conf_manager, self.multiverse),
              CURRENT: aim_universe.AimDbMonitoredUniverse().initialize(
-                 api.get_store(), self.conf_manager, self.multiverse)},
+                 api.get_store(read_only=True), self.conf_manager,
+                 self.multiverse)},
         ]
         # delete_candidates contains tenants that are candidate for deletion.
         # when the consensus is reach by all the universe, the state will
@@ -95,11 +143,18 @@ class AID(object):
         # AIM's
         self.manager = aim_manager.AimManager()
         self.tree_manager = tree_manager.HashTreeManager()
-        self.agent_id = 'aid-%s' % self.host
+        # Workers share the host configuration, but are different agents
+        agent_host = self.host
+        if worker is not None:
+            agent_host = '%s-%s' % (self.host, worker)
+        self.agent_id = 'aid-%s' % agent_host
+        self.capacity = self.conf_manager.get_option_and_subscribe(
+            self._change_capacity, 'agent_capacity', group='aim')
         self.agent = resource.Agent(id=self.agent_id, agent_type=AGENT_TYPE,
-                                    host=self.host, binary_file=AGENT_BINARY,
+                                    host=agent_host, binary_file=AGENT_BINARY,
                                     description=AGENT_DESCRIPTION,
-                                    version=AGENT_VERSION, beat_count=0)
+                                    version=AGENT_VERSION, beat_count=0,
+                                    capacity=self.capacity)
         # Register agent
         self._send_heartbeat(aim_ctx)
         # Report procedure should happen asynchronously
@@ -110,9 +165,51 @@ class AID(object):
             self._change_report_interval, 'agent_report_interval', group='aim')
         self.squash_time = self.conf_manager.get_option_and_subscribe(
             self._change_squash_time, 'agent_event_squash_time', group='aim')
+        self.squash_max_time = self.conf_manager.get_option_and_subscribe(
+            self._change_squash_max_time, 'agent_event_squash_max_time',
+            group='aim')
+        self.squash_policy = squash.SquashPolicy(self.squash_time,
+                                                 self.squash_max_time)
+        self.full_sweep_interval = (
+            self.conf_manager.get_option_and_subscribe(
+                self._change_full_sweep_interval, 'agent_full_sweep_interval',
+                group='aim'))
+        self._last_full_sweep = {}
+        self.scheduler = scheduler.ReconcileScheduler(PAIR_PRIORITIES)
+        for option, pair in PAIR_CADENCE_OPTIONS.iteritems():
+            self.scheduler.set_cadence(
+                pair, self.conf_manager.get_option_and_subscribe(
+                    self._change_reconcile_interval, option, group='aim'))
+        self.reconcile_workers = self.conf_manager.get_option_and_subscribe(
+            self._change_reconcile_workers, 'agent_reconcile_workers',
+            group='aim')
+        self._reconcile_pool = None
+        self._worker_local = threading.local()
+        self.leader_per_tenant = self.conf_manager.get_option_and_subscribe(
+            self._change_leader_per_tenant, 'agent_leader_per_tenant',
+            group='aim')
+        # Served tenants this agent is a standby for, with their leader
+        self.standby_tenants = {}
+        self._last_leader_check = 0
+        self.handoff_window = self.conf_manager.get_option_and_subscribe(
+            self._change_handoff_window, 'agent_handoff_window', group='aim')
+        # Tenants moved to other agents that are still served until their
+        # new owners are warm, with the time their hand-off started
+        self.handoff_tenants = {}
+        self._last_handoff_check = 0
+        self.load_factor = self.conf_manager.get_option_and_subscribe(
+            self._change_load_factor, 'agent_load_factor', group='aim')
+        self.cost_refresh_interval = (
+            self.conf_manager.get_option_and_subscribe(
+                self._change_cost_refresh_interval,
+                'agent_cost_refresh_interval', group='aim'))
+        self._last_cost_refresh = 0
+        # Agents ring, and the tenant allocations it calculated
+        self._ring = hashring.ConsistentHashRing()
+        self._allocations = (None, {})
         self._spawn_heartbeat_loop()
         self.events = event_handler.EventHandler().initialize(
-            self.conf_manager)
+            self.conf_manager, worker=worker)
         self.max_down_time = 4 * self.report_interval
 
     def daemon_loop(self):
@@ -126,32 +223,63 @@ class AID(object):
                 first_event_time = None
                 squash_time = AID_EXIT_CHECK_INTERVAL
                 while squash_time > 0:
-                    event = self.events.get_event(squash_time)
+                    timeout = squash_time
+                    next_due = self.scheduler.time_to_next_due()
+                    if first_event_time is None and next_due is not None:
+                        # Wake up when a pending universe pair is due
+                        timeout = min(timeout, next_due)
+                    event = self.events.get_event(timeout)
                     if not event and first_event_time is None:
                         # This is a lone timeout, just check if we need to exit
                         if not self.run_daemon_loop:
                             LOG.info("Stopping AID main loop.")
                             return
+                        if self.scheduler.due():
+                            break
+                        if (self._leaders_down(aim_ctx) or
+                                self._handoffs_done(aim_ctx)):
+                            serve = True
+                            break
                         continue
                     if not first_event_time:
                         first_event_time = time.time()
+                    if event:
+                        self.squash_policy.event()
                     if event in event_handler.EVENTS + [None]:
-                        # Set squash timeout
-                        squash_time = (first_event_time + self.squash_time -
+                        # Set squash timeout, it grows during bursts
+                        squash_time = (first_event_time +
+                                       self.squash_policy.squash_time() -
                                        time.time())
                         if event == event_handler.EVENT_SERVE:
                             # Serving tenants is required as well
                             serve = True
+                        self.scheduler.notify(EVENT_PAIRS.get(event, []))
+                serve = (serve or self._leaders_down(aim_ctx) or
+                         self._handoffs_done(aim_ctx))
+                if not serve and not self.scheduler.due():
+                    # The pairs concerned by these events are not due yet
+                    continue
+                queue_depth = self.events.queue_depth()
+                LOG.debug("Events squashed for %.3f seconds, %s events "
+                          "queued." % (self.squash_policy.window,
+                                       queue_depth))
+                SQUASH_WINDOW.set(self.squash_policy.window)
+                EVENT_QUEUE_DEPTH.set(queue_depth)
                 start_time = time.time()
                 self._daemon_loop(aim_ctx, serve)
-                utils.wait_for_next_cycle(start_time, self.polling_interval,
-                                          LOG, readable_caller='AID',
-                                          notify_exceeding_timeout=False)
+                self.squash_policy.cycle(time.time() - start_time)
+                CYCLE_TIME.observe(time.time() - start_time)
+                utils.wait_for_next_cycle(
+                    start_time,
+                    self.squash_policy.polling_interval(self.polling_interval),
+                    LOG, readable_caller='AID',
+                    notify_exceeding_timeout=False)
             except Exception:
                 LOG.error('A error occurred in agent')
                 LOG.error(traceback.format_exc())
 
     def _daemon_loop(self, aim_ctx, serve=True):
+        start_time = time.time()
         if serve:
             LOG.info("Start serving cycle.")
             tenants = self._calculate_tenants(aim_ctx)
@@ -163,24 +291,70 @@ class AID(object):
             for pair in self.multiverse:
                 pair[DESIRED].serve(tenants)
                 pair[CURRENT].serve(tenants)
+                pair[DESIRED].standby(self.standby_tenants)
+                pair[CURRENT].standby(self.standby_tenants)
             LOG.info("AID %s is currently serving: "
                      "%s" % (self.agent.id, tenants))
+            if self.standby_tenants:
+                LOG.info("AID %s is standby for: %s" %
+                         (self.agent.id, self.standby_tenants.keys()))
+            if self.handoff_tenants:
+                LOG.info("AID %s is handing off: %s" %
+                         (self.agent.id, self.handoff_tenants.keys()))
+            # Newly served tenants are synchronized in every universe
+            pairs = PAIR_PRIORITIES
+            self.scheduler.reconciled(pairs)
+            SERVED_TENANTS.set(len(tenants))
+            CYCLE_PHASE_TIME.observe(time.time() - start_time, phase='serve')
+        else:
+            pairs = self.scheduler.pop_due()
 
-        LOG.info("Start reconciliation cycle.")
         # REVISIT(ivar) Might be wise to wait here upon tenant serving to allow
         # time for events to happen
 
         # Observe the two universes to fix their current state
+        start_time = time.time()
+        work = []
         with utils.get_rlock(lcon.AID_OBSERVER_LOCK):
-            for pair in self.multiverse:
-                pair[DESIRED].observe()
-                pair[CURRENT].observe()
+            for index in pairs:
+                pair = self.multiverse[index]
+                dirty = (pair[DESIRED].pop_dirty_tenants() |
+                         pair[CURRENT].pop_dirty_tenants())
+                tenants = None
+                if serve or (time.time() - self._last_full_sweep.get(index, 0)
+                             >= self.full_sweep_interval):
+                    LOG.info("Start full reconciliation cycle for %s." %
+                             pair[CURRENT].name)
+                    self._last_full_sweep[index] = time.time()
+                elif dirty:
+                    LOG.info("Start reconciliation cycle for %s on tenants: "
+                             "%s" % (pair[CURRENT].name, dirty))
+                    tenants = dirty
+                else:
+                    continue
+                pair[DESIRED].observe(tenants=tenants)
+                pair[CURRENT].observe(tenants=tenants)
+                if self.standby_tenants:
+                    # Standbys are kept observed, only leaders reconcile
+                    tenants = (self._pair_tenants(pair, tenants, dirty) -
+                               set(self.standby_tenants))
+                work.append((pair, tenants, dirty))
+        CYCLE_PHASE_TIME.observe(time.time() - start_time, phase='observe')
+        if not work:
+            LOG.debug("No tenant changed, skipping reconciliation.")
+            return
 
         # Reconcile everything
-        changes = False
-        for pair in self.multiverse:
-            changes |= pair[CURRENT].reconcile(pair[DESIRED],
-                                               self.delete_candidates)
+        start_time = time.time()
+        if self.reconcile_workers > 0:
+            changes = self._parallel_reconcile(work)
+        else:
+            changes = False
+            for pair, tenants, _ in work:
+                changes |= pair[CURRENT].reconcile(pair[DESIRED],
+                                                   self.delete_candidates,
+                                                   tenants=tenants)
+        CYCLE_PHASE_TIME.observe(time.time() - start_time, phase='reconcile')
         if not changes:
             LOG.info("Congratulations! your multiverse is nice and synced :)")
 
@@ -194,6 +368,61 @@ class AID(object):
                                  (universe.name, tenant))
                         universe.cleanup_state(tenant)
 
+    def _parallel_reconcile(self, work):
+        """Reconcile universe pairs and tenant partitions concurrently
+
+        Each partition works on its own copy of the deletion votes, which are
+        merged back once all of them are done.
+        :param work: list of (pair, tenants, dirty) tuples, where tenants
+                     are the ones to reconcile (all of them when None) and
+                     dirty the ones that need reconciliation in this cycle.
+        :return: whether any universe had differences
+        """
+        tasks = []
+        for pair, tenants, dirty in work:
+            pair_tenants = sorted(self._pair_tenants(pair, tenants, dirty))
+            for i in range(self.reconcile_workers):
+                partition = pair_tenants[i::self.reconcile_workers]
+                if partition:
+                    votes = dict((x, set(self.delete_candidates[x]))
+                                 for x in partition
+                                 if x in self.delete_candidates)
+                    tasks.append((pair, partition, votes))
+        if self._reconcile_pool is None:
+            self._reconcile_pool = pool.ThreadPool(self.reconcile_workers)
+        results = self._reconcile_pool.map(self._reconcile_partition, tasks)
+        changes = False
+        for (pair, partition, votes), diff in zip(tasks, results):
+            changes |= diff
+            # Universes only add or remove their own vote
+            universe = pair[CURRENT]
+            for tenant in partition:
+                if universe in votes.get(tenant, set()):
+                    self.delete_candidates.setdefault(
+                        tenant, set()).add(universe)
+                else:
+                    self.delete_candidates.get(tenant, set()).discard(
+                        universe)
+        return changes
+
+    @staticmethod
+    def _pair_tenants(pair, tenants, dirty):
+        if tenants is not None:
+            return tenants
+        return set(pair[CURRENT].state) | set(pair[DESIRED].state) | dirty
+
+    def _reconcile_partition(self, task):
+        pair, tenants, votes = task
+        # Every worker has its own DB session
+        aim_ctx = getattr(self._worker_local, 'context', None)
+        if aim_ctx is None:
+            aim_ctx = context.AimContext(store=api.get_store())
+            self._worker_local.context = aim_ctx
+        with pair[DESIRED].thread_context(aim_ctx):
+            with pair[CURRENT].thread_context(aim_ctx):
+                return pair[CURRENT].reconcile(pair[DESIRED], votes,
+                                               tenants=tenants)
+
     def _spawn_heartbeat_loop(self):
         utils.spawn_thread(self._heartbeat_loop)
 
@@ -208,14 +437,26 @@ class AID(object):
     def _send_heartbeat(self, aim_ctx):
         LOG.info("Sending Heartbeat for agent %s" % self.agent_id)
         self.agent.beat_count += 1
+        self.agent.capacity = self.capacity
+        # Let the agents handing off tenants to this one know which are warm
+        served = getattr(self.agent, 'hash_trees', None)
+        if served is not None:
+            self.agent.warm_trees = list(self._warm_tenants() & set(served))
         self.agent = self.manager.create(aim_ctx, self.agent,
                                          overwrite=True)
 
+    def _warm_tenants(self):
+        return self.multiverse[base_universe.CONFIG_UNIVERSE][
+            CURRENT].warm_tenants()
+
     def _calculate_tenants(self, aim_ctx):
+        self.standby_tenants = {}
+        handoff, self.handoff_tenants = self.handoff_tenants, {}
         # REVISIT(ivar): should we lock the Agent table?
         with aim_ctx.store.begin(subtransactions=True):
             # Refresh this agent
             self.agent = self.manager.get(aim_ctx, self.agent)
+            self.agent.capacity = self.capacity
             if not self.single_aid:
                 down_time = self.agent.down_time(aim_ctx)
                 if max(0, down_time or 0) > self.max_down_time:
@@ -240,8 +481,11 @@ class AID(object):
             else:
                 agents = [self.agent]
             result = self._tenant_assignation_algorithm(aim_ctx, agents)
+            if self.agent in agents:
+                result += self._hand_off(agents, handoff, result)
             # Store result in DB
             self.agent.hash_trees = result
+            self.agent.warm_trees = list(self._warm_tenants() & set(result))
             self.manager.create(aim_ctx, self.agent, overwrite=True)
             return result
 
@@ -255,17 +499,113 @@ class AID(object):
         except ValueError:
             # This agent is down
             return result
-        # TODO(ivar): In future, for better resource usage, each agent
-        # could have a weight value in the DB definition
-        ring = hashring.ConsistentHashRing(dict([(x.id, None)
-                                                 for x in agents]))
+        ring_changed = self._ring.set_nodes(dict([(x.id, x.capacity)
+                                                  for x in agents]))
         # retrieve tenants
-        for tenant in self.tree_manager.get_roots(aim_ctx):
-            allocations = ring.assign_key(tenant)
+        tenants = self.tree_manager.get_roots(aim_ctx)
+        costs = None
+        if self.load_factor:
+            self._publish_costs(aim_ctx, agents, tenants)
+            # Every agent places the tenants with the published costs
+            costs = self.tree_manager.get_published_costs(aim_ctx, tenants)
+        key = (set(tenants), costs, self.load_factor)
+        if ring_changed or self._allocations[0] != key:
+            if costs is not None:
+                allocations = self._ring.assign_keys_bounded(
+                    costs, self.load_factor)
+            else:
+                allocations = self._ring.assign_keys(tenants)
+            self._allocations = (key, allocations)
+        standby = {}
+        for tenant in tenants:
+            allocations = self._allocations[1][tenant]
             if self.agent_id in allocations:
                 result.append(tenant)
+                if (self.leader_per_tenant and
+                        allocations[0] != self.agent_id):
+                    standby[tenant] = allocations[0]
+        self.standby_tenants = standby
         return result
 
+    def _publish_costs(self, aim_ctx, agents, tenants):
+        """Measure and publish the tenants cost
+
+        Only the agent with the lowest id does, at most once per refresh
+        interval. Costs measured by each agent would differ, as the trees
+        change in between, and so would their tenant placements.
+        """
+        if self.agent_id != min(x.id for x in agents):
+            return
+        now = time.time()
+        if now - self._last_cost_refresh < self.cost_refresh_interval:
+            return
+        self.tree_manager.set_root_costs(
+            aim_ctx, self.tree_manager.get_root_costs(aim_ctx, tenants))
+        self._last_cost_refresh = now
+
+    def _hand_off(self, agents, started, served):
+        """Tenants kept served while their new owners warm up
+
+        A tenant this agent was serving, and that moved to other agents, is
+        served until all of its new owners report it warm with their
+        heartbeat, or the hand-off window expires.
+        :param started: tenants being handed off, with the time it started
+        :return: list of the tenants being handed off
+        """
+        handoff = {}
+        moved = (set(self.agent.hash_trees or []) &
+                 set(self._allocations[1])) - set(served)
+        if moved and self.handoff_window > 0:
+            warm = dict((x.id, set(x.warm_trees or [])) for x in agents)
+            now = time.time()
+            for tenant in moved:
+                start = started.get(tenant, now)
+                owners = self._allocations[1][tenant]
+                if now - start < self.handoff_window and any(
+                        tenant not in warm.get(x, set()) for x in owners):
+                    handoff[tenant] = start
+        self.handoff_tenants = handoff
+        return sorted(handoff)
+
+    def _leaders_down(self, aim_ctx):
+        """Whether the leader of a standby tenant stopped heartbeating"""
+        leaders = set(self.standby_tenants.values())
+        if not leaders or (time.time() - self._last_leader_check <
+                           AID_EXIT_CHECK_INTERVAL):
+            return False
+        self._last_leader_check = time.time()
+        alive = set(x.id for x in self.manager.find(
+            aim_ctx, resource.Agent, admin_state_up=True,
+            in_={'id': list(leaders)}) if not x.is_down(aim_ctx))
+        if leaders - alive:
+            LOG.warn("Leader agents %s are down, taking over their "
+                     "tenants." % list(leaders - alive))
+            return True
+        return False
+
+    def _handoffs_done(self, aim_ctx):
+        """Whether a tenant being handed off can be released"""
+        if not self.handoff_tenants or (
+                time.time() - self._last_handoff_check <
+                AID_EXIT_CHECK_INTERVAL):
+            return False
+        self._last_handoff_check = time.time()
+        if any(self._last_handoff_check - x >= self.handoff_window
+               for x in self.handoff_tenants.values()):
+            return True
+        owners = dict((x, self._allocations[1].get(x, []))
+                      for x in self.handoff_tenants)
+        agents = self.manager.find(
+            aim_ctx, resource.Agent,
+            in_={'id': list(set(sum(owners.values(), [])))})
+        warm = dict((x.id, set(x.warm_trees or [])) for x in agents)
+        for tenant, agents in owners.iteritems():
+            if all(tenant in warm.get(x, set()) for x in agents):
+                LOG.info("Tenant %s is warm on its new agents %s, ending "
+                         "hand-off." % (tenant, agents))
+                return True
+        return False
+
     def _major_vercompare(self, x, y):
         return (semantic_version.Version(x).major -
                 semantic_version.Version(y).major)
@@ -287,13 +627,69 @@ class AID(object):
     def _change_squash_time(self, new_conf):
         # TODO(ivar): interrupt current sleep and restart with new value
         self.squash_time = new_conf['value']
+        self.squash_policy.min_time = self.squash_time
 
+    def _change_squash_max_time(self, new_conf):
+        self.squash_max_time = new_conf['value']
+        self.squash_policy.max_time = self.squash_max_time
 
-def main():
-    aim_cfg.init(sys.argv[1:])
-    aim_cfg.setup_logging()
+    def _change_full_sweep_interval(self, new_conf):
+        self.full_sweep_interval = new_conf['value']
+
+    def _change_reconcile_interval(self, new_conf):
+        self.scheduler.set_cadence(PAIR_CADENCE_OPTIONS[new_conf['key']],
+                                   new_conf['value'])
+
+    def _change_capacity(self, new_conf):
+        # Stored with the next heartbeat or serve cycle
+        self.capacity = new_conf['value']
+        event_handler.EventHandler.serve()
+
+    def _change_load_factor(self, new_conf):
+        self.load_factor = new_conf['value']
+        event_handler.EventHandler.serve()
+
+    def _change_cost_refresh_interval(self, new_conf):
+        self.cost_refresh_interval = new_conf['value']
+        self._last_cost_refresh = 0
+        event_handler.EventHandler.serve()
+
+    def _change_handoff_window(self, new_conf):
+        self.handoff_window = new_conf['value']
+        event_handler.EventHandler.serve()
+
+    def _change_leader_per_tenant(self, new_conf):
+        self.leader_per_tenant = new_conf['value']
+        # Standby tenants are calculated when serving
+        event_handler.EventHandler.serve()
+
+    def _change_reconcile_workers(self, new_conf):
+        self.reconcile_workers = new_conf['value']
+        if self._reconcile_pool is not None:
+            # Workers are idle in between cycles
+            self._reconcile_pool.close()
+            self._reconcile_pool = None
+
+
+def _export_metrics(conf, worker=None):
+    port = conf.aim.agent_metrics_port
+    if worker is not None:
+        # Every worker process has its own port
+        port += worker + 1
+    try:
+        metrics.serve(port)
+    except socket.error as e:
+        LOG.error("Cannot export metrics on port %s: %s" % (port, e))
+        return
+    if conf.aim.aim_store == 'sql':
+        api.count_queries()
+
+
+def run(conf, worker=None):
+    if conf.aim.agent_metrics_port:
+        _export_metrics(conf, worker=worker)
     try:
-        agent = AID(aim_cfg.CONF)
+        agent = AID(conf, worker=worker)
     except (RuntimeError, ValueError) as e:
         LOG.error("%s Agent terminated!" % e)
         sys.exit(1)
@@ -302,5 +698,18 @@ def main():
     agent.daemon_loop()
 
 
+def main():
+    aim_cfg.init(sys.argv[1:])
+    aim_cfg.setup_logging()
+    if aim_cfg.CONF.aim.agent_workers > 0:
+        if aim_cfg.CONF.aim.aim_store == 'k8s':
+            LOG.warn("AID workers are not supported with the k8s store, "
+                     "running a single process.")
+        else:
+            supervisor.main(aim_cfg.CONF, run)
+            return
+    run(aim_cfg.CONF)
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,94 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+# Weight of the latest sample in the average time between events
+SMOOTHING = 0.3
+# Inter-arrival times worth waiting for while events come in bursts
+BURST_FACTOR = 2
+# Fraction of the last cycle duration worth waiting during bursts
+CYCLE_FACTOR = 0.5
+
+
+class SquashPolicy(object):
+    """Decides how long AID waits to squash events together.
+
+    Isolated events are handled after the minimum window. While events
+    come in bursts, closer than the maximum window to each other, the
+    window grows with the time between them and with the duration of the
+    last cycle: waiting a little longer batches more events in the same,
+    expensive, cycle. The window never exceeds the maximum.
+    """
+
+    def __init__(self, min_time, max_time):
+        """Initialize policy
+
+        :param min_time: seconds to wait for more events after the first one
+        :param max_time: upper bound of the window, when lower than
+                         min_time the window is fixed.
+        """
+        self.min_time = min_time
+        self.max_time = max_time
+        # Average seconds between events, and when the last one arrived
+        self._interval = None
+        self._last_event = None
+        self._cycle = 0
+        # Last window chosen
+        self.window = min_time
+
+    def event(self, now=None):
+        """Account for an event received."""
+        now = now or time.time()
+        if self._last_event is not None:
+            sample = now - self._last_event
+            if self._interval is None or sample > self.max_time:
+                # A quiet period ends any burst
+                self._interval = sample
+            else:
+                self._interval = (SMOOTHING * sample +
+                                  (1 - SMOOTHING) * self._interval)
+        self._last_event = now
+
+    def cycle(self, duration):
+        """Account for the duration of the cycle just completed."""
+        self._cycle = duration
+
+    def bursting(self, now=None):
+        """Whether events are currently coming in bursts."""
+        if self._interval is None or self._interval > self.max_time:
+            return False
+        now = now or time.time()
+        return now - self._last_event <= self.max_time
+
+    def squash_time(self, now=None):
+        """Seconds to wait for more events after the first one."""
+        window = self.min_time
+        if self.bursting(now):
+            window = max(window, min(
+                self.max_time, max(BURST_FACTOR * self._interval,
+                                   CYCLE_FACTOR * self._cycle)))
+        self.window = window
+        return window
+
+    def polling_interval(self, polling_interval, now=None):
+        """Minimum seconds between the start of two cycles.
+
+        Only enforced during bursts when the window is adaptive, an isolated
+        event after a cycle is handled right away.
+        """
+        if self.max_time <= self.min_time or self.bursting(now):
+            return polling_interval
+        return 0
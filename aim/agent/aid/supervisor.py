@@ -0,0 +1,200 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import errno
+import os
+import signal
+import socket
+import time
+import traceback
+
+from oslo_log import log as logging
+
+from aim.agent.aid import event_handler
+from aim.db import api
+
+LOG = logging.getLogger(__name__)
+SUPERVISOR_CHECK_INTERVAL = 5
+# Minimum time between two spawns of the same worker
+WORKER_RESPAWN_INTERVAL = 10
+
+
+class AIDSupervisor(object):
+    """Runs AID as multiple worker processes on the same host.
+
+    Every worker is a separate AID agent, so the served tenants are spread
+    across them by the same consistent hashing that spreads them across
+    hosts. The supervisor owns the AID unix socket and relays every event
+    to all the workers, it also restarts the ones that exit.
+
+    Workers are forked from the supervisor's main thread at any time, so the
+    supervisor itself never runs other threads: a lock held by one of them
+    while forking, like the logging or the event queue ones, would stay
+    locked forever in the child.
+    """
+
+    def __init__(self, conf, worker_main):
+        """Initialize supervisor
+
+        :param conf: AIM configuration
+        :param worker_main: callable running an AID worker, it receives the
+                            configuration and the worker index.
+        """
+        self.conf = conf
+        self.worker_main = worker_main
+        self.workers = conf.aim.agent_workers
+        self.run_daemon_loop = True
+        # pid to worker index
+        self.children = {}
+        self._spawned_at = {}
+        # Read from the configuration file: a ConfigManager would open a DB
+        # store, and possibly start the option subscriber thread, in the
+        # supervisor
+        self.us_path = conf.aim.unix_socket_path
+        self.sock = None
+
+    def _spawn(self, worker):
+        # Children must not share DB connections with their parent
+        api.dispose()
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                self.worker_main(self.conf, worker=worker)
+            except SystemExit as e:
+                exit_code = e.code
+            except Exception:
+                LOG.error(traceback.format_exc())
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        LOG.info("Spawned AID worker %s with pid %s" % (worker, pid))
+        self.children[pid] = worker
+        self._spawned_at[worker] = time.time()
+        return pid
+
+    def _reap(self):
+        """Collect the workers that exited."""
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except OSError as e:
+                if e.errno != errno.ECHILD:
+                    raise
+                self.children = {}
+                return
+            if not pid:
+                return
+            worker = self.children.pop(pid, None)
+            if worker is not None:
+                log = LOG.error if self.run_daemon_loop else LOG.info
+                log("AID worker %s (pid %s) exited with status %s" %
+                    (worker, pid, status))
+
+    def _respawn(self):
+        running = set(self.children.values())
+        for worker in range(self.workers):
+            if worker in running:
+                continue
+            if (time.time() - self._spawned_at.get(worker, 0) <
+                    WORKER_RESPAWN_INTERVAL):
+                # Don't restart crashing workers in a tight loop
+                continue
+            self._spawn(worker)
+
+    def _connect(self):
+        LOG.info("Connect to socket %s" % self.us_path)
+        try:
+            os.unlink(self.us_path)
+        except OSError:
+            if os.path.exists(self.us_path):
+                raise
+        sock_dir = os.path.dirname(self.us_path)
+        if not os.path.exists(sock_dir):
+            os.makedirs(sock_dir)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(self.us_path)
+        self.sock.settimeout(SUPERVISOR_CHECK_INTERVAL)
+
+    def _get_event(self):
+        """Wait for an event at most SUPERVISOR_CHECK_INTERVAL seconds."""
+        try:
+            if self.sock is None:
+                self._connect()
+            event = self.sock.recv(event_handler.PAYLOAD_MAX_LEN)
+        except socket.timeout:
+            return None
+        except (socket.error, OSError) as e:
+            LOG.error("An error as occurred on the AID socket: %s" % e)
+            if self.sock is not None:
+                self.sock.close()
+                self.sock = None
+            time.sleep(SUPERVISOR_CHECK_INTERVAL)
+            return None
+        LOG.debug("Received event %s" % event)
+        if event.lower() in event_handler.EVENTS:
+            return event
+
+    def _relay(self, event):
+        for worker in sorted(self.children.values()):
+            try:
+                self.sock.sendto(
+                    event, event_handler.worker_socket_path(self.us_path,
+                                                            worker))
+            except socket.error as e:
+                # The worker might be starting, it serves all its tenants
+                # the first time anyway.
+                LOG.debug("Event %s not relayed to worker %s: %s" %
+                          (event, worker, e))
+
+    def run(self):
+        for worker in range(self.workers):
+            self._spawn(worker)
+        while self.run_daemon_loop:
+            try:
+                event = self._get_event()
+                if event:
+                    self._relay(event)
+                self._reap()
+                if self.run_daemon_loop:
+                    self._respawn()
+            except Exception:
+                LOG.error('A error occurred in AID supervisor')
+                LOG.error(traceback.format_exc())
+        self._stop()
+
+    def _stop(self):
+        LOG.info("Stopping AID workers.")
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+        while self.children:
+            self._reap()
+            time.sleep(0.1)
+        if self.sock is not None:
+            self.sock.close()
+
+    def _handle_sigterm(self, signum, frame):
+        LOG.warn("AID supervisor caught SIGTERM, stopping workers.")
+        self.run_daemon_loop = False
+
+
+def main(conf, worker_main):
+    supervisor = AIDSupervisor(conf, worker_main)
+    signal.signal(signal.SIGTERM, supervisor._handle_sigterm)
+    supervisor.run()
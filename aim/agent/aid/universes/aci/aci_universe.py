@@ -260,6 +260,10 @@ class AciUniverse(base.HashTreeStoredUniverse):
     def name(self):
         return "ACI_Config_Universe"
 
+    @property
+    def tree_type(self):
+        return tree_manager.HashTreeBuilder.CONFIG
+
     @property
     def serving_tenants(self):
         global serving_tenants
@@ -325,16 +329,33 @@ class AciUniverse(base.HashTreeStoredUniverse):
             serving_tenants = serving_tenant_copy
             raise e
 
-    def observe(self):
+    def warm_tenants(self):
+        """Served tenants whose ACI state has been fully loaded"""
+        global serving_tenants
+        return set(tenant for tenant, manager in serving_tenants.items()
+                   if manager.is_warm())
+
+    def observe(self, tenants=None):
         # Copy state accumulated so far
         global serving_tenants
         new_state = {}
         for tenant in serving_tenants:
             # Only copy state if the tenant is warm
             if serving_tenants[tenant].is_warm():
-                new_state[tenant] = self._get_state_copy(tenant)
+                if (tenants is None or tenant in tenants or
+                        tenant not in self._state):
+                    new_state[tenant] = self._get_state_copy(tenant)
+                else:
+                    new_state[tenant] = self._state[tenant]
         self._state = new_state
 
+    def pop_dirty_tenants(self):
+        global serving_tenants
+        for tenant, manager in serving_tenants.items():
+            if manager.pop_modified(self.tree_type):
+                self.mark_dirty([tenant])
+        return super(AciUniverse, self).pop_dirty_tenants()
+
     def reset(self, tenants):
         global serving_tenants
         LOG.warn('Reset called for roots %s' % tenants)
@@ -448,6 +469,10 @@ class AciOperationalUniverse(AciUniverse):
     def name(self):
         return "ACI_Operational_Universe"
 
+    @property
+    def tree_type(self):
+        return tree_manager.HashTreeBuilder.OPER
+
     def _get_state_copy(self, tenant):
         global serving_tenants
         return serving_tenants[tenant].get_operational_state_copy()
@@ -460,6 +485,10 @@ class AciMonitoredUniverse(AciUniverse):
     def name(self):
         return "ACI_Monitored_Universe"
 
+    @property
+    def tree_type(self):
+        return tree_manager.HashTreeBuilder.MONITOR
+
     def _get_state_copy(self, tenant):
         global serving_tenants
         return serving_tenants[tenant].get_monitored_state_copy()
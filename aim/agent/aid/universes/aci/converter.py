@@ -220,7 +220,7 @@ def fv_rs_master_epg_converter(object_dict, otype, helper,
                 try:
                     attr = [object_dict.get('tenant_name'),
                             p.get('app_profile_name'), p.get('name')]
-                    path = apic_client.ManagedObjectClass('fvAEPg').dn(*attr)
+                    path = aim_utils.get_mo_class('fvAEPg').dn(*attr)
                 except Exception as e:
                     LOG.error('Failed to make DN for %s with %s: %s',
                               helper['resource'], attr, e)
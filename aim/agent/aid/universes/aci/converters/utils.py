@@ -19,6 +19,8 @@ from oslo_log import log as logging
 
 from apicapi import apic_client
 
+from aim.common import utils as aim_utils
+
 LOG = logging.getLogger(__name__)
 
 
@@ -160,7 +162,7 @@ def default_identity_converter(object_dict, otype, helper,
             attr.extend(extra_attributes)
         mo_type = aci_mo_type or helper['resource']
         try:
-            return [apic_client.ManagedObjectClass(mo_type).dn(*attr)]
+            return [aim_utils.get_mo_class(mo_type).dn(*attr)]
         except Exception as e:
             LOG.error('Failed to make DN for %s with %s: %s',
                       mo_type, attr, e)
@@ -343,7 +345,7 @@ def dn_decomposer(aim_attr_list, aci_mo):
             dn_attrs = [object_dict[a] for a in aim_attr_list
                         if object_dict.get(a)]
             if len(dn_attrs) == len(aim_attr_list):
-                dn = apic_client.ManagedObjectClass(aci_mo).dn(*dn_attrs)
+                dn = aim_utils.get_mo_class(aci_mo).dn(*dn_attrs)
             else:
                 dn = ''
             return dn
@@ -30,10 +30,19 @@ from aim.agent.aid.universes.aci import error
 from aim.agent.aid.universes import base_universe
 from aim.agent.aid.universes import constants as lcon
 from aim.common.hashtree import structured_tree
+from aim.common import metrics
 from aim.common import utils
 from aim import tree_manager
 
 LOG = logging.getLogger(__name__)
+APIC_REQUEST_TIME = metrics.Histogram(
+    'aim_apic_request_seconds',
+    'Latency of the requests pushing AIM objects into APIC.',
+    labels=('method',))
+APIC_REQUEST_ERRORS = metrics.Counter(
+    'aim_apic_request_errors_total',
+    'Requests pushing AIM objects into APIC that failed.',
+    labels=('method',))
 TENANT_KEY = 'fvTenant'
 FAULT_KEY = 'faultInst'
 TAG_KEY = 'tagInst'
@@ -99,6 +108,13 @@ def get_children_mos(apic_session, root):
 
 OPERATIONAL_LIST = [FAULT_KEY]
 TENANT_FAILURE_MAX_WAIT = 60
+TREE_EVENTS = {
+    tree_manager.HashTreeBuilder.CONFIG: event_handler.EVENT_RECONCILE_CONFIG,
+    tree_manager.HashTreeBuilder.OPER:
+        event_handler.EVENT_RECONCILE_OPERATIONAL,
+    tree_manager.HashTreeBuilder.MONITOR:
+        event_handler.EVENT_RECONCILE_MONITORED,
+}
 ACI_TYPES_NOT_CONVERT_IF_MONITOR = {}
 ACI_TYPES_SKIP_ON_MANAGES = {}
 for typ in converter.resource_map:
@@ -179,6 +195,8 @@ class AciTenantManager(utils.AIMThread):
             'aim_system_id', 'aim')
         self.tag_set = set()
         self.failure_log = {}
+        # Trees changed since the universes last looked at them
+        self._modified_trees = set()
 
         def noop(par):
             pass
@@ -205,6 +223,19 @@ class AciTenantManager(utils.AIMThread):
     def is_warm(self):
         return self._warm
 
+    def _mark_modified(self, *trees):
+        self._modified_trees.update(trees or (
+            self.tree_builder.CONFIG, self.tree_builder.OPER,
+            self.tree_builder.MONITOR))
+
+    def pop_modified(self, tree):
+        """Whether a tree changed since the last call for the same tree."""
+        try:
+            self._modified_trees.remove(tree)
+            return True
+        except KeyError:
+            return False
+
     def get_state_copy(self):
         with utils.get_rlock(lcon.ACI_TREE_LOCK_NAME_PREFIX +
                              self.tenant_name):
@@ -305,6 +336,7 @@ class AciTenantManager(utils.AIMThread):
                     self._monitored_state = (
                         structured_tree.StructuredHashTree())
                     self.tag_set = set()
+                    self._mark_modified()
                     break
             LOG.debug("received events for root %s: %s" %
                       (self.tenant_name, events))
@@ -404,6 +436,7 @@ class AciTenantManager(utils.AIMThread):
                         # them in a single transaction
                         dn_mgr = apic_client.DNManager()
                         decompose = dn_mgr.aci_decompose_dn_guess
+                        start_time = time.time()
                         try:
                             if method == base_universe.CREATE:
                                 with self.aci_session.transaction(
@@ -421,11 +454,14 @@ class AciTenantManager(utils.AIMThread):
                                     attr = obj.values()[0]['attributes']
                                     self.aci_session.DELETE(
                                         '/mo/%s.json' % attr.pop('dn'))
+                            APIC_REQUEST_TIME.observe(
+                                time.time() - start_time, method=method)
                             # Object creation was successful, change object
                             # state
                             if method == base_universe.CREATE:
                                 self.creation_succeeded(aim_object)
                         except Exception as e:
+                            APIC_REQUEST_ERRORS.inc(method=method)
                             LOG.debug(traceback.format_exc())
                             LOG.error("An error has occurred during %s for "
                                       "object %s: %s" % (method, aim_object,
@@ -443,6 +479,8 @@ class AciTenantManager(utils.AIMThread):
     def _unsubscribe_tenant(self):
         LOG.info("Unsubscribing tenant websocket %s" % self.tenant_name)
         self._warm = False
+        # The state is not served anymore
+        self._mark_modified()
         self.ws_context.unsubscribe(self.tenant.urls)
         self._reset_object_backlock()
 
@@ -452,6 +490,7 @@ class AciTenantManager(utils.AIMThread):
             -INTERVAL_DEVIATION, INTERVAL_DEVIATION)
         self._event_loop()
         self._warm = True
+        self._mark_modified()
 
     def _event_to_tree(self, events):
         """Parse the event and push it into the tree
@@ -519,18 +558,21 @@ class AciTenantManager(utils.AIMThread):
                  self.tree_builder.OPER:
                      {self.tenant_name: self._operational_state}})
 
-            # Send events on update
-            modified = False
-            for upd, tree, readable in [
-                    (upd_trees, self._state, "configuration"),
-                    (upd_op_trees, self._operational_state, "operational"),
-                    (upd_mon_trees, self._monitored_state, "monitored")]:
+            # Send events on update, only the universe pairs of the
+            # modified trees need to be reconciled
+            for upd, tree, readable, tree_type in [
+                    (upd_trees, self._state, "configuration",
+                     self.tree_builder.CONFIG),
+                    (upd_op_trees, self._operational_state, "operational",
+                     self.tree_builder.OPER),
+                    (upd_mon_trees, self._monitored_state, "monitored",
+                     self.tree_builder.MONITOR)]:
                 if upd:
-                    modified = True
+                    self._mark_modified(tree_type)
                     LOG.debug("New %s tree for tenant %s: %s" %
                               (readable, self.tenant_name, tree))
-            if modified:
-                event_handler.EventHandler.reconcile()
+                    event_handler.EventHandler.reconcile(
+                        TREE_EVENTS[tree_type])
 
     def _fill_events(self, events):
         """Gets incomplete objects from APIC if needed
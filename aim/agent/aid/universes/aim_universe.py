@@ -45,8 +45,12 @@ class AimDbUniverse(base.HashTreeStoredUniverse):
         self._converter = converter.AciToAimModelConverter()
         self._converter_aim_to_aci = converter.AimToAciModelConverter()
         self._served_tenants = set()
+        self._standby_tenants = set()
         self._monitored_state_update_failures = 0
         self._max_monitored_state_update_failures = 5
+        # Roots caught up with the action log by pop_dirty_tenants, not
+        # observed yet
+        self._caught_up = None
         return self
 
     def get_state_by_type(self, type):
@@ -76,16 +80,45 @@ class AimDbUniverse(base.HashTreeStoredUniverse):
             new_state.setdefault(tenant, self._state.get(tenant))
         self._state = new_state
 
+    def standby(self, tenants):
+        self._standby_tenants = set(tenants)
+
     @base.fix_session_if_needed
-    def observe(self):
+    def observe(self, tenants=None):
         # TODO(ivar): move this to a separate thread and add scheduled reset
         # mechanism
-        hashtree_db_listener.HashTreeDbListener(
-            self.manager).catch_up_with_action_log(self.context.store,
-                                                   self._served_tenants)
+        caught_up, self._caught_up = self._caught_up, None
+        if caught_up is None:
+            caught_up = self._catch_up()
+        if tenants is not None:
+            tenants = set(tenants) | caught_up
         # REVISIT(ivar): what if a root is marked as needs_reset? we could
         # avoid syncing it altogether
-        self._state.update(self.get_optimized_state(self.state))
+        self._state.update(self.get_optimized_state(self.state,
+                                                    tenants=tenants))
+
+    @base.fix_session_if_needed
+    def pop_dirty_tenants(self):
+        # The observation following in the same cycle reuses these roots
+        self._caught_up = self._catch_up()
+        return super(AimDbUniverse, self).pop_dirty_tenants()
+
+    def _catch_up(self):
+        # Action logs are consumed when caught up, the ones of standby
+        # tenants are left for their leader to find
+        roots = hashtree_db_listener.HashTreeDbListener(
+            self.manager).catch_up_with_action_log(
+            self.context.store, self._served_tenants - self._standby_tenants)
+        roots = roots or set()
+        self.mark_dirty(roots)
+        # The action log feeds the trees of all the AIM universes, which
+        # might be reconciled in different cycles.
+        for pair in self.multiverse or []:
+            for universe in pair.values():
+                if (universe is not self and
+                        isinstance(universe, AimDbUniverse)):
+                    universe.mark_dirty(roots)
+        return roots
 
     @base.fix_session_if_needed
     def reset(self, tenants):
@@ -95,9 +128,10 @@ class AimDbUniverse(base.HashTreeStoredUniverse):
                 self.manager).tt_mgr.set_needs_reset_by_root_rn(
                 self.context, root)
 
-    def get_optimized_state(self, other_state, tree=tree_manager.CONFIG_TREE):
+    def get_optimized_state(self, other_state, tree=tree_manager.CONFIG_TREE,
+                            tenants=None):
         # TODO(ivar): make it tree-version based to reflect metadata changes
-        return self._get_state(tree=tree)
+        return self._get_state(tree=tree, tenants=tenants)
         # request = {}
         # for tenant in self._served_tenants:
         #     request[tenant] = None
@@ -115,10 +149,12 @@ class AimDbUniverse(base.HashTreeStoredUniverse):
         self.tree_manager.delete_by_root_rn(self.context, key)
 
     @base.fix_session_if_needed
-    def _get_state(self, tree=tree_manager.CONFIG_TREE):
+    def _get_state(self, tree=tree_manager.CONFIG_TREE, tenants=None):
+        served = self._served_tenants
+        if tenants is not None:
+            served = served & set(tenants)
         return self.tree_manager.find_changed(
-            self.context, dict([(x, None) for x in self._served_tenants]),
-            tree=tree)
+            self.context, dict([(x, None) for x in served]), tree=tree)
 
     @property
     def state(self):
@@ -312,15 +348,16 @@ class AimDbOperationalUniverse(AimDbUniverse):
         return [self.state]
 
     def get_optimized_state(
-            self, other_state, tree=tree_manager.OPERATIONAL_TREE):
+            self, other_state, tree=tree_manager.OPERATIONAL_TREE,
+            tenants=None):
         return super(AimDbOperationalUniverse, self).get_optimized_state(
-            other_state, tree=tree)
+            other_state, tree=tree, tenants=tenants)
 
-    def reconcile(self, other_universe, delete_candidates):
+    def reconcile(self, other_universe, delete_candidates, tenants=None):
         # When the other universes are ok with deleting a Tenant, there's no
         # reason for the Operational Universe to oppose that decision
         return self._reconcile(other_universe, delete_candidates,
-                               always_vote_deletion=True)
+                               always_vote_deletion=True, tenants=tenants)
 
     def update_status_objects(self, my_state, other_state, other_universe,
                               raw_diff, transformed_diff, skip_roots=None):
@@ -337,18 +374,19 @@ class AimDbMonitoredUniverse(AimDbUniverse):
         return [self.state, self.get_state_by_type(base.CONFIG_UNIVERSE)]
 
     def get_optimized_state(
-            self, other_state, tree=tree_manager.MONITORED_TREE):
+            self, other_state, tree=tree_manager.MONITORED_TREE,
+            tenants=None):
         return super(AimDbMonitoredUniverse, self).get_optimized_state(
-            other_state, tree=tree)
+            other_state, tree=tree, tenants=tenants)
 
     def push_resources(self, resources):
         self._push_resources(resources, monitored=True)
 
-    def reconcile(self, other_universe, delete_candidates):
+    def reconcile(self, other_universe, delete_candidates, tenants=None):
         # We want monitored universe to stop reconciling when the corresponding
         # AIM tenant doesn't exist.
         return self._reconcile(other_universe, delete_candidates,
-                               skip_dummy=True)
+                               skip_dummy=True, tenants=tenants)
 
     def update_status_objects(self, my_state, other_universe, other_state,
                               raw_diff, transformed_diff, skip_roots=None):
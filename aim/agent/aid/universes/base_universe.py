@@ -15,7 +15,9 @@
 
 
 import abc
+import contextlib
 import six
+import threading
 import time
 
 from apicapi import apic_client
@@ -25,6 +27,7 @@ from aim.agent.aid.universes.aci import converter
 from aim.agent.aid.universes import errors
 from aim import aim_manager
 from aim.common.hashtree import structured_tree
+from aim.common import metrics
 from aim.common import utils
 from aim import context
 from aim import tree_manager
@@ -33,6 +36,14 @@ from aim import tree_manager
 LOG = logging.getLogger(__name__)
 CREATE = 'create'
 DELETE = 'delete'
+DIFFERENCES = metrics.Histogram(
+    'aim_aid_universe_differences',
+    'Resources to create or delete found by each reconciliation.',
+    labels=('universe', 'action'), buckets=metrics.SIZE_BUCKETS)
+PUSH_TIME = metrics.Histogram(
+    'aim_aid_push_seconds',
+    'Time spent pushing the differences into a universe.',
+    labels=('universe',))
 CONFIG_UNIVERSE = 0
 OPER_UNIVERSE = 1
 MONITOR_UNIVERSE = 2
@@ -77,17 +88,29 @@ class BaseUniverse(object):
         """
 
     @abc.abstractmethod
-    def observe(self):
+    def observe(self, tenants=None):
         """Observes the current state of the Universe
 
         This method is used to refresh the current state. Some Universes might
         want to run threads at initialization time for this purpose. In that
         case this method can be void.
+        :param tenants: only refresh the state of these tenants, all of them
+                        when None.
         :return:
         """
 
     @abc.abstractmethod
-    def reconcile(self, other_universe, delete_candidates):
+    def pop_dirty_tenants(self):
+        """Tenants that changed since the last call
+
+        Returns the tenants whose state might have changed, or that still
+        have pending work, since the last time this method was called. Only
+        those need to be observed and reconciled.
+        :return: set of tenant identifiers
+        """
+
+    @abc.abstractmethod
+    def reconcile(self, other_universe, delete_candidates, tenants=None):
         """State reconciliation method.
 
         When an universe's reconcile method is called, the state of the passed
@@ -103,6 +126,7 @@ class BaseUniverse(object):
                identifier, while the value is a set of universes' instance
                where a specific Universe adds/removes itself to when he
                agrees/desagrees on a tenant being removed.
+        :param tenants: only reconcile these tenants, all of them when None.
         :return:
         """
 
@@ -202,6 +226,15 @@ class AimUniverse(BaseUniverse):
         :return:
         """
 
+    def standby(self, tenants):
+        """Set the served tenants another agent is the leader of
+
+        The changes of these tenants are consumed and reconciled by their
+        leader only.
+        :param tenants: List of tenant identifiers
+        :return:
+        """
+
     @abc.abstractmethod
     def cleanup_state(self, key):
         """Cleanup state entry
@@ -257,6 +290,7 @@ class HashTreeStoredUniverse(AimUniverse):
         super(HashTreeStoredUniverse, self).initialize(
             store, conf_mgr, multiverse)
         self.multiverse = multiverse
+        self._local = threading.local()
         self.context = context.AimContext(store=store)
         self.manager = aim_manager.AimManager()
         self.conf_manager = conf_mgr
@@ -277,8 +311,34 @@ class HashTreeStoredUniverse(AimUniverse):
             errors.SYSTEM_CRITICAL: self._fail_agent,
         }
         self._action_cache = {}
+        self._action_cache_lock = threading.Lock()
+        # Tenants changed since the last reconciliation, and the roots of the
+        # objects in failure_log
+        self._dirty_tenants = set()
+        self._failed_roots = {}
         return self
 
+    @property
+    def context(self):
+        return getattr(self._local, 'context', self._context)
+
+    @context.setter
+    def context(self, value):
+        self._context = value
+
+    @contextlib.contextmanager
+    def thread_context(self, aim_ctx):
+        """Use aim_ctx for the DB operations of the calling thread
+
+        Universes can be reconciled by multiple threads at once, each with
+        its own DB session.
+        """
+        self._local.context = aim_ctx
+        try:
+            yield
+        finally:
+            del self._local.context
+
     def _dissect_key(self, key):
         # Returns ('apicType', [identity list])
         aci_type = key[-1][:key[-1].find('|')]
@@ -306,11 +366,24 @@ class HashTreeStoredUniverse(AimUniverse):
             aci_objects.append(aci_object)
         return aci_objects
 
-    def observe(self):
+    def observe(self, tenants=None):
         pass
 
-    def reconcile(self, other_universe, delete_candidates):
-        return self._reconcile(other_universe, delete_candidates)
+    def mark_dirty(self, tenants):
+        self._dirty_tenants.update(tenants)
+
+    def pop_dirty_tenants(self):
+        dirty, self._dirty_tenants = self._dirty_tenants, set()
+        # Tenants that are failing or retrying need to be reconciled until
+        # they converge
+        dirty.update(x for x in self._failed_roots.values() if x)
+        for by_root in self._action_cache.values():
+            dirty.update(by_root)
+        return dirty
+
+    def reconcile(self, other_universe, delete_candidates, tenants=None):
+        return self._reconcile(other_universe, delete_candidates,
+                               tenants=tenants)
 
     def _vote_tenant_for_deletion(self, other_universe, tenant,
                                   delete_candidates):
@@ -318,7 +391,8 @@ class HashTreeStoredUniverse(AimUniverse):
         votes.add(self)
 
     def _reconcile(self, other_universe, delete_candidates,
-                   skip_dummy=False, always_vote_deletion=False):
+                   skip_dummy=False, always_vote_deletion=False,
+                   tenants=None):
         # "self" is always the current state, "other" the desired
         my_state = self.state
         # TODO(ivar): We used get_optimized_state method here. By doing that
@@ -327,6 +401,13 @@ class HashTreeStoredUniverse(AimUniverse):
         # different tenants and those with at least one hashtree node in
         # pending state.
         other_state = other_universe.state
+        if tenants is not None:
+            # Leave alone the tenants that didn't change, their status
+            # objects and deletion votes are the ones of the last cycle
+            my_state = dict((x, my_state[x]) for x in tenants
+                            if x in my_state)
+            other_state = dict((x, other_state[x]) for x in tenants
+                               if x in other_state)
         differences = {CREATE: [], DELETE: []}
         for tenant in set(my_state.keys()) & set(other_state.keys()):
             tree = other_state[tenant]
@@ -356,6 +437,9 @@ class HashTreeStoredUniverse(AimUniverse):
                     # This universe disagrees on deletion
                     delete_candidates.get(tenant, set()).discard(self)
 
+        for action in CREATE, DELETE:
+            DIFFERENCES.observe(len(differences[action]), universe=self.name,
+                                action=action)
         if not differences.get(CREATE) and not differences.get(DELETE):
             LOG.debug("Universe %s and %s are in sync." %
                       (self.name, other_universe.name))
@@ -369,8 +453,8 @@ class HashTreeStoredUniverse(AimUniverse):
         result = {CREATE: other_universe.get_resources(differences[CREATE]),
                   DELETE: self.get_resources_for_delete(differences[DELETE])}
 
-        reset, purge = self._track_universe_actions(result)
-        LOG.debug('Action cache for %s: %s' % (self.name, self._action_cache))
+        reset, purge = self._track_universe_actions(result, roots=tenants)
+        LOG.debug('Action cache for %s: %s', self.name, self._action_cache)
         # Schedule root reset
         if reset:
             self.reset(reset)
@@ -407,7 +491,8 @@ class HashTreeStoredUniverse(AimUniverse):
                                              differences, result,
                                              skip_roots=stop_sync)
         # Reconciliation method for pushing changes
-        self.push_resources(result)
+        with PUSH_TIME.time(universe=self.name):
+            self.push_resources(result)
         return diff
 
     def reset(self, tenants):
@@ -531,6 +616,7 @@ class HashTreeStoredUniverse(AimUniverse):
     def creation_succeeded(self, aim_object):
         aim_id = self._get_aim_object_identifier(aim_object)
         self.failure_log.pop(aim_id, None)
+        self._failed_roots.pop(aim_id, None)
 
     def creation_failed(self, aim_object, reason='unknown',
                         error=errors.UNKNOWN):
@@ -552,6 +638,7 @@ class HashTreeStoredUniverse(AimUniverse):
         curr_time = time.time()
         if not last or curr_time - last >= self.retry_cooldown:
             self.failure_log[aim_id] = (failures + 1, curr_time)
+            self._failed_roots[aim_id] = getattr(aim_object, 'root', None)
             if self.failure_log[aim_id][0] >= self.max_create_retry:
                 LOG.warn("AIM object %s failed %s more than %s times in %s, "
                          "setting its state to Error" %
@@ -560,6 +647,7 @@ class HashTreeStoredUniverse(AimUniverse):
                 self.manager.set_resource_sync_error(self.context, aim_object,
                                                      message=reason)
                 self.failure_log.pop(aim_id, None)
+                self._failed_roots.pop(aim_id, None)
 
     @fix_session_if_needed
     def _surrender_operation(self, aim_object, operation, reason):
@@ -567,6 +655,7 @@ class HashTreeStoredUniverse(AimUniverse):
         self.manager.set_resource_sync_error(self.context, aim_object,
                                              message=reason)
         self.failure_log.pop(aim_id, None)
+        self._failed_roots.pop(aim_id, None)
 
     def _fail_agent(self, aim_object, operation, reason):
         utils.perform_harakiri(LOG, message=reason)
@@ -582,47 +671,68 @@ class HashTreeStoredUniverse(AimUniverse):
     def _convert_get_resources_result(self, result, monitored_set):
         return result
 
-    def _track_universe_actions(self, actions):
+    def _track_universe_actions(self, actions, roots=None):
         """Track Universe Actions.
 
         Keep track of what the universe has been doing in the past few
         iterations. Keeping count of any operation repeated over time and
         decreasing count of actions that are not happening in this iteration.
         :param actions: dictionary in the form {'create': [..], 'delete': [..]}
+        :param roots: roots that were reconciled in this iteration, only
+                      their missing actions are forgotten. All of them when
+                      None.
         :return:
         """
-        cache = {}
+        with self._action_cache_lock:
+            return self._track_universe_actions_locked(actions, roots)
+
+    def _track_universe_actions_locked(self, actions, roots):
         curr_time = time.time()
         reset = set()
         purge = []
+        seen = set()
         for action in [CREATE, DELETE]:
+            by_root = self._action_cache.setdefault(action, {})
             for res in self._action_items_to_aim_resources(actions, action):
+                root = res.root
+                key = res.fingerprint
                 # Same resource created twice in the same iteration is
                 # increased only once
-                root = res.root
-                new = (cache.setdefault(action, {}).
-                       setdefault(root, {}).
-                       setdefault(res.hash, {'limit': self.reset_retry_limit,
-                                             'res': res, 'retries': 0,
-                                             'action': ACTION_RESET,
-                                             'last': curr_time}))
-                # Retrieve current object situation if any
-                curr = self._action_cache.get(action, {}).get(root, {}).get(
-                    res.hash, {})
-                if curr:
-                    new.update(curr)
-                    if curr_time - curr['last'] >= self.retry_cooldown:
-                        new['retries'] += 1
-                        new['last'] = curr_time
-                if new['retries'] > new['limit']:
-                    if new['action'] == ACTION_RESET:
+                if (action, root, key) in seen:
+                    continue
+                seen.add((action, root, key))
+                entries = by_root.setdefault(root, {})
+                curr = entries.get(key)
+                if curr is None:
+                    curr = entries[key] = {
+                        'limit': self.reset_retry_limit, 'res': res,
+                        'retries': 0, 'action': ACTION_RESET,
+                        'last': curr_time}
+                elif curr_time - curr['last'] >= self.retry_cooldown:
+                    curr['retries'] += 1
+                    curr['last'] = curr_time
+                if curr['retries'] > curr['limit']:
+                    if curr['action'] == ACTION_RESET:
                         reset.add(root)
-                        new['limit'] = self.purge_retry_limit
-                        new['action'] = ACTION_PURGE
+                        curr['limit'] = self.purge_retry_limit
+                        curr['action'] = ACTION_PURGE
                     else:
-                        new['limit'] += 5
+                        curr['limit'] += 5
                         purge.append((action, res))
-        self._action_cache = cache
+        # Forget the actions that didn't happen in this iteration
+        for action in self._action_cache.keys():
+            by_root = self._action_cache[action]
+            for root in by_root.keys():
+                if roots is not None and root not in roots:
+                    continue
+                entries = by_root[root]
+                for key in entries.keys():
+                    if (action, root, key) not in seen:
+                        del entries[key]
+                if not entries:
+                    del by_root[root]
+            if not by_root:
+                del self._action_cache[action]
         return reset, purge
 
     @property
@@ -74,6 +74,9 @@ class K8sWatcher(object):
         self.tt_builder = tree_manager.HashTreeBuilder(self.mgr)
         self.klient = self.ctx.store.klient
         self.namespace = self.ctx.store.namespace
+        # Shared with the K8S stores of this process, which serve their reads
+        # from it while our watch streams are alive
+        self.cache = self.ctx.store.cache
         self.trees = {}
         self.q = queue.Queue()
         self.event_handler = event_handler.EventHandler
@@ -110,6 +113,7 @@ class K8sWatcher(object):
 
     def stop_threads(self):
         self._stop = True
+        self.cache.invalidate()
         if self._http_resp:
             LOG.info('Stopping watcher HTTP response.')
             self._http_resp.close()
@@ -183,7 +187,9 @@ class K8sWatcher(object):
                 self.klient.stop_watch()
             self._observe_thread_state = {}
             self._needs_init = True
+            self.cache.invalidate()
             raise exc
+        self.cache.touch(self._k8s_types_to_observe)
         time.sleep(MONITOR_LOOP_MAX_WAIT)
 
     def _init_aim_k8s(self, types_to_observe):
@@ -220,6 +226,7 @@ class K8sWatcher(object):
             list = self.klient.list(k8s_type, namespace=kwargs['namespace'])
             self._version_by_type[k8s_type] = list[
                 'metadata']['resourceVersion']
+            self.cache.replace(k8s_type, list['items'])
             for item in list['items']:
                 result.append({'type': ACTION_CREATED,
                                'raw_object': item,
@@ -278,6 +285,11 @@ class K8sWatcher(object):
                     ev_name = event.get('object',
                                         {}).get('metadata',
                                                 {}).get('name')
+                    if event.get('type', '').lower() == ACTION_ERROR:
+                        self.cache.invalidate(k8s_type)
+                    else:
+                        self.cache.update(k8s_type, event['type'],
+                                          event.get('object'))
                     if ev_filt(event):
                         LOG.debug("Received Kubernetes event for %s %s",
                                   k8s_type.kind, ev_name or event)
@@ -305,6 +305,27 @@ class AimManager(object):
                                             include_aim_id=include_aim_id))
         return result
 
+    def find_iter(self, context, resource_class, for_update=False,
+                  include_aim_id=False, batch_size=None, **kwargs):
+        """Iterate over AIM resources that match specified criteria.
+
+        Same as 'find', but objects are retrieved from the store in batches
+        of 'batch_size' (defaults to the 'query_batch_size' option) and
+        converted to resources lazily. Returns a generator.
+        """
+        self._validate_resource_class(resource_class)
+        attr_val = {k: v for k, v in kwargs.iteritems()
+                    if k in resource_class.attributes() +
+                    ['in_', 'notin_', 'order_by']}
+        db_cls = context.store.resource_to_db_type(resource_class)
+        if not db_cls:
+            return
+        for obj in context.store.query_iter(
+                db_cls, resource_class, lock_update=for_update,
+                batch_size=batch_size, **attr_val):
+            yield context.store.make_resource(resource_class, obj,
+                                              include_aim_id=include_aim_id)
+
     def count(self, context, resource_class, **kwargs):
         self._validate_resource_class(resource_class)
         attr_val = {k: v for k, v in kwargs.iteritems()
@@ -345,6 +366,84 @@ class AimManager(object):
                     return status
         return None
 
+    def get_statuses(self, context, resources, create_if_absent=False):
+        """Get status of many AIM resources at once.
+
+        Behaves like get_status called on each resource, but the number
+        of queries is bound by the number of resource classes rather than
+        the number of resources.
+        Returns a dictionary of statuses, with their faults, keyed by
+        the result of status_key() on the resource.
+        """
+        result = {}
+        with context.store.begin(subtransactions=True):
+            by_status_params = {}
+            missing_aim_id = {}
+            for resource in resources:
+                if not isinstance(resource, api_res.AciResourceBase):
+                    continue
+                inj_id = getattr(resource, '_injected_aim_id',
+                                 getattr(resource, '_aim_id', None))
+                if inj_id:
+                    by_status_params[(type(resource).__name__, inj_id)] = (
+                        resource)
+                else:
+                    missing_aim_id.setdefault(type(resource), []).append(
+                        resource)
+            # Resolve AIM IDs with one query per resource class
+            for klass, res_list in missing_aim_id.iteritems():
+                aim_ids = self._get_aim_ids(context, klass, res_list)
+                for resource in res_list:
+                    res_id = aim_ids.get(tuple(resource.identity))
+                    if res_id is not None:
+                        by_status_params[(klass.__name__, res_id)] = resource
+            if by_status_params:
+                res_types = set(x[0] for x in by_status_params)
+                res_ids = set(x[1] for x in by_status_params)
+                statuses = self.find(
+                    context, api_status.AciStatus,
+                    in_={'resource_type': list(res_types),
+                         'resource_id': list(res_ids)})
+                statuses = [x for x in statuses if
+                            (x.resource_type, x.resource_id) in
+                            by_status_params]
+                faults_by_status = {}
+                if statuses:
+                    for fault in self.find(
+                            context, api_status.AciFault,
+                            in_={'status_id': [x.id for x in statuses]}):
+                        faults_by_status.setdefault(
+                            fault.status_id, []).append(fault)
+                for status in statuses:
+                    status.faults = faults_by_status.get(status.id, [])
+                    resource = by_status_params[(status.resource_type,
+                                                 status.resource_id)]
+                    result[self.status_key(resource)] = status
+            if create_if_absent:
+                for resource in resources:
+                    if (isinstance(resource, api_res.AciResourceBase) and
+                            self.status_key(resource) not in result):
+                        status = self.get_status(context, resource)
+                        if status:
+                            result[self.status_key(resource)] = status
+        return result
+
+    @staticmethod
+    def status_key(resource):
+        """Key of a resource in the dictionary returned by get_statuses."""
+        return type(resource), tuple(resource.identity)
+
+    def _get_aim_ids(self, context, klass, resources):
+        # Superset query on each identity attribute, exact identity matching
+        # is done afterwards.
+        in_ = {}
+        for attr in klass.identity_attributes:
+            in_[attr] = list(set(getattr(x, attr) for x in resources))
+        return {tuple(x.identity): x._aim_id
+                for x in self.find(context, klass, include_aim_id=True,
+                                   in_=in_)
+                if getattr(x, '_aim_id', None) is not None}
+
     @utils.log
     def update_status(self, context, resource, status):
         """Update the status of an AIM resource.
@@ -391,6 +490,9 @@ class AimManager(object):
                              api_status.AciStatus.SYNC_PENDING,
                              api_status.AciStatus.SYNC_NA]
                     if not top else [api_status.AciStatus.SYNC_PENDING]):
+                if context.store.supports_sql:
+                    self._set_tree_sync_pending(context, resource, cascade)
+                    return
                 # Change parent first
                 parent_klass = resource._tree_parent
                 if parent_klass:
@@ -413,12 +515,95 @@ class AimManager(object):
                     context, resource, api_status.AciStatus.SYNC_FAILED,
                     message=message,
                     exclude=[api_status.AciStatus.SYNC_FAILED]) and top:
+                child_message = ("Parent resource %s is "
+                                 "in error state" % str(resource))
                 # Set sync_error for the whole subtree
+                if context.store.supports_sql:
+                    scopes = self._subtree_scopes(type(resource),
+                                                  resource.identity)
+                    self._set_statuses_sync(
+                        context, context.store.query_statuses(
+                            scopes, lock_update=True,
+                            exclude=[api_status.AciStatus.SYNC_FAILED],
+                            resource_root=resource.root),
+                        api_status.AciStatus.SYNC_FAILED, child_message)
+                    # Objects without status are put in error state as well
+                    for res_type, res_id in (
+                            context.store.query_missing_statuses(scopes)):
+                        context.store.add(context.store.make_db_obj(
+                            api_status.AciStatus(
+                                resource_type=res_type, resource_id=res_id,
+                                resource_root=resource.root,
+                                sync_status=api_status.AciStatus.SYNC_FAILED,
+                                sync_message=child_message)))
+                    return
                 for child_res in self.get_subtree(context, resource):
                     self.set_resource_sync_error(
-                        context, child_res,
-                        message="Parent resource %s is "
-                                "in error state" % str(resource), top=False)
+                        context, child_res, message=child_message, top=False)
+
+    def _set_tree_sync_pending(self, context, resource, cascade):
+        # Set-based equivalent of the recursive propagation: every failed
+        # ancestor up to the first one that isn't goes in pending state,
+        # together with the failed objects of its subtree.
+        exclude = [api_status.AciStatus.SYNCED,
+                   api_status.AciStatus.SYNC_PENDING,
+                   api_status.AciStatus.SYNC_NA]
+        subtree = (type(resource), resource.identity) if cascade else None
+        ancestors = self._ancestor_scopes(resource)
+        if ancestors:
+            by_type = {x.resource_type: x for x in
+                       context.store.query_statuses(
+                           ancestors, lock_update=True,
+                           resource_root=resource.root)}
+            for klass, identity in ancestors:
+                db_status = by_type.get(klass.__name__)
+                if not db_status or db_status.sync_status in exclude:
+                    break
+                self._set_statuses_sync(context, [db_status],
+                                        api_status.AciStatus.SYNC_PENDING)
+                subtree = (klass, resource.identity[:len(identity)])
+        if subtree:
+            self._set_statuses_sync(
+                context, context.store.query_statuses(
+                    self._subtree_scopes(*subtree), lock_update=True,
+                    exclude=exclude, resource_root=resource.root),
+                api_status.AciStatus.SYNC_PENDING)
+
+    def _set_statuses_sync(self, context, db_statuses, sync_status,
+                           message=''):
+        for db_status in db_statuses:
+            context.store.from_attr(db_status, api_status.AciStatus,
+                                    {'sync_status': sync_status,
+                                     'sync_message': message})
+            context.store.add(db_status)
+        self._add_commit_hook(context.store)
+
+    def _ancestor_scopes(self, resource):
+        # List of (resource class, identity) for all the ancestors of a
+        # resource, closest first
+        scopes = []
+        klass = resource._tree_parent
+        while klass:
+            scopes.append(
+                (klass, {v: resource.identity[i]
+                         for i, v in enumerate(klass.identity_attributes)}))
+            klass = klass._tree_parent
+        return scopes
+
+    def _subtree_scopes(self, klass, identity):
+        # List of (resource class, identity prefix) for all the classes
+        # in the subtree of a resource
+        scopes = []
+
+        def get_subtree_klasses(klass):
+            for child_klass in self._model_tree.get(klass, []):
+                scopes.append(
+                    (child_klass,
+                     {child_klass.identity_attributes.keys()[i]: v
+                      for i, v in enumerate(identity)}))
+                get_subtree_klasses(child_klass)
+        get_subtree_klasses(klass)
+        return scopes
 
     @utils.log
     def set_fault(self, context, resource, fault):
@@ -483,18 +668,19 @@ class AimManager(object):
         return res_type, res_id
 
     def get_subtree(self, context, resource):
+        """Iterate over all the AIM resources in the subtree of a resource.
+
+        Descendant classes with no object in the subtree are filtered out
+        with a single query, only the populated ones are then retrieved,
+        when the caller reaches them.
+        """
         return self._get_subtree(context, type(resource), *resource.identity)
 
     def _get_subtree(self, context, klass, *identity, **kwargs):
-        subtree_resources = []
-
-        def get_subtree_klasses(klass):
-            for child_klass in self._model_tree.get(klass, []):
-                id = {child_klass.identity_attributes.keys()[i]: v
-                      for i, v in enumerate(identity)}
-                # Extra search attributes
-                id.update(kwargs)
-                subtree_resources.extend(self.find(context, child_klass, **id))
-                get_subtree_klasses(child_klass)
-        get_subtree_klasses(klass)
-        return subtree_resources
+        scopes = self._subtree_scopes(klass, identity)
+        for _, id in scopes:
+            # Extra search attributes
+            id.update(kwargs)
+        for child_klass, id in context.store.non_empty_scopes(scopes):
+            for child_res in self.find(context, child_klass, **id):
+                yield child_res
@@ -15,10 +15,16 @@
 
 from contextlib import contextmanager
 import copy
+import datetime
+import itertools
 from oslo_db import exception as db_exc
 from oslo_log import log as logging
+import sqlalchemy as sa
 from sqlalchemy import event as sa_event
+from sqlalchemy.ext import baked
 from sqlalchemy.sql.expression import func
+import threading
+import time
 
 from aim.agent.aid.event_services import rpc
 from aim import aim_manager
@@ -27,6 +33,8 @@ from aim.api import resource as api_res
 from aim.api import service_graph as api_service_graph
 from aim.api import status as api_status
 from aim.api import tree as api_tree
+from aim.common import utils
+from aim import config as aim_cfg
 from aim.db import agent_model
 from aim.db import config_model
 from aim.db import hashtree_db_listener as ht_db_l
@@ -36,9 +44,12 @@ from aim.db import service_graph_model
 from aim.db import status_model
 from aim.db import tree_model
 from aim.k8s import api_v1
+from aim.k8s import cache as k8s_cache
 
 
 LOG = logging.getLogger(__name__)
+# Conflicting patches of a K8S object before giving up
+K8S_PATCH_RETRIES = 3
 
 
 @contextmanager
@@ -51,6 +62,7 @@ class AimStore(object):
 
     _features = []
     _update_listeners = {}
+    _update_listener_classes = {}
     _postcommit_listeners = {}
 
     def __init__(self):
@@ -98,6 +110,15 @@ class AimStore(object):
         # Return list of objects that match specified criteria
         pass
 
+    def query_iter(self, db_obj_type, resource_klass, in_=None,
+                   notin_=None, order_by=None, lock_update=False,
+                   batch_size=None, **filters):
+        # Return iterator over objects that match specified criteria,
+        # stores that can't retrieve them in batches return the whole list
+        return iter(self.query(db_obj_type, resource_klass, in_=in_,
+                               notin_=notin_, order_by=order_by,
+                               lock_update=lock_update, **filters))
+
     def count(self, db_obj_type, resource_klass, in_=None, notin_=None,
               **filters):
         # Return count of objects that match specified criteria
@@ -108,6 +129,32 @@ class AimStore(object):
         # Delete all objects that match specified criteria
         pass
 
+    def query_sizes(self, db_obj_type, resource_klass, key, attribute,
+                    **filters):
+        # Return list of (key value, length of attribute) for the objects
+        # that match specified criteria, without loading the attribute when
+        # the backend allows it
+        return [(getattr(x, key), len(getattr(x, attribute) or ''))
+                for x in self.query(db_obj_type, resource_klass, **filters)]
+
+    def query_statuses(self, scopes, lock_update=False, exclude=None,
+                       **filters):
+        # Return list of status objects that belong to any resource
+        # matching one of the (resource_klass, identity filters) scopes,
+        # and whose sync_status is not in exclude
+        pass
+
+    def query_missing_statuses(self, scopes):
+        # Return list of (resource type name, aim_id) for all the resources
+        # matching one of the (resource_klass, identity filters) scopes
+        # which don't have a status object
+        pass
+
+    def non_empty_scopes(self, scopes):
+        # Return the (resource_klass, filters) scopes that match at least
+        # one object. Stores that can't check this cheaply return them all
+        return scopes
+
     def add_commit_hook(self):
         pass
 
@@ -127,7 +174,7 @@ class AimStore(object):
             res._aim_id = db_obj.aim_id
         return res
 
-    def register_update_listener(self, name, func):
+    def register_update_listener(self, name, func, resource_classes=None):
         """Register callback for update to AIM objects.
 
         Parameter 'func' should be a function that accepts 4 parameters.
@@ -136,6 +183,8 @@ class AimStore(object):
         that were added, updated and deleted respectively.
         If the store supports transaction, the callback will be invoked
         before the transaction that updated the AIM object commits.
+        Parameter 'resource_classes' restricts the resources passed to the
+        callback to the specified types, all of them when None.
 
         Example:
 
@@ -149,10 +198,14 @@ class AimStore(object):
         """
         if name not in self._update_listeners:
             self._update_listeners[name] = func
+            self._update_listener_classes[name] = (
+                None if resource_classes is None else
+                frozenset(resource_classes))
 
     def unregister_update_listener(self, name):
         """Remove callback for update to AIM objects."""
         self._update_listeners.pop(name, None)
+        self._update_listener_classes.pop(name, None)
 
     def register_postcommit_listener(self, name, func):
         if name not in self._postcommit_listeners:
@@ -271,22 +324,153 @@ class SqlAlchemyStore(AimStore):
     for k, v in db_model_map.iteritems():
         resource_map[v] = k
 
-    def __init__(self, db_session, initialize_hooks=True):
+    _bakery = staticmethod(baked.bakery(size=1000))
+
+    # Last write committed by this process, as a (time, action log id)
+    # tuple, and the last action log id found on the read replica. Shared
+    # by all the stores, so that a process reads its own writes whatever
+    # store it used for them.
+    _last_write = None
+    _replica_log_id = 0
+
+    def __init__(self, db_session, initialize_hooks=True, read_session=None):
         super(SqlAlchemyStore, self).__init__()
         self.db_session = db_session
+        # When set, non-locking queries issued outside of a transaction are
+        # served by this session, typically bound to a read replica
+        self.read_session = read_session
         self.initialize_hooks = initialize_hooks
         if initialize_hooks:
             self._initialize_hooks()
+        self._initialize_session_events()
 
     def _initialize_hooks(self):
         self._hashtree_db_listener = ht_db_l.HashTreeDbListener(
             aim_manager.AimManager())
-        self.register_update_listener('hashtree_db_listener_on_commit',
-                                      self._hashtree_db_listener.on_commit)
+        self.register_update_listener(
+            'hashtree_db_listener_on_commit',
+            self._hashtree_db_listener.on_commit,
+            resource_classes=self._hashtree_db_listener.resource_classes)
         self.register_postcommit_listener(
             'tree_creation_postcommit',
             rpc.AIDEventRpcApi().tree_creation_postcommit)
 
+    def _initialize_session_events(self):
+        if not sa_event.contains(self.db_session, 'after_flush',
+                                 self._after_flush_writes):
+            sa_event.listen(self.db_session, 'after_flush',
+                            self._after_flush_writes)
+            sa_event.listen(self.db_session, 'after_commit',
+                            self._after_commit_writes)
+            sa_event.listen(self.db_session, 'after_rollback',
+                            self._after_rollback_writes)
+            sa_event.listen(self.db_session, 'after_soft_rollback',
+                            self._after_rollback_identity_cache)
+            sa_event.listen(self.db_session, 'after_transaction_end',
+                            self._after_transaction_end_identity_cache)
+
+    @staticmethod
+    def _after_flush_writes(session, flush_context):
+        if not (session.new or session.dirty or session.deleted):
+            return
+        # AIM resource writes come with an action log, whose increasing id
+        # tells whether the replica has them
+        log_id = session.info.get('aim_write') or 0
+        for db_obj in session.new:
+            if isinstance(db_obj, tree_model.ActionLog):
+                log_id = max(log_id, db_obj.id)
+        session.info['aim_write'] = log_id
+
+    @staticmethod
+    def _after_commit_writes(session):
+        log_id = session.info.pop('aim_write', None)
+        if log_id is not None:
+            SqlAlchemyStore._last_write = (time.time(), log_id or None)
+
+    @staticmethod
+    def _after_rollback_writes(session):
+        session.info.pop('aim_write', None)
+
+    @staticmethod
+    def _after_rollback_identity_cache(session, previous_transaction):
+        session.info.pop('aim_identity_cache', None)
+
+    @staticmethod
+    def _after_transaction_end_identity_cache(session, transaction):
+        # Cached objects are only valid within the outermost transaction
+        if transaction.parent is None:
+            session.info.pop('aim_identity_cache', None)
+
+    def _identity_cache_key(self, db_obj_type, resource_klass, filters):
+        # Objects are cached only within a transaction, and only when
+        # looked up by their full identity
+        if (self.db_session.transaction is None or
+                set(filters) != set(resource_klass.identity_attributes)):
+            return None
+        return db_obj_type, tuple(
+            filters[k] for k in resource_klass.identity_attributes)
+
+    def _db_obj_identity_cache_key(self, db_obj):
+        resource_klass = self.resource_map.get(type(db_obj))
+        if not resource_klass or self.db_session.transaction is None:
+            return None
+        identity = tuple(getattr(db_obj, k, None)
+                         for k in resource_klass.identity_attributes)
+        if None in identity:
+            return None
+        return type(db_obj), identity
+
+    def _get_cached_identity(self, key, lock_update=False):
+        cache = self.db_session.info.get('aim_identity_cache', {})
+        db_obj, locked = cache.get(key, (None, False))
+        if db_obj is None:
+            return None
+        if (db_obj not in self.db_session or
+                db_obj in self.db_session.deleted):
+            cache.pop(key, None)
+            return None
+        # An object read without lock needs to be locked now
+        return db_obj if locked or not lock_update else None
+
+    def _set_cached_identity(self, key, db_obj, locked=False):
+        self.db_session.info.setdefault('aim_identity_cache', {})[key] = (
+            db_obj, locked)
+
+    @property
+    def read_only(self):
+        return self.read_session is not None
+
+    def _replica_caught_up(self):
+        last_write = SqlAlchemyStore._last_write
+        if last_write is None:
+            return True
+        write_time, log_id = last_write
+        if (time.time() - write_time >=
+                aim_cfg.CONF.aim.read_replica_lag_window):
+            return True
+        if log_id is None:
+            # Nothing to check the replica against, wait for the window
+            return False
+        if log_id <= SqlAlchemyStore._replica_log_id:
+            return True
+        # Any later write, by this process or not, will do
+        if not self.read_session.query(sa.exists().where(
+                tree_model.ActionLog.id >= log_id)).scalar():
+            LOG.debug("Read replica is behind action log %s, using the "
+                      "primary DB", log_id)
+            return False
+        SqlAlchemyStore._replica_log_id = log_id
+        return True
+
+    def _get_read_session(self, lock_update=False):
+        # Locking reads, and reads that are part of a transaction that
+        # might write, always hit the primary
+        if (self.read_session is None or lock_update or
+                self.db_session.transaction is not None or
+                not self._replica_caught_up()):
+            return self.db_session
+        return self.read_session
+
     @property
     def name(self):
         return 'SQLAlchemy'
@@ -309,14 +493,30 @@ class SqlAlchemyStore(AimStore):
         return self.db_model_map.get(resource_klass)
 
     def add(self, db_obj):
+        state = sa.inspect(db_obj)
+        new = state.transient or state.pending
         self.db_session.add(db_obj)
+        key = self._db_obj_identity_cache_key(db_obj)
+        if key:
+            # New rows will be locked by this transaction as well, updated
+            # ones are only locked if they were read that way
+            cached, locked = self.db_session.info.get(
+                'aim_identity_cache', {}).get(key, (None, False))
+            self._set_cached_identity(
+                key, db_obj, locked=new or (locked and cached is db_obj))
 
     def delete(self, db_obj):
         self.db_session.delete(db_obj)
+        key = self._db_obj_identity_cache_key(db_obj)
+        if key:
+            self.db_session.info.get('aim_identity_cache', {}).pop(key, None)
 
     def _query(self, db_obj_type, resource_klass, in_=None, notin_=None,
-               order_by=None, lock_update=False, **filters):
-        query = self.db_session.query(db_obj_type)
+               order_by=None, lock_update=False, replica_ok=False,
+               **filters):
+        session = (self._get_read_session(lock_update=lock_update)
+                   if replica_ok else self.db_session)
+        query = session.query(db_obj_type)
         for k, v in (in_ or {}).iteritems():
             query = query.filter(getattr(db_obj_type, k).in_(v))
         for k, v in (notin_ or {}).iteritems() or {}:
@@ -336,22 +536,185 @@ class SqlAlchemyStore(AimStore):
 
     def query(self, db_obj_type, resource_klass, in_=None, notin_=None,
               order_by=None, lock_update=False, **filters):
+        key = None
+        if not (in_ or notin_ or order_by):
+            key = self._identity_cache_key(db_obj_type, resource_klass,
+                                           filters)
+            db_obj = key and self._get_cached_identity(
+                key, lock_update=lock_update)
+            if db_obj is not None:
+                # Autoflush as the query would have done, this also
+                # populates DB generated values of pending objects
+                self.db_session._autoflush()
+                return [db_obj]
+        if not (in_ or notin_ or order_by):
+            result = self._baked_query(
+                db_obj_type, lock_update=lock_update, **filters).all()
+        else:
+            result = self._query(db_obj_type, resource_klass, in_=in_,
+                                 notin_=notin_, order_by=order_by,
+                                 lock_update=lock_update, replica_ok=True,
+                                 **filters).all()
+        if key and len(result) == 1:
+            self._set_cached_identity(key, result[0], locked=lock_update)
+        return result
 
-        return self._query(db_obj_type, resource_klass, in_=in_, notin_=notin_,
-                           order_by=order_by, lock_update=lock_update,
-                           **filters).all()
+    def query_iter(self, db_obj_type, resource_klass, in_=None,
+                   notin_=None, order_by=None, lock_update=False,
+                   batch_size=None, **filters):
+        # Objects are paged in batches rather than streamed through a
+        # server-side cursor: eagerly loaded collections can't be combined
+        # with yield_per, and callers are free to use the same session
+        # (and connection) while iterating.
+        batch_size = batch_size or aim_cfg.CONF.aim.query_batch_size
+        mapper = sa.inspect(db_obj_type)
+        pkey = mapper.primary_key
+        if order_by in ([pkey[0].key], pkey[0].key) and len(pkey) == 1:
+            # Ordering by the primary key is what keyset pagination does
+            order_by = None
+        query = self._query(db_obj_type, resource_klass, in_=in_,
+                            notin_=notin_, order_by=order_by,
+                            lock_update=lock_update, replica_ok=True,
+                            **filters)
+        if order_by or len(pkey) > 1:
+            # Primary key makes the order total, hence pages stable
+            query = query.order_by(*pkey)
+            offset = 0
+            while True:
+                batch = query.limit(batch_size).offset(offset).all()
+                for db_obj in batch:
+                    yield db_obj
+                if len(batch) < batch_size:
+                    return
+                offset += batch_size
+        else:
+            # Keyset pagination, each batch is a range scan of the index
+            query = query.order_by(pkey[0])
+            last = None
+            while True:
+                page = query if last is None else query.filter(
+                    pkey[0] > last)
+                batch = page.limit(batch_size).all()
+                for db_obj in batch:
+                    yield db_obj
+                if len(batch) < batch_size:
+                    return
+                last = mapper.primary_key_from_instance(batch[-1])[0]
 
     def count(self, db_obj_type, resource_klass, in_=None, notin_=None,
               **filters):
-
+        if not (in_ or notin_):
+            return self._baked_query(db_obj_type, count=True,
+                                     **filters).one()[0]
         return self._query(db_obj_type, resource_klass, in_=in_, notin_=notin_,
-                           **filters).count()
+                           replica_ok=True, **filters).count()
+
+    def _baked_query(self, db_obj_type, lock_update=False, count=False,
+                     **filters):
+        # Equality-only queries (identity lookups, counts) are cached
+        # together with their compiled SQL, per model, filter names and
+        # lock mode. Filter values are passed as bound parameters.
+        criteria = tuple(sorted((k, v is None)
+                                for k, v in filters.iteritems()))
+        if count:
+            bq = self._bakery(
+                lambda s: s.query(func.count()).select_from(db_obj_type),
+                db_obj_type, criteria, 'count')
+        else:
+            bq = self._bakery(lambda s: s.query(db_obj_type),
+                              db_obj_type, criteria, lock_update)
+        if criteria:
+            bq += lambda q: q.filter(*[
+                getattr(db_obj_type, k).is_(None) if is_none else
+                getattr(db_obj_type, k) == sa.bindparam('aim_' + k)
+                for k, is_none in criteria])
+        if lock_update:
+            bq += lambda q: q.with_lockmode('update')
+        return bq(self._get_read_session(lock_update=lock_update)).params(
+            **{'aim_' + k: v for k, v in filters.iteritems()
+               if v is not None})
 
     def delete_all(self, db_obj_type, resource_klass, in_=None, notin_=None,
                    **filters):
+        cache = self.db_session.info.get('aim_identity_cache', {})
+        for key in [x for x in cache if x[0] is db_obj_type]:
+            del cache[key]
         return self._query(db_obj_type, resource_klass, in_=in_, notin_=notin_,
                            **filters).delete(synchronize_session='fetch')
 
+    def query_sizes(self, db_obj_type, resource_klass, key, attribute,
+                    **filters):
+        query = self._get_read_session().query(
+            getattr(db_obj_type, key),
+            func.length(getattr(db_obj_type, attribute)))
+        if filters:
+            query = query.filter_by(**filters)
+        return [(x, size or 0) for x, size in query.all()]
+
+    def _status_scopes(self, scopes):
+        for resource_klass, id_filters in scopes:
+            db_obj_type = self.resource_to_db_type(resource_klass)
+            # Only resources with an aim_id support status
+            if hasattr(db_obj_type, 'aim_id'):
+                yield resource_klass, db_obj_type, id_filters
+
+    def query_statuses(self, scopes, lock_update=False, exclude=None,
+                       **filters):
+        status_type = self.resource_to_db_type(api_status.AciStatus)
+        conditions = []
+        for resource_klass, db_obj_type, id_filters in self._status_scopes(
+                scopes):
+            aim_ids = self.db_session.query(db_obj_type.aim_id).filter_by(
+                **id_filters).subquery()
+            conditions.append(sa.and_(
+                status_type.resource_type == resource_klass.__name__,
+                status_type.resource_id.in_(aim_ids)))
+        if not conditions:
+            return []
+        query = self.db_session.query(status_type).filter(
+            sa.or_(*conditions))
+        if exclude:
+            query = query.filter(sa.or_(
+                status_type.sync_status.is_(None),
+                status_type.sync_status.notin_(exclude)))
+        if filters:
+            query = query.filter_by(**filters)
+        if lock_update:
+            query = query.with_lockmode('update')
+        return query.all()
+
+    def query_missing_statuses(self, scopes):
+        status_type = self.resource_to_db_type(api_status.AciStatus)
+        queries = []
+        for resource_klass, db_obj_type, id_filters in self._status_scopes(
+                scopes):
+            has_status = sa.exists().where(sa.and_(
+                status_type.resource_type == resource_klass.__name__,
+                status_type.resource_id == db_obj_type.aim_id))
+            queries.append(self.db_session.query(
+                sa.literal(resource_klass.__name__), db_obj_type.aim_id).
+                filter(*[getattr(db_obj_type, k) == v
+                         for k, v in id_filters.iteritems()]).
+                filter(~has_status))
+        if not queries:
+            return []
+        return [tuple(x) for x in queries[0].union_all(*queries[1:]).all()]
+
+    def non_empty_scopes(self, scopes):
+        if not scopes:
+            return []
+        checks = []
+        for resource_klass, filters in scopes:
+            db_obj_type = self.resource_to_db_type(resource_klass)
+            query = sa.select([sa.literal(1)]).select_from(
+                db_obj_type.__table__)
+            for k, v in filters.iteritems():
+                query = query.where(getattr(db_obj_type, k) == v)
+            checks.append(sa.exists(query))
+        # All the checks are retrieved with a single row query
+        non_empty = self._get_read_session().query(*checks).one()
+        return [x for i, x in enumerate(scopes) if non_empty[i]]
+
     def add_commit_hook(self):
         if not sa_event.contains(self.db_session, 'before_flush',
                                  self._before_session_commit):
@@ -383,6 +746,14 @@ class SqlAlchemyStore(AimStore):
 
     @staticmethod
     def _before_session_commit(session, flush_context, instances):
+        listeners = copy.copy(SqlAlchemyStore._update_listeners)
+        if not listeners:
+            return
+        interests = {name: SqlAlchemyStore._update_listener_classes.get(name)
+                     for name in listeners}
+        # Only convert objects that at least one listener is interested in
+        wanted = (None if None in interests.values() else
+                  frozenset().union(*interests.values()))
         store = SqlAlchemyStore(session, initialize_hooks=False)
         added = []
         updated = []
@@ -393,14 +764,20 @@ class SqlAlchemyStore(AimStore):
         for mod_set, res_list in modified:
             for db_obj in mod_set:
                 res_cls = store.resource_map.get(type(db_obj))
-                if res_cls:
+                if res_cls and (wanted is None or res_cls in wanted):
                     res = store.make_resource(res_cls, db_obj)
                     res_list.append(res)
-        for f in copy.copy(SqlAlchemyStore._update_listeners).values():
+        for name, f in listeners.iteritems():
+            classes = interests[name]
+            if classes is None or classes == wanted:
+                args = added, updated, deleted
+            else:
+                args = [[x for x in res_list if type(x) in classes]
+                        for res_list in (added, updated, deleted)]
             LOG.debug("Invoking pre-commit hook %s with %d add(s), "
                       "%d update(s), %d delete(s)",
-                      f.__name__, len(added), len(updated), len(deleted))
-            f(store, added, updated, deleted)
+                      f.__name__, *[len(x) for x in args])
+            f(store, *args)
 
     def _after_session_flush(self, session, _):
         # Stash log changes
@@ -462,6 +839,7 @@ class K8sStore(AimStore):
                                    'controller_name':
                                    vmm_controller or 'kube-cluster'}
         self.db_session = None
+        self.cache = k8s_cache.CACHE
 
     _features = ['k8s', 'streaming', 'object_uid']
 
@@ -485,11 +863,68 @@ class K8sStore(AimStore):
 
     def add(self, db_obj):
         # TODO(amitbose) Handle aux_objects
-        created = None
         k8s_klass = type(db_obj)
         obj_ns = (self.namespace
                   if k8s_klass == api_v1.AciContainersObject
                   else db_obj['metadata'].get('namespace', self.namespace))
+        try:
+            created = self._patch(k8s_klass, obj_ns, db_obj)
+        except api_v1.klient.ApiException as e:
+            if str(e.status) == '404':
+                # Object doesn't exist, create it.
+                created = self._create(k8s_klass, obj_ns, db_obj)
+            else:
+                raise
+        self._post_create(created)
+
+    def _create(self, k8s_klass, obj_ns, db_obj):
+        db_obj.get('metadata', {}).pop('resourceVersion', None)
+        self._cache_update(k8s_klass, k8s_cache.EVENT_ADDED,
+                           self.klient.create(k8s_klass, obj_ns, db_obj))
+        return db_obj
+
+    def _patch(self, k8s_klass, obj_ns, db_obj):
+        """Update an existing object with a single merge patch.
+
+        Merge patches remove the fields set to null, in which case we
+        fall back to replacing the whole object. The resourceVersion, if
+        any, makes the API server reject the patch (409) when the object
+        was modified since it was read. The patch is then retried against
+        the current resourceVersion, until it fails K8S_PATCH_RETRIES
+        times.
+        """
+        metadata = db_obj.get('metadata', {})
+        if _has_null(db_obj.get('spec', {})):
+            return self._read_and_replace(k8s_klass, obj_ns, db_obj)
+        body = {'metadata': {
+            'annotations': metadata.get('annotations', {}),
+            'labels': metadata.get('labels', {})},
+            'spec': db_obj.get('spec', {})}
+        version = metadata.get('resourceVersion')
+        retries = K8S_PATCH_RETRIES
+        while True:
+            if version:
+                body['metadata']['resourceVersion'] = version
+            try:
+                patched = self.klient.patch(
+                    k8s_klass, metadata['name'], obj_ns, body,
+                    content_type=api_v1.MERGE_PATCH)
+                break
+            except api_v1.klient.ApiException as e:
+                retries -= 1
+                if str(e.status) != '409' or not version or not retries:
+                    raise
+                LOG.info('Concurrent modification on %s %s, retrying '
+                         'patch operation', k8s_klass.kind, metadata['name'])
+                curr = self.klient.read(k8s_klass, metadata['name'], obj_ns)
+                if not curr:
+                    raise
+                version = curr['metadata'].get('resourceVersion')
+        self._cache_update(k8s_klass, k8s_cache.EVENT_MODIFIED, patched)
+        return patched if isinstance(patched, dict) else db_obj
+
+    def _read_and_replace(self, k8s_klass, obj_ns, db_obj):
+        created = None
         retries = 3  # this is arbitrary
         while retries:
             retries -= 1
@@ -503,16 +938,17 @@ class K8sStore(AimStore):
                     curr['metadata'].setdefault('labels', {}).update(
                         db_obj.get('metadata', {}).get('labels', {}))
                     curr.pop('status', None)
-                    self.klient.replace(k8s_klass, db_obj['metadata']['name'],
-                                        obj_ns, curr)
+                    self._cache_update(
+                        k8s_klass, k8s_cache.EVENT_MODIFIED,
+                        self.klient.replace(k8s_klass,
+                                            db_obj['metadata']['name'],
+                                            obj_ns, curr))
                     created = curr
                 break
             except api_v1.klient.ApiException as e:
                 if str(e.status) == '404':
                     # Object doesn't exist, create it.
-                    db_obj.get('metadata', {}).pop('resourceVersion', None)
-                    self.klient.create(k8s_klass, obj_ns, db_obj)
-                    created = db_obj
+                    created = self._create(k8s_klass, obj_ns, db_obj)
                     break
                 elif str(e.status) == '409' and retries:
                     LOG.info('Concurrent modification on %s %s, retrying '
@@ -520,7 +956,7 @@ class K8sStore(AimStore):
                              k8s_klass.kind, db_obj['metadata']['name'])
                 else:
                     raise
-        self._post_create(created)
+        return created
 
     def delete(self, db_obj):
         # TODO(amitbose) Handle aux_objects
@@ -543,8 +979,14 @@ class K8sStore(AimStore):
                          db_obj['metadata']['name'])
             else:
                 raise
+        self._cache_update(type(db_obj), k8s_cache.EVENT_DELETED, db_obj)
         self._post_delete(deleted)
 
+    def _cache_update(self, k8s_klass, event_type, item):
+        # Make our own writes visible without waiting for the watch event
+        if isinstance(item, dict):
+            self.cache.update(k8s_klass, event_type, item)
+
     def query(self, db_obj_type, resource_klass, in_=None, notin_=None,
               order_by=None, lock_update=False, **filters):
         def_ns = (self.namespace
@@ -553,37 +995,23 @@ class K8sStore(AimStore):
         selectors = db_obj_type().build_selectors(resource_klass, filters)
         obj_name = selectors.pop('name', None)
         obj_ns = selectors.pop('namespace', None) or def_ns
-
-        if obj_name and obj_ns:
+        # Locking reads are used for read-modify-write cycles, they need to
+        # be consistent with the API server.
+        cached = not lock_update
+        items = None
+        if cached:
             try:
-                item = self.klient.read(db_obj_type, obj_name, obj_ns)
-                items = [item]
-            except api_v1.klient.ApiException as e:
-                if str(e.status) == '404':
-                    items = []
-                else:
-                    raise e
-        else:
-            field_selectors = selectors.pop('field_selector', [])
-            if obj_name:
-                field_selectors.append('metadata.name=%s' % obj_name)
-            if field_selectors:
-                selectors['field_selector'] = '&'.join(field_selectors)
-            try:
-                items = self.klient.list(db_obj_type, obj_ns, **selectors)
-                items = items['items']
-            except api_v1.klient.ApiException as e:
-                if str(e.status) == '400':
-                    # Some K8S objects may not support fieldSelector
-                    LOG.info('Query for %s, namespace %s, selectors %s '
-                             'treated as Bad Request: %s',
-                             db_obj_type.kind, obj_ns, selectors, e)
-                    items = []
-                else:
-                    raise e
+                items = self._query_cache(db_obj_type, obj_name, obj_ns,
+                                          selectors, filters)
+            except k8s_cache.CacheMiss:
+                cached = False
+        if items is None:
+            items = self._query_api(db_obj_type, obj_name, obj_ns, selectors)
 
         result = []
         aim_id_val = filters.pop('aim_id', None)
+        aim_id_in = (in_ or {}).get('aim_id')
+        in_ = {k: v for k, v in (in_ or {}).iteritems() if k != 'aim_id'}
         for item in (items or []):
             if item['metadata'].get('deletionTimestamp'):
                 continue
@@ -591,18 +1019,16 @@ class K8sStore(AimStore):
             db_obj.update(item)
             if aim_id_val is not None and db_obj.aim_id != aim_id_val:
                 continue
+            if aim_id_in is not None and db_obj.aim_id not in aim_id_in:
+                continue
             for aux_a, aux_kls in db_obj_type.aux_objects.iteritems():
-                try:
-                    aux_item_raw = self.klient.read(
-                        aux_kls,
-                        db_obj['metadata']['name'],
-                        db_obj['metadata'].get('namespace'))
+                aux_item_raw = self._read_aux_object(
+                    aux_kls, db_obj['metadata']['name'],
+                    db_obj['metadata'].get('namespace'), cached)
+                if aux_item_raw:
                     aux_item = aux_kls()
                     aux_item.update(aux_item_raw)
                     setattr(db_obj, aux_a, aux_item)
-                except api_v1.klient.ApiException as e:
-                    if str(e.status) != '404':
-                        raise e
             item_attr = db_obj.to_attr(resource_klass,
                                        defaults=self.attribute_defaults)
             if filters or in_ or notin_:
@@ -628,17 +1054,98 @@ class K8sStore(AimStore):
                             key=lambda x: tuple([x[k] for k in order_by]))
         return result
 
+    def _query_cache(self, db_obj_type, obj_name, obj_ns, selectors,
+                     filters):
+        if obj_name and obj_ns:
+            item = self.cache.get(db_obj_type, obj_name, obj_ns)
+            return [item] if item else []
+        return self.cache.list(
+            db_obj_type, namespace=obj_ns, name=obj_name,
+            label_selector=selectors.get('label_selector'),
+            aim_id=filters.get('aim_id'))
+
+    def _query_api(self, db_obj_type, obj_name, obj_ns, selectors):
+        if obj_name and obj_ns:
+            try:
+                return [self.klient.read(db_obj_type, obj_name, obj_ns)]
+            except api_v1.klient.ApiException as e:
+                if str(e.status) == '404':
+                    return []
+                raise e
+        field_selectors = selectors.pop('field_selector', [])
+        if obj_name:
+            field_selectors.append('metadata.name=%s' % obj_name)
+        if field_selectors:
+            selectors['field_selector'] = '&'.join(field_selectors)
+        try:
+            return self.klient.list(db_obj_type, obj_ns, **selectors)['items']
+        except api_v1.klient.ApiException as e:
+            if str(e.status) == '400':
+                # Some K8S objects may not support fieldSelector
+                LOG.info('Query for %s, namespace %s, selectors %s '
+                         'treated as Bad Request: %s',
+                         db_obj_type.kind, obj_ns, selectors, e)
+                return []
+            raise e
+
     def count(self, db_obj_type, resource_klass, in_=None, notin_=None,
               **filters):
         return len(
             self.query(db_obj_type, resource_klass, in_=in_, notin_=notin_,
                        **filters))
 
+    def _read_aux_object(self, aux_kls, name, namespace, cached):
+        if cached:
+            try:
+                return self.cache.get(aux_kls, name, namespace)
+            except k8s_cache.CacheMiss:
+                pass
+        try:
+            return self.klient.read(aux_kls, name, namespace)
+        except api_v1.klient.ApiException as e:
+            if str(e.status) != '404':
+                raise e
+
     def delete_all(self, db_obj_type, resource_klass, in_=None, notin_=None,
                    **filters):
-        for obj in self.query(db_obj_type, resource_klass, in_=in_,
-                              notin_=notin_, **filters):
-            self.delete(obj)
+        objs = self.query(db_obj_type, resource_klass, in_=in_,
+                          notin_=notin_, **filters)
+        namespace = (self.namespace
+                     if db_obj_type == api_v1.AciContainersObject
+                     else filters.get('namespace_name'))
+        selector = None
+        if not (in_ or notin_) and (namespace or
+                                    not db_obj_type.namespaced):
+            selector = self._label_selector(db_obj_type, resource_klass,
+                                            filters)
+        if not selector or len(objs) < 2:
+            for obj in objs:
+                self.delete(obj)
+            return
+        # A single call for the whole collection
+        try:
+            self.klient.delete_collection(db_obj_type, namespace,
+                                          label_selector=selector)
+        except api_v1.klient.ApiException as e:
+            if str(e.status) != '404':
+                raise
+        for obj in objs:
+            self._cache_update(db_obj_type, k8s_cache.EVENT_DELETED, obj)
+            self._post_delete(obj)
+
+    def _label_selector(self, db_obj_type, resource_klass, filters):
+        """Label selector equivalent to the filters, None if there isn't."""
+        for k in filters:
+            if db_obj_type == api_v1.AciContainersObject:
+                if k not in resource_klass.identity_attributes:
+                    return
+            else:
+                attr = db_obj_type.attribute_map.get(k, ())
+                if (attr[:2] != ('metadata', 'labels') and
+                        attr != ('metadata', 'namespace')):
+                    return
+        selectors = db_obj_type().build_selectors(resource_klass, filters)
+        return selectors.get('label_selector')
 
     def _post_create(self, created):
         # Can be patched in UTs to simulate Hashtree postcommit
@@ -649,7 +1156,411 @@ class K8sStore(AimStore):
         pass
 
 
+def _has_null(value):
+    if value is None:
+        return True
+    if isinstance(value, dict):
+        return any(_has_null(v) for v in value.itervalues())
+    return False
+
+
+class KeyValueObject(object):
+    """Record of an AIM resource in the KeyValueStore.
+
+    A subclass is generated for every resource class, it's the DB object
+    type returned by KeyValueStore.resource_to_db_type.
+    """
+
+    resource_class = None
+
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, self.__dict__)
+
+
+def _copy_value(value):
+    if isinstance(value, list):
+        if value and isinstance(value[0], (list, dict)):
+            return copy.deepcopy(value)
+        return list(value)
+    if isinstance(value, dict):
+        return copy.deepcopy(value)
+    return value
+
+
+def _copy_attributes(attributes):
+    # Values are copied in and out of the DB objects so that neither the
+    # store nor its callers see each other's changes
+    return {k: _copy_value(v) for k, v in attributes.iteritems()}
+
+
+class _KeyValueTable(object):
+    """Objects of a DB type, hashed by identity plus secondary indexes."""
+
+    def __init__(self, db_type, indexed_attributes):
+        klass = db_type.resource_class
+        self.db_type = db_type
+        self.identity = tuple(klass.identity_attributes)
+        self.objects = {}
+        self.indexes = dict((x, {}) for x in indexed_attributes)
+
+    def key(self, db_obj):
+        return tuple(getattr(db_obj, x, None) for x in self.identity)
+
+    def put(self, key, db_obj):
+        self.remove(key)
+        self.objects[key] = db_obj
+        for attr, index in self.indexes.iteritems():
+            index.setdefault(getattr(db_obj, attr, None), set()).add(key)
+
+    def remove(self, key):
+        db_obj = self.objects.pop(key, None)
+        if db_obj is not None:
+            for attr, index in self.indexes.iteritems():
+                value = getattr(db_obj, attr, None)
+                index[value].discard(key)
+                if not index[value]:
+                    del index[value]
+        return db_obj
+
+    def _candidates(self, in_, filters):
+        # Smallest set of keys that might match, None when all of them
+        if filters and set(self.identity) <= set(filters):
+            return [tuple(filters[x] for x in self.identity)]
+        best = None
+        for attr, index in self.indexes.iteritems():
+            if attr in filters:
+                keys = index.get(filters[attr], ())
+            elif attr in in_:
+                keys = set()
+                for value in set(in_[attr]):
+                    keys |= index.get(value, set())
+            else:
+                continue
+            if best is None or len(keys) < len(best):
+                best = keys
+        return best
+
+    def find(self, in_=None, notin_=None, **filters):
+        in_ = in_ or {}
+        notin_ = dict((k, set((x or '') for x in v))
+                      for k, v in (notin_ or {}).iteritems())
+        in_sets = dict((k, set(v)) for k, v in in_.iteritems())
+        keys = self._candidates(in_, filters)
+        if keys is None:
+            db_objs = self.objects.itervalues()
+        else:
+            db_objs = (self.objects[x] for x in keys if x in self.objects)
+        result = []
+        for db_obj in db_objs:
+            if any(getattr(db_obj, k, None) != v
+                   for k, v in filters.iteritems()):
+                continue
+            if any(getattr(db_obj, k, None) not in v
+                   for k, v in in_sets.iteritems()):
+                continue
+            # NULL values are neither in nor not in a list
+            if any(getattr(db_obj, k, None) is None or
+                   getattr(db_obj, k) in v for k, v in notin_.iteritems()):
+                continue
+            result.append(db_obj)
+        return result
+
+
+class KeyValueData(object):
+    """Tables of a KeyValueStore, shared by all its transactions."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.tables = {}
+        self.sequence = itertools.count(1)
+
+
+class _KeyValueTransaction(object):
+
+    def __init__(self):
+        self.depth = 0
+        self.reset()
+
+    def reset(self):
+        # (table, key) -> object before the transaction, and before the
+        # update listeners were last invoked
+        self.undo = {}
+        self.pending = {}
+        # Roots of the action logs written by the transaction
+        self.log_roots = set()
+
+    def record(self, table, key):
+        curr = table.objects.get(key)
+        self.undo.setdefault((table, key), curr)
+        self.pending.setdefault((table, key), curr)
+
+    def rollback(self):
+        for (table, key), db_obj in self.undo.iteritems():
+            if db_obj is None:
+                table.remove(key)
+            else:
+                table.put(key, db_obj)
+
+
 class KeyValueStore(AimStore):
+    """In-memory store, for tests and benchmarks that don't need a DB.
+
+    Objects live in per-class tables hashed by their identity attributes,
+    with secondary indexes on the attributes in 'indexed_attributes'.
+    Unless otherwise specified all the stores of a process share the same
+    tables, and transactions are serialized. The update listeners are
+    invoked before the outermost transaction commits, and the postcommit
+    ones right after, like in the SQLAlchemy store.
+    """
+
+    _features = ['kv', 'timestamp']
+    # Secondary indexes, the root reference attribute of each class (eg.
+    # tenant_name) is always indexed
+    indexed_attributes = ('tenant_name', 'root_rn', 'resource_root',
+                          'resource_id', 'status_id', 'aim_id')
+    _db_types = {}
+    _shared_data = None
+
+    def __init__(self, data=None, initialize_hooks=True):
+        super(KeyValueStore, self).__init__()
+        if data is None:
+            if KeyValueStore._shared_data is None:
+                KeyValueStore._shared_data = KeyValueData()
+            data = KeyValueStore._shared_data
+        self.data = data
+        # Transactions, like DB sessions, are per thread
+        self._local = threading.local()
+        self.initialize_hooks = initialize_hooks
+        if initialize_hooks:
+            self._initialize_hooks()
 
-    def __init__(self, **kwargs):
-        pass
+    def _initialize_hooks(self):
+        self._hashtree_db_listener = ht_db_l.HashTreeDbListener(
+            aim_manager.AimManager())
+        self.register_update_listener(
+            'hashtree_db_listener_on_commit',
+            self._hashtree_db_listener.on_commit,
+            resource_classes=self._hashtree_db_listener.resource_classes)
+        self.register_postcommit_listener(
+            'tree_creation_postcommit',
+            rpc.AIDEventRpcApi().tree_creation_postcommit)
+
+    @property
+    def _tx(self):
+        try:
+            return self._local.tx
+        except AttributeError:
+            self._local.tx = _KeyValueTransaction()
+            return self._local.tx
+
+    @classmethod
+    def reset(cls):
+        """Drop all the objects of the shared tables."""
+        cls._shared_data = None
+
+    @property
+    def name(self):
+        return 'KeyValue'
+
+    @property
+    def current_timestamp(self):
+        return datetime.datetime.utcnow()
+
+    def resource_to_db_type(self, resource_klass):
+        try:
+            return self._db_types[resource_klass]
+        except KeyError:
+            pass
+        attrs = {'resource_class': resource_klass}
+        if issubclass(resource_klass, api_res.AciResourceBase):
+            # Resources that support status
+            attrs['aim_id'] = None
+        db_type = type(resource_klass.__name__ + 'Object', (KeyValueObject,),
+                       attrs)
+        return self._db_types.setdefault(resource_klass, db_type)
+
+    def _table(self, db_obj_type):
+        try:
+            return self.data.tables[db_obj_type]
+        except KeyError:
+            klass = db_obj_type.resource_class
+            attrs = set(klass.attributes())
+            if hasattr(db_obj_type, 'aim_id'):
+                attrs.add('aim_id')
+            indexed = set(x for x in self.indexed_attributes if x in attrs)
+            if len(klass.identity_attributes) > 1:
+                indexed.add(klass.identity_attributes.keys()[0])
+            return self.data.tables.setdefault(
+                db_obj_type, _KeyValueTable(db_obj_type, indexed))
+
+    @contextmanager
+    def _transaction(self):
+        tx = self._tx
+        outermost = not tx.depth
+        if outermost:
+            self.data.lock.acquire()
+        tx.depth += 1
+        try:
+            yield
+            if outermost:
+                self._invoke_update_listeners(tx)
+        except Exception:
+            if outermost:
+                tx.rollback()
+            raise
+        finally:
+            tx.depth -= 1
+            if outermost:
+                log_roots = tx.log_roots
+                tx.reset()
+                self.data.lock.release()
+        if outermost:
+            self._invoke_postcommit_listeners(log_roots)
+
+    def begin(self, **kwargs):
+        return self._transaction()
+
+    def _copy(self, db_obj):
+        # Attribute values are only replaced, never changed in place
+        return type(db_obj)(**db_obj.__dict__)
+
+    def add(self, db_obj):
+        with self.begin():
+            table = self._table(type(db_obj))
+            key = table.key(db_obj)
+            old_key = getattr(db_obj, '_kv_key', None)
+            if old_key is None:
+                if key in table.objects:
+                    raise db_exc.DBDuplicateEntry(
+                        columns=list(table.identity), value=key)
+                self._set_generated(db_obj, table)
+            elif old_key != key:
+                # Identity changed
+                self._tx.record(table, old_key)
+                table.remove(old_key)
+            self._set_updated(db_obj, table)
+            self._tx.record(table, key)
+            db_obj._kv_key = key
+            table.put(key, self._copy(db_obj))
+            if table.db_type.resource_class is api_tree.ActionLog:
+                self._tx.log_roots.add(db_obj.root_rn)
+
+    def _set_generated(self, db_obj, table):
+        db_attributes = table.db_type.resource_class.db_attributes
+        if hasattr(db_obj, 'aim_id') and db_obj.aim_id is None:
+            db_obj.aim_id = next(self.data.sequence)
+        if 'id' in db_attributes and getattr(db_obj, 'id', None) is None:
+            db_obj.id = (next(self.data.sequence)
+                         if db_attributes['id'].get('type') == 'integer'
+                         else utils.generate_uuid())
+
+    def _set_updated(self, db_obj, table):
+        for attr in table.db_type.resource_class.db_attributes:
+            if attr == 'version':
+                db_obj.version = utils.generate_uuid()
+            elif attr.endswith('timestamp'):
+                setattr(db_obj, attr, self.current_timestamp)
+
+    def delete(self, db_obj):
+        with self.begin():
+            table = self._table(type(db_obj))
+            key = getattr(db_obj, '_kv_key', None) or table.key(db_obj)
+            if key in table.objects:
+                self._tx.record(table, key)
+                table.remove(key)
+
+    def query(self, db_obj_type, resource_klass, in_=None, notin_=None,
+              order_by=None, lock_update=False, **filters):
+        # Transactions are serialized, there's no need for locking reads
+        with self.data.lock:
+            result = [self._copy(x) for x in self._table(db_obj_type).find(
+                in_=in_, notin_=notin_, **filters)]
+        if order_by:
+            order_by = order_by if isinstance(order_by, list) else [order_by]
+            result.sort(key=lambda x: [getattr(x, k, None)
+                                       for k in order_by])
+        return result
+
+    def count(self, db_obj_type, resource_klass, in_=None, notin_=None,
+              **filters):
+        with self.data.lock:
+            return len(self._table(db_obj_type).find(
+                in_=in_, notin_=notin_, **filters))
+
+    def delete_all(self, db_obj_type, resource_klass, in_=None, notin_=None,
+                   **filters):
+        # Like a bulk delete of the SQL store, this doesn't invoke the update
+        # listeners
+        with self.begin():
+            table = self._table(db_obj_type)
+            db_objs = table.find(in_=in_, notin_=notin_, **filters)
+            for db_obj in db_objs:
+                self._tx.undo.setdefault((table, db_obj._kv_key), db_obj)
+                table.remove(db_obj._kv_key)
+            return len(db_objs)
+
+    def non_empty_scopes(self, scopes):
+        with self.data.lock:
+            return [(klass, filters) for klass, filters in scopes
+                    if self._table(self.resource_to_db_type(klass)).find(
+                        **filters)]
+
+    def from_attr(self, db_obj, resource_klass, attribute_dict):
+        db_obj.__dict__.update(_copy_attributes(attribute_dict))
+
+    def to_attr(self, resource_klass, db_obj):
+        result = _copy_attributes(
+            {k: v for k, v in db_obj.__dict__.iteritems()
+             if k in resource_klass.attributes()})
+        if issubclass(resource_klass, api_status.OperationalResource):
+            # Like the status models, that are tracked in the hash trees
+            for attr in resource_klass.db_attributes:
+                if result.get(attr) is not None and attr.endswith(
+                        'timestamp'):
+                    result[attr] = str(result[attr])
+        return result
+
+    def _invoke_update_listeners(self, tx):
+        # Listeners are invoked until they stop making changes, each time
+        # with the changes made since the previous invocation
+        while tx.pending:
+            pending = tx.pending
+            tx.pending = {}
+            listeners = copy.copy(self._update_listeners)
+            if not listeners:
+                continue
+            added = []
+            updated = []
+            deleted = []
+            for (table, key), before in pending.iteritems():
+                after = table.objects.get(key)
+                klass = table.db_type.resource_class
+                if after is None and before is not None:
+                    deleted.append(self.make_resource(klass, before))
+                elif after is not None:
+                    (added if before is None else updated).append(
+                        self.make_resource(klass, after))
+            for name, f in listeners.iteritems():
+                classes = self._update_listener_classes.get(name)
+                args = [[x for x in res_list
+                         if classes is None or type(x) in classes]
+                        for res_list in (added, updated, deleted)]
+                LOG.debug("Invoking pre-commit hook %s with %d add(s), "
+                          "%d update(s), %d delete(s)",
+                          f.__name__, *[len(x) for x in args])
+                f(self, *args)
+
+    def _invoke_postcommit_listeners(self, roots):
+        if not roots:
+            return
+        for f in copy.copy(self._postcommit_listeners).values():
+            LOG.debug("Invoking after transaction commit hook %s with "
+                      "%d update(s))", f.__name__, len(roots))
+            try:
+                f(self, [], roots, [])
+            except Exception as ex:
+                LOG.error("An error occurred during aim manager postcommit "
+                          "execution: %s" % ex.message)
@@ -14,9 +14,9 @@
 #    under the License.
 
 import base64
-import collections
 import datetime
 from hashlib import md5
+import marshal
 
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -47,6 +47,10 @@ class ResourceBase(object):
 
     db_attributes = t.db()
 
+    # Memoized identity values live in a slot, __dict__ only holds the
+    # resource attributes
+    __slots__ = ('__dict__', '__weakref__', '_identity')
+
     def __init__(self, defaults, **kwargs):
         unset_attr = [k for k in self.identity_attributes
                       if kwargs.get(k) is None and k not in defaults]
@@ -61,27 +65,65 @@ class ResourceBase(object):
         for k, v in kwargs.iteritems():
             setattr(self, k, v)
 
+    def __setattr__(self, name, value):
+        if name in self.identity_attributes:
+            object.__setattr__(self, '_identity', None)
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        if name in self.identity_attributes:
+            object.__setattr__(self, '_identity', None)
+        object.__delattr__(self, name)
+
+    def _identity_values(self):
+        identity = getattr(self, '_identity', None)
+        if identity is None:
+            identity = tuple(str(getattr(self, x))
+                             for x in self.identity_attributes.keys())
+            object.__setattr__(self, '_identity', identity)
+        return identity
+
     @property
     def identity(self):
-        return [str(getattr(self, x)) for x in self.identity_attributes.keys()]
+        return list(self._identity_values())
 
     @classmethod
     def attributes(cls):
         return (cls.identity_attributes.keys() + cls.other_attributes.keys() +
                 cls.db_attributes.keys())
 
+    @classmethod
+    def member_names(cls):
+        names = cls.__dict__.get('_member_names')
+        if names is None:
+            names = tuple(cls.attributes() +
+                          ['pe_existing', '_error', '_pending'])
+            cls._member_names = names
+        return names
+
     @property
     def members(self):
-        return {x: self.__dict__[x] for x in self.attributes() +
-                ['pe_existing', '_error', '_pending'] if x in self.__dict__}
+        attrs = self.__dict__
+        return {x: attrs[x] for x in self.member_names() if x in attrs}
 
     @property
     def hash(self):
-        parts = collections.OrderedDict()
-        parts.update(self.members)
         return int(md5(base64.b64encode(
             '|'.join(['%s=%s' % (x, y)
-                      for x, y in parts.iteritems()]))).hexdigest(), 16)
+                      for x, y in self.members.iteritems()]))).hexdigest(), 16)
+
+    @property
+    def fingerprint(self):
+        """Cheap key identifying this version of the resource.
+
+        Made of the resource type and of its serialized members, it is
+        meant for in-memory bookkeeping only and must not be persisted.
+        """
+        try:
+            return type(self).__name__, marshal.dumps(self.members)
+        except ValueError:
+            # Not a plain data attribute
+            return type(self).__name__, self.hash
 
     def __str__(self):
         return '%s(%s)' % (type(self).__name__, ','.join(self.identity))
@@ -110,18 +152,36 @@ class AciResourceBase(ResourceBase):
                 raise exc.AciResourceDefinitionError(attr=ra, klass=cls)
         super(AciResourceBase, self).__init__(defaults, **kwargs)
 
+    # DN, RN and root only depend on the MO type and the identity values,
+    # memoize them by those so that setting an identity attribute never
+    # returns a stale value.
+    _dn_cache = utils.LimitedCache(300000)
+
+    def _memo_key(self, kind):
+        return (kind, self._aci_mo_name) + self._identity_values()
+
     @property
     def dn(self):
-        return apic_client.ManagedObjectClass(self._aci_mo_name).dn(
-            *self.identity)
+        key = self._memo_key('dn')
+        try:
+            return self._dn_cache[key]
+        except KeyError:
+            return self._dn_cache.put(
+                key, utils.get_mo_class(self._aci_mo_name).dn(*key[2:]))
 
     @property
     def rn(self):
-        mo = apic_client.ManagedObjectClass(self._aci_mo_name)
+        key = self._memo_key('rn')
+        try:
+            return self._dn_cache[key]
+        except KeyError:
+            pass
+        mo = utils.get_mo_class(self._aci_mo_name)
         if mo.rn_param_count > 0:
-            return mo.rn(*self.identity[-mo.rn_param_count:])
+            rn = mo.rn(*key[2:][-mo.rn_param_count:])
         else:
-            return mo.rn()
+            rn = mo.rn()
+        return self._dn_cache.put(key, rn)
 
     @classmethod
     def from_dn(cls, dn):
@@ -138,12 +198,18 @@ class AciResourceBase(ResourceBase):
 
     @property
     def root(self):
+        key = self._memo_key('root')
+        try:
+            return self._dn_cache[key]
+        except KeyError:
+            pass
         mos_and_types = utils.decompose_dn(self._aci_mo_name, self.dn)
-        mo = apic_client.ManagedObjectClass(mos_and_types[0][0])
+        mo = utils.get_mo_class(mos_and_types[0][0])
         if mo.rn_param_count > 0:
-            return mo.rn(mos_and_types[0][1])
+            root = mo.rn(mos_and_types[0][1])
         else:
-            return mo.rn()
+            root = mo.rn()
+        return self._dn_cache.put(key, root)
 
     @classmethod
     def root_ref_attribute(cls):
@@ -226,7 +292,9 @@ class Agent(ResourceBase):
         ('admin_state_up', t.bool),
         ('description', t.string(255)),
         ('hash_trees', t.list_of_ids),
+        ('warm_trees', t.list_of_ids),
         ('beat_count', t.number),
+        ('capacity', t.integer),
         ('version', t.string()))
     # Attrbutes completely managed by the DB (eg. timestamps)
     db_attributes = t.db(('heartbeat_timestamp', t.string()))
@@ -234,6 +302,7 @@ class Agent(ResourceBase):
     def __init__(self, **kwargs):
         super(Agent, self).__init__({'admin_state_up': True,
                                      'beat_count': 0,
+                                     'capacity': 1,
                                      'id': utils.generate_uuid()}, **kwargs)
 
     def __eq__(self, other):
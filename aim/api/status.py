@@ -13,7 +13,6 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from apicapi import apic_client
 from oslo_utils import importutils
 
 from aim.api import resource
@@ -161,6 +160,6 @@ class AciFault(resource.ResourceBase, OperationalResource):
         mos_and_types = utils.decompose_dn(self._aci_mo_name, self.dn)
         if mos_and_types:
             # Faults associated with unrecognized MOs will not decompose
-            mo = apic_client.ManagedObjectClass(mos_and_types[0][0])
+            mo = utils.get_mo_class(mos_and_types[0][0])
             return (mo.rn(mos_and_types[0][1])
                     if mo.rn_param_count else mo.rn())
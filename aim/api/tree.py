@@ -23,7 +23,8 @@ class Tree(api_res.ResourceBase):
         ('root_rn', t.string(64))
     )
     other_attributes = t.other(
-        ('needs_reset', t.bool)
+        ('needs_reset', t.bool),
+        ('cost', t.integer)
     )
     db_attributes = t.db()
 
@@ -49,7 +49,9 @@ class ConsistentHashRing(object):
     to calculate consistent key allocation into a node cluster.
 
     This class is not thread safe, but guarantees is results to be reproducible
-    by different instances given the same configuration.
+    by different instances given the same configuration. A long lived ring
+    can follow the cluster membership through set_nodes, which only hashes
+    the nodes that changed.
     """
 
     def __init__(self, nodes=None, vnodes=40, replicas=2, default_weight=1):
@@ -70,6 +72,10 @@ class ConsistentHashRing(object):
         """
         self._nodes = {}
         self._ring = []
+        # Star hashes, in ring order
+        self._hashes = []
+        # Ring index to the nodes serving the keys that land there
+        self._allocations = {}
         self._vnodes = vnodes
         self._replicas = replicas
         self._default_weight = default_weight
@@ -109,10 +115,16 @@ class ConsistentHashRing(object):
         # Remove nodes already in the ring, this could be a weight update
         # operation
         self.remove_nodes(set(self._nodes.keys()) & set(nodes.keys()))
-        for node, weight in nodes.iteritems():
-            for h4sh in self._hashi(node, weight):
-                bisect.insort(self._ring, Star(h4sh, node))
+        if not nodes:
+            return
+        # Stars are sorted once, the sort is stable so stars with the same
+        # hash keep their insertion order
+        self._ring.extend(Star(h4sh, node)
+                          for node, weight in nodes.iteritems()
+                          for h4sh in self._hashi(node, weight))
+        self._ring.sort(key=lambda x: x.h4sh)
         self._nodes.update(nodes)
+        self._ring_changed()
 
     def remove_node(self, node):
         """Remove a single node from the ring
@@ -128,16 +140,34 @@ class ConsistentHashRing(object):
         :param nodes:
         :return:
         """
-        for node in nodes:
-            weight = self._nodes.pop(node, None)
-            if weight is None:
-                # Node didn't exist in a first place
-                continue
-            for x in self._hashi(node, weight):
-                try:
-                    self._ring.remove(Star(x))
-                except ValueError:
-                    pass
+        # Nodes that didn't exist in a first place are ignored
+        removed = set(x for x in nodes if x in self._nodes)
+        if not removed:
+            return
+        for node in removed:
+            del self._nodes[node]
+        self._ring = [x for x in self._ring if x.node not in removed]
+        self._ring_changed()
+
+    def set_nodes(self, nodes):
+        """Make the ring contain exactly a set of nodes
+
+        Only the nodes that were added, removed or whose weight changed are
+        updated.
+        :param nodes: same format as add_nodes
+        :return: whether the ring changed
+        """
+        removed = set(self._nodes) - set(nodes)
+        added = dict((node, weight) for node, weight in nodes.iteritems()
+                     if node not in self._nodes or
+                     self._nodes[node] != weight)
+        self.remove_nodes(removed)
+        self.add_nodes(added)
+        return bool(removed or added)
+
+    def _ring_changed(self):
+        self._hashes = [x.h4sh for x in self._ring]
+        self._allocations = {}
 
     def assign_key(self, key):
         """Assign a key to the ring
@@ -145,9 +175,72 @@ class ConsistentHashRing(object):
         :param key: identifier
         :return: list of nodes that serve this key
         """
-        index = bisect.bisect(self._ring, Star(self._hash(key)))
+        return list(self._allocate(self._hash(key)))
+
+    def assign_keys(self, keys):
+        """Assign multiple keys to the ring
+
+        Keys landing on the same star share the same allocation, which is
+        calculated once until the ring changes.
+        :param keys: iterable of identifiers
+        :return: dictionary of key to the list of nodes that serve it
+        """
+        return dict((key, list(self._allocate(self._hash(key))))
+                    for key in keys)
+
+    def assign_keys_bounded(self, costs, load_factor):
+        """Assign keys to the ring bounding the load of each node
+
+        Consistent hashing with bounded loads: every node takes at most
+        load_factor times its share, by weight, of the total cost. A key is
+        served by the first nodes that still have room for it, starting from
+        its position in the ring. Heavier keys are placed first, so the
+        result is reproducible given the same costs.
+        :param costs: dictionary of key to its cost
+        :param load_factor: bound over the fair load of a node, > 1
+        :return: dictionary of key to the list of nodes that serve it
+        """
+        weights = dict((node, self._default_weight if weight is None else
+                        weight) for node, weight in self._nodes.iteritems())
+        replicas = min(self._replicas, len(weights))
+        total = sum(costs.values()) * replicas
+        weight_sum = float(sum(weights.values()))
+        limits = dict((node, load_factor * total * weight / weight_sum)
+                      for node, weight in weights.iteritems())
+        loads = dict.fromkeys(weights, 0)
+        hashes = dict((key, self._hash(key)) for key in costs)
+        result = {}
+        for key in sorted(costs, key=lambda x: (-costs[x], hashes[x])):
+            cost = costs[key]
+            index = bisect.bisect(self._hashes, hashes[key])
+            if index == len(self._ring):
+                index = 0
+            nodes = []
+            for x in xrange(len(self._ring)):
+                node = self._ring[index - x].node
+                if node not in nodes and loads[node] + cost <= limits[node]:
+                    nodes.append(node)
+                    if len(nodes) == replicas:
+                        break
+            if len(nodes) < replicas:
+                # Key too heavy for the bound, use the least loaded nodes
+                nodes.extend(sorted(
+                    (x for x in weights if x not in nodes),
+                    key=lambda x: (loads[x] / float(weights[x]), x))[
+                        :replicas - len(nodes)])
+            for node in nodes:
+                loads[node] += cost
+            result[key] = nodes
+        return result
+
+    def _allocate(self, h4sh):
+        index = bisect.bisect(self._hashes, h4sh)
         if index == len(self._ring):
             index = 0
+        try:
+            return self._allocations[index]
+        except KeyError:
+            pass
         result = [self._ring[index].node]
         # Replicate across the ring in anti clockwise motion
         for x in xrange(len(self._ring)):
@@ -156,7 +249,8 @@ class ConsistentHashRing(object):
                 break
             if self._ring[index - x].node not in result:
                 result.append(self._ring[index - x].node)
-        return result
+        self._allocations[index] = tuple(result)
+        return self._allocations[index]
 
     def __len__(self):
         return len(self._nodes)
@@ -0,0 +1,232 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""In-process counters, gauges and histograms.
+
+Metrics are declared at module level and only record values once enabled,
+until then every operation returns right away. Enabled metrics are exported
+in the Prometheus text format by a local HTTP endpoint.
+"""
+
+import bisect
+import threading
+import time
+
+from oslo_log import log as logging
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+
+from aim.common import utils
+
+
+LOG = logging.getLogger(__name__)
+# Seconds
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30,
+                60)
+# Number of items
+SIZE_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+
+_enabled = False
+_registry = {}
+_lock = threading.Lock()
+
+
+def enable(enabled=True):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """Forget all the values recorded so far."""
+    with _lock:
+        for metric in _registry.values():
+            metric.values.clear()
+
+
+class _NoopTimer(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _Timer(object):
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *args):
+        self.histogram.observe(time.time() - self.start, **self.labels)
+
+
+class Metric(object):
+    type = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        # Label values to the value recorded
+        self.values = {}
+        with _lock:
+            _registry[name] = self
+
+    def _key(self, labels):
+        return tuple(str(labels.get(x, '')) for x in self.labels)
+
+    def _format_labels(self, key, extra=None):
+        pairs = zip(self.labels, key) + (extra or [])
+        if not pairs:
+            return ''
+        return '{%s}' % ','.join(
+            '%s="%s"' % (k, v.replace('\\', '\\\\').replace('"', '\\"'))
+            for k, v in pairs)
+
+    def render(self):
+        lines = ['# HELP %s %s' % (self.name, self.description),
+                 '# TYPE %s %s' % (self.name, self.type)]
+        for key, value in sorted(self.values.items()):
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return ['%s%s %s' % (self.name, self._format_labels(key),
+                             _format_number(value))]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, value=1, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, description, labels=(), buckets=TIME_BUCKETS):
+        super(Histogram, self).__init__(name, description, labels=labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with _lock:
+            # Per bucket counts, the last one is +Inf, then sum
+            counts = self.values.setdefault(
+                key, [0] * (len(self.buckets) + 1) + [0])
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def time(self, **labels):
+        """Context manager observing the seconds spent in its block."""
+        if not _enabled:
+            return _NOOP_TIMER
+        return _Timer(self, labels)
+
+    def _render_value(self, key, value):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), value[:-1]):
+            cumulative += count
+            lines.append('%s_bucket%s %s' % (
+                self.name,
+                self._format_labels(key, [('le', _format_number(bound))]),
+                cumulative))
+        labels = self._format_labels(key)
+        lines.append('%s_sum%s %s' % (self.name, labels,
+                                      _format_number(value[-1])))
+        lines.append('%s_count%s %s' % (self.name, labels, cumulative))
+        return lines
+
+
+def _format_number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def render():
+    """All the metrics in the Prometheus text format."""
+    lines = []
+    with _lock:
+        for name in sorted(_registry):
+            lines.extend(_registry[name].render())
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = render()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        LOG.debug("Metrics request: " + format % args)
+
+
+class _MetricsServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+def serve(port, host='127.0.0.1'):
+    """Enable metrics and export them on http://<host>:<port>/metrics
+
+    :return: the HTTP server, serving from a separate thread
+    """
+    server = _MetricsServer((host, port), _MetricsHandler)
+    # Nothing is recorded unless it can be exported
+    enable()
+    LOG.info("Exporting metrics on http://%s:%s/metrics" %
+             server.server_address)
+    utils.spawn_thread(server.serve_forever)
+    return server
@@ -176,9 +176,44 @@ class FakeContext(object):
             self.store = store
 
 
+class LimitedCache(dict):
+    """Memo for pure functions, dropped altogether when it grows too big."""
+
+    def __init__(self, size):
+        super(LimitedCache, self).__init__()
+        self.size = size
+
+    def put(self, key, value):
+        if len(self) >= self.size:
+            self.clear()
+        if self.size:
+            self[key] = value
+        return value
+
+
+# ManagedObjectClass caches its instances, but still re-runs __init__ (and
+# the DN format computation of the whole container chain) on every call.
+_MO_CLASSES = {}
+DN_CACHE = LimitedCache(100000)
+
+
+def get_mo_class(mo_type):
+    try:
+        return _MO_CLASSES[mo_type]
+    except KeyError:
+        return _MO_CLASSES.setdefault(
+            mo_type, apic_client.ManagedObjectClass(mo_type))
+
+
 def decompose_dn(mo_type, dn):
     try:
-        return apic_client.DNManager().aci_decompose_dn_guess(dn, mo_type)[1]
+        return list(DN_CACHE[(mo_type, dn)])
+    except KeyError:
+        pass
+    try:
+        return list(DN_CACHE.put(
+            (mo_type, dn),
+            apic_client.DNManager().aci_decompose_dn_guess(dn, mo_type)[1]))
     except (apic_client.DNManager.InvalidNameFormat, KeyError,
             apic_client.cexc.ApicManagedObjectNotSupported, IndexError):
         log_ = LOG.warning
@@ -313,3 +348,15 @@ def json_loads(json_text):
 
 def json_dumps(dict):
     return json.dumps(dict)
+
+
+def chunks(iterable, size):
+    """Split an iterable in lists of at most 'size' elements."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
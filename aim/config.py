@@ -46,6 +46,85 @@ agent_opts = [
                        "an event is received before starting the "
                        "reconciliation. This will squash similar events "
                        "together")),
+    cfg.FloatOpt('agent_event_squash_max_time', default=1,
+                 help=("Upper bound of the time AID waits to squash events "
+                       "together. While events come in bursts the squash "
+                       "time grows from agent_event_squash_time with the "
+                       "time between events and the duration of the last "
+                       "reconciliation, and agent_polling_interval is only "
+                       "enforced between cycles during bursts. Set it lower "
+                       "than agent_event_squash_time for a fixed squash "
+                       "time.")),
+    cfg.FloatOpt('agent_full_sweep_interval', default=60,
+                 help=("Seconds between full reconciliation cycles. Event "
+                       "driven cycles in between only observe and reconcile "
+                       "the tenants that changed or that have pending "
+                       "failures, the full sweep is a safety net for "
+                       "changes that went unnoticed. Set to 0 to reconcile "
+                       "all the served tenants on every cycle.")),
+    cfg.IntOpt('agent_reconcile_workers', default=0,
+               help=("Number of threads AID uses to reconcile the universe "
+                     "pairs and, within each pair, partitions of the served "
+                     "tenants concurrently. Each worker has its own DB "
+                     "session. With 0 the pairs are reconciled one after "
+                     "another by the main loop.")),
+    cfg.IntOpt('agent_capacity', default=1, min=1,
+               help=("Relative amount of work this host's AID agents can "
+                     "take. It weights the agent in the tenants hash ring, "
+                     "and its share of the total load when "
+                     "agent_load_factor is set.")),
+    cfg.FloatOpt('agent_load_factor', default=0,
+                 help=("Balance the tenants by their cost, the size of "
+                       "their trees, instead of their number. Each agent "
+                       "serves at most this factor times its fair share of "
+                       "the total cost, eg. 1.25. Set to 0 to spread the "
+                       "tenants with plain consistent hashing.")),
+    cfg.FloatOpt('agent_cost_refresh_interval', default=300,
+                 help=("Seconds between the updates of the tenants cost "
+                       "used by agent_load_factor. A single agent, the one "
+                       "with the lowest id, measures the trees and "
+                       "publishes their cost in the DB, so that all the "
+                       "agents place the tenants with the same costs.")),
+    cfg.BoolOpt('agent_leader_per_tenant', default=False,
+                help=("Only the first agent a tenant is assigned to, its "
+                      "leader, reconciles it: pushes changes and updates "
+                      "status objects. The other agents serving the tenant "
+                      "are warm standbys that keep observing it, and take "
+                      "over as soon as the leader is down.")),
+    cfg.FloatOpt('agent_handoff_window', default=0,
+                 help=("Seconds an agent keeps serving the tenants moved to "
+                       "other agents, until their new owners report with "
+                       "their heartbeat that the tenants' ACI state is "
+                       "loaded. Avoids leaving moved tenants unsynchronized "
+                       "while they are cold started. Set to 0 to release "
+                       "moved tenants immediately.")),
+    cfg.IntOpt('agent_metrics_port', default=0, min=0,
+               help=("Local port AID exports its metrics on, in the "
+                     "Prometheus text format, at "
+                     "http://127.0.0.1:<port>/metrics. With agent_workers, "
+                     "worker N uses port + N + 1. Set to 0 to disable "
+                     "metrics. Only read at startup.")),
+    cfg.IntOpt('agent_workers', default=0,
+               help=("Number of AID worker processes forked by aim-aid. Each "
+                     "worker registers as its own agent, aid-<host>-<n>, and "
+                     "the served tenants are spread across all the agents "
+                     "alive. Events received on unix_socket_path are relayed "
+                     "to every worker. With 0 AID runs in a single process. "
+                     "Only read at startup.")),
+    cfg.FloatOpt('agent_config_reconcile_interval', default=0,
+                 help=("Minimum number of seconds between two "
+                       "reconciliations of the configuration universes (AIM "
+                       "to ACI). Events concerning them are handled at most "
+                       "this often.")),
+    cfg.FloatOpt('agent_operational_reconcile_interval', default=10,
+                 help=("Minimum number of seconds between two "
+                       "reconciliations of the operational universes, which "
+                       "bring ACI faults into AIM. A flood of fault changes "
+                       "doesn't delay the configuration sync.")),
+    cfg.FloatOpt('agent_monitored_reconcile_interval', default=5,
+                 help=("Minimum number of seconds between two "
+                       "reconciliations of the monitored universes, which "
+                       "bring the ACI objects not owned by AIM into AIM.")),
     cfg.IntOpt('agent_report_interval', default=60,
                help=("Number of seconds after which an agent reports his "
                      "state")),
@@ -73,19 +152,29 @@ agent_opts = [
                     "failure before considering it a new tentative"),
     cfg.StrOpt('unix_socket_path', default='/run/aid/events/aid.sock',
                help="Path to the unix socket used for notifications"),
+    cfg.IntOpt('query_batch_size', default=1000,
+               help="Number of objects retrieved per backend query when AIM "
+                    "iterates over large result sets, such as the whole "
+                    "state of a resource type."),
+    cfg.FloatOpt('read_replica_lag_window', default=5,
+                 help=("Maximum number of seconds a process reads from the "
+                       "primary DB, rather than from its read replica, "
+                       "after committing a write the replica doesn't have "
+                       "yet, or that can't be checked on the replica.")),
     cfg.BoolOpt('recovery_restart', default=True,
                 help=("Set to True if you want the agents to exit in critical "
                       "situations.")),
     cfg.StrOpt('aim_service_identifier', default=socket.gethostname(),
                help="(Restart Required) Identifier for this specific AID "
                     "service, defaults to the hostname."),
-    cfg.StrOpt('aim_store', default='sql', choices=['k8s', 'sql'],
+    cfg.StrOpt('aim_store', default='sql', choices=['k8s', 'sql', 'kv'],
                help="Backend store of this AIM installation. It can be either "
                     "SQL via sqlalchemy or k8s via the Kubernetes API server."
                     "If the former is chosen, a DB section needs to exist "
                     "with info on how to create a DB session. In the case of "
                     "the Kubernetes store, specify the config file path in "
-                    "the [aim_k8s] section")
+                    "the [aim_k8s] section. The kv store keeps everything in "
+                    "memory, it's only meant for tests and benchmarks")
 ]
 
 # TODO(ivar): move into AIM section
@@ -106,7 +195,12 @@ k8s_options = [
                     "AIM installation."),
     cfg.StrOpt('k8s_controller', default='kube-cluster',
                help="Name of controller in Kubernetes VMM domain used "
-                    "by this AIM installation.")
+                    "by this AIM installation."),
+    cfg.IntOpt('k8s_cache_max_staleness', default=30,
+               help="Maximum time, in seconds, for which the Kubernetes "
+                    "objects cached from the watch streams are served "
+                    "without confirming that the streams are still alive. "
+                    "Set to 0 to always query the Kubernetes API.")
 ]
 
 server_options = [
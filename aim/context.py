@@ -25,6 +25,11 @@ class AimContext(object):
         else:
             self.store = store
 
+    @property
+    def read_only(self):
+        # Whether read-only traffic is served by a read replica
+        return getattr(self.store, 'read_only', False)
+
     # For backwards compatibility
     @property
     def db_session(self):
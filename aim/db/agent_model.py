@@ -47,11 +47,12 @@ class Agent(model_base.Base, model_base.HasId, model_base.AttributeMixin):
         sa.TIMESTAMP, server_default=func.now(), onupdate=func.now())
     description = sa.Column(sa.String(255))
     beat_count = sa.Column(sa.Integer, default=0)
+    capacity = sa.Column(sa.Integer, default=1)
     version = sa.Column(sa.String, nullable=False)
     hash_trees = orm.relationship(tree_model.AgentToHashTreeAssociation,
                                   backref='agents',
                                   cascade='all, delete-orphan',
-                                  lazy="joined")
+                                  lazy="subquery")
 
     def set_hash_trees(self, session, trees, **kwargs):
         if trees is None:
@@ -73,11 +74,30 @@ class Agent(model_base.Base, model_base.HasId, model_base.AttributeMixin):
                 db_obj = tree_model.AgentToHashTreeAssociation(
                     agent_id=self.id or kwargs.get('id'), tree_root_rn=tree)
                 self.hash_trees.append(db_obj)
+        self._set_warm(kwargs.get('warm_trees'))
 
     def get_hash_trees(self, session):
         # Only return the trees' identifier
         return [getattr(x, 'tree_root_rn') for x in self.hash_trees or []]
 
+    @property
+    def warm_trees(self):
+        return self.get_warm_trees(None)
+
+    def set_warm_trees(self, session, trees, **kwargs):
+        self._set_warm(trees)
+
+    def get_warm_trees(self, session):
+        # Served trees whose ACI state is fully loaded by the agent
+        return [x.tree_root_rn for x in self.hash_trees or [] if x.warm]
+
+    def _set_warm(self, trees):
+        if trees is None:
+            return
+        trees = set(trees)
+        for curr in self.hash_trees:
+            curr.warm = curr.tree_root_rn in trees
+
     def tree_exists(self, session, root_rn):
         try:
             session.query(tree_model.ConfigTree).filter(
@@ -13,13 +13,19 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
+
 from oslo_config import cfg
 from oslo_db.sqlalchemy import session
+from sqlalchemy import event as sa_event
 
 from aim import aim_store
+from aim.common import metrics
 
 
 _FACADE = None
+DB_QUERIES = metrics.Counter('aim_db_queries_total',
+                             'SQL statements executed.', labels=('engine',))
 
 
 def _create_facade_lazily():
@@ -37,6 +43,21 @@ def get_engine():
     return facade.get_engine()
 
 
+def count_queries():
+    """Count the statements executed by the DB engines of this process."""
+    facade = _create_facade_lazily()
+    engines = [('primary', facade.get_engine())]
+    if cfg.CONF.database.slave_connection:
+        engines.append(('replica', facade.get_engine(use_slave=True)))
+    for name, engine in engines:
+        sa_event.listen(engine, 'before_cursor_execute',
+                        functools.partial(_count_query, name))
+
+
+def _count_query(engine, *args, **kwargs):
+    DB_QUERIES.inc(engine=engine)
+
+
 def dispose():
     # Don't need to do anything if an enginefacade hasn't been created
     if _FACADE is not None:
@@ -52,17 +73,32 @@ def get_session(autocommit=True, expire_on_commit=True, use_slave=False):
 
 
 def get_store(autocommit=True, expire_on_commit=True, use_slave=False,
-              initialize_hooks=True):
+              initialize_hooks=True, read_only=False):
+    """Helper method to grab a store.
+
+    :param read_only: if a read replica is configured ([database]
+    slave_connection), route non-locking queries issued outside of
+    transactions to it, as long as the replica has caught up with the last
+    write of this process, or aim read_replica_lag_window seconds passed
+    since. Writes always go to the primary.
+    """
     store = cfg.CONF.aim.aim_store
     if store == 'sql':
         db_session = get_session(
             autocommit=autocommit, expire_on_commit=expire_on_commit,
             use_slave=use_slave)
+        read_session = None
+        if read_only and cfg.CONF.database.slave_connection:
+            read_session = get_session(expire_on_commit=expire_on_commit,
+                                       use_slave=True)
         return aim_store.SqlAlchemyStore(
-            db_session, initialize_hooks=initialize_hooks)
+            db_session, initialize_hooks=initialize_hooks,
+            read_session=read_session)
     elif store == 'k8s':
         return aim_store.K8sStore(
             namespace=cfg.CONF.aim_k8s.k8s_namespace,
             config_file=cfg.CONF.aim_k8s.k8s_config_path,
             vmm_domain=cfg.CONF.aim_k8s.k8s_vmm_domain,
             vmm_controller=cfg.CONF.aim_k8s.k8s_controller)
+    elif store == 'kv':
+        return aim_store.KeyValueStore(initialize_hooks=initialize_hooks)
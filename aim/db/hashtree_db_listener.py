@@ -22,11 +22,16 @@ from aim.api import resource
 from aim.api import tree as aim_tree
 from aim.common.hashtree import exceptions as hexc
 from aim.common.hashtree import structured_tree as htree
+from aim.common import metrics
 from aim.common import utils
+from aim import config as aim_cfg
 from aim import tree_manager
 
 MAX_EVENTS_PER_ROOT = 10000
 LOG = logging.getLogger(__name__)
+ACTION_LOG_BACKLOG = metrics.Gauge(
+    'aim_action_log_backlog',
+    'Action logs found by the last catch up with the action log.')
 # Not really rootless, they just miss the root reference attributes
 ROOTLESS_TYPES = ['fabricTopology']
 
@@ -39,6 +44,9 @@ class HashTreeDbListener(object):
         self.tt_mgr = tree_manager.HashTreeManager()
         self.tt_maker = tree_manager.AimHashTreeMaker()
         self.tt_builder = tree_manager.HashTreeBuilder(self.aim_manager)
+        # Only resources with a root are tracked in the hash trees
+        self.resource_classes = frozenset(
+            x for x in self.aim_manager.aim_resources if hasattr(x, 'root'))
 
     def on_commit(self, store, added, updated, deleted):
         # Query hash-tree for each tenant and modify the tree based on DB
@@ -90,6 +98,7 @@ class HashTreeDbListener(object):
         with aim_ctx.store.begin(subtransactions=True):
             cache = {}
             log_by_root = {}
+            batch_size = aim_cfg.CONF.aim.query_batch_size
             # Delete existing trees
             if root:
                 type, name = self.tt_mgr.root_key_funct(root)[0].split('|')
@@ -104,24 +113,33 @@ class HashTreeDbListener(object):
                             continue
                         if type not in ROOTLESS_TYPES:
                             filters[klass.root_ref_attribute()] = name
-                    # Get all objects of that type
-                    for obj in self.aim_manager.find(aim_ctx, klass,
-                                                     **filters):
-                        # Need all the faults and statuses as well
-                        stat = self.aim_manager.get_status(aim_ctx, obj)
-                        if stat:
-                            log_by_root.setdefault(obj.root, []).append(
-                                (aim_tree.ActionLog.CREATE, stat, None))
-                            for f in stat.faults:
-                                log_by_root.setdefault(obj.root, []).append(
-                                    (aim_tree.ActionLog.CREATE, f, None))
-                            del stat.faults
-                        log_by_root.setdefault(obj.root, []).append(
-                            (aim_tree.ActionLog.CREATE, obj, None))
+                    # Get all objects of that type, one batch at a time
+                    batches = utils.chunks(
+                        self.aim_manager.find_iter(
+                            aim_ctx, klass, batch_size=batch_size,
+                            **filters), batch_size)
+                    for objs in batches:
+                        self._log_creations(aim_ctx, objs, log_by_root)
             # Reset the trees
             self._push_changes_to_trees(aim_ctx, log_by_root,
                                         delete_logs=False, check_reset=False)
 
+    def _log_creations(self, aim_ctx, objs, log_by_root):
+        # Need all the faults and statuses as well
+        stats = self.aim_manager.get_statuses(aim_ctx, objs,
+                                              create_if_absent=True)
+        for obj in objs:
+            stat = stats.get(self.aim_manager.status_key(obj))
+            if stat:
+                log_by_root.setdefault(obj.root, []).append(
+                    (aim_tree.ActionLog.CREATE, stat, None))
+                for f in stat.faults:
+                    log_by_root.setdefault(obj.root, []).append(
+                        (aim_tree.ActionLog.CREATE, f, None))
+                del stat.faults
+            log_by_root.setdefault(obj.root, []).append(
+                (aim_tree.ActionLog.CREATE, obj, None))
+
     def reset(self, store, root=None):
         aim_ctx = utils.FakeContext(store=store)
         with aim_ctx.store.begin(subtransactions=True):
@@ -146,14 +164,18 @@ class HashTreeDbListener(object):
         to_init = set(self.tt_mgr.retrieve_uninitialized_roots(ctx))
         served_tenants |= to_init
         # Nothing will happen if there's no action log
-        kwargs = {'order_by': ['root_rn', 'id']}
+        # Keyset paging by id, logs deleted by other agents meanwhile can't
+        # shift the pages. Logs are grouped by root preserving this order
+        kwargs = {'order_by': ['id']}
         if served_tenants:
             kwargs['in_'] = {'root_rn': served_tenants}
-        logs = self.aim_manager.find(ctx, aim_tree.ActionLog, **kwargs)
-        LOG.debug('Processing action logs: %s' % logs)
+        logs = self.aim_manager.find_iter(ctx, aim_tree.ActionLog, **kwargs)
         log_by_root, resetting_roots = self._preprocess_logs(logs)
+        ACTION_LOG_BACKLOG.set(sum(len(x) for x in log_by_root.values()))
         self._cleanup_resetting_roots(ctx, log_by_root, resetting_roots)
         self._push_changes_to_trees(ctx, log_by_root)
+        # Roots whose trees might have changed
+        return set(log_by_root)
 
     def _preprocess_logs(self, logs):
         resetting_roots = set()
@@ -161,6 +183,7 @@ class HashTreeDbListener(object):
         resource_paths = ('resource', 'service_graph', 'infra', 'tree',
                           'status')
         for log in logs:
+            LOG.debug('Processing action log: %s' % log)
             if log.action == aim_tree.ActionLog.RESET:
                 resetting_roots.add(log.root_rn)
             action = log.action
@@ -0,0 +1,40 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Add capacity column to Agent model
+
+Revision ID: 4c8e1e2a7f5b
+Revises: 6d55c6f80f40
+Create Date: 2018-01-10 10:12:47.281031
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '4c8e1e2a7f5b'
+down_revision = '6d55c6f80f40'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.add_column('aim_agents',
+                  sa.Column('capacity', sa.Integer, server_default='1'))
+
+
+def downgrade():
+    pass
@@ -0,0 +1,41 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Add warm column to agent tree associations
+
+Revision ID: 9a4ed2c3b6f1
+Revises: 4c8e1e2a7f5b
+Create Date: 2018-01-17 15:40:21.613902
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '9a4ed2c3b6f1'
+down_revision = '4c8e1e2a7f5b'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.add_column('aim_agent_to_tree_associations',
+                  sa.Column('warm', sa.Boolean,
+                            server_default=sa.literal(False)))
+
+
+def downgrade():
+    pass
@@ -0,0 +1,40 @@
+# Copyright (c) 2018 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Add cost column to tenant trees
+
+Revision ID: b6e1c27d9f3a
+Revises: 9a4ed2c3b6f1
+Create Date: 2018-01-24 10:12:45.308117
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'b6e1c27d9f3a'
+down_revision = '9a4ed2c3b6f1'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.add_column('aim_tenant_trees',
+                  sa.Column('cost', sa.Integer, nullable=True))
+
+
+def downgrade():
+    pass
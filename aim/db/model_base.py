@@ -16,6 +16,7 @@
 import sqlalchemy as sa
 from sqlalchemy.dialects import mysql
 from sqlalchemy.ext import declarative
+from sqlalchemy import orm
 
 from aim.common import utils
 
@@ -94,15 +95,52 @@ class IsMonitored(object):
 class AttributeMixin(object):
     """Mixin class for translating between resource and model."""
 
+    @classmethod
+    def attribute_maps(cls):
+        """Per-class tables used for translating to/from resources.
+
+        Returns a tuple (attribute names, getters, setters) where getters and
+        setters map attribute names to the 'get_<attr>'/'set_<attr>' methods
+        of the model. The tables are built once per model class instead of
+        introspecting the object on every translation.
+        """
+        maps = cls.__dict__.get('_attribute_maps')
+        if maps is None:
+            exclude_to = getattr(cls, '_exclude_to', [])
+            names = [k for k in dir(cls)
+                     if (not k.startswith('_') and k not in exclude_to and
+                         not callable(getattr(cls, k)))]
+            getters = {}
+            setters = {}
+            for k in dir(cls):
+                if k in ('get_attr', 'set_attr'):
+                    continue
+                method = getattr(cls, k)
+                if not callable(method):
+                    continue
+                if k.startswith('get_'):
+                    getters[k[len('get_'):]] = method
+                elif k.startswith('set_'):
+                    setters[k[len('set_'):]] = method
+            maps = (tuple(names), getters, setters)
+            cls._attribute_maps = maps
+        return maps
+
     def from_attr(self, session, resource_attr):
         """Populate model from resource attribute dictionary.
 
         Child classes should override this method to specify a custom
         mapping of resource attributes to model properties.
         """
+        exclude_from = getattr(self, '_exclude_from', [])
+        setters = self.attribute_maps()[2]
         for k, v in resource_attr.iteritems():
-            if k not in getattr(self, '_exclude_from', []):
-                self.set_attr(session, k, v, **resource_attr)
+            if k not in exclude_from:
+                setter = setters.get(k)
+                if setter:
+                    setter(self, session, v, **resource_attr)
+                else:
+                    setattr(self, k, v)
 
     def to_attr(self, session):
         """Get resource attribute dictionary for a model object.
@@ -110,10 +148,18 @@ class AttributeMixin(object):
         Child classes should override this method to specify a custom
         mapping of model properties to resource attributes.
         """
-        return {k: self.get_attr(session, k) for k in dir(self)
-                if (not k.startswith('_') and
-                    k not in getattr(self, '_exclude_to', []) and
-                    not callable(getattr(self, k)))}
+        names, getters, _ = self.attribute_maps()
+        result = {}
+        for k in names:
+            getter = getters.get(k)
+            result[k] = getter(self, session) if getter else getattr(self, k)
+        # Attributes that only live on this instance
+        exclude_to = getattr(self, '_exclude_to', [])
+        for k, v in self.__dict__.iteritems():
+            if (k not in result and not k.startswith('_') and
+                    k not in exclude_to and not callable(v)):
+                result[k] = self.get_attr(session, k)
+        return result
 
     def set_attr(self, session, k, v, **kwargs):
         """Utility for setting DB attributes
@@ -125,18 +171,29 @@ class AttributeMixin(object):
         for retrieving the object identifiers.
         :return:
         """
-        if getattr(self, 'set_' + k, None):
+        setter = self.attribute_maps()[2].get(k)
+        if setter:
             # setter method exists
-            getattr(self, 'set_' + k)(session, v, **kwargs)
+            setter(self, session, v, **kwargs)
         else:
             setattr(self, k, v)
 
     def get_attr(self, session, k):
-        if getattr(self, 'get_' + k, None):
+        getter = self.attribute_maps()[1].get(k)
+        if getter:
             # getter method exists
-            return getattr(self, 'get_' + k)(session)
+            return getter(self, session)
         else:
             return getattr(self, k)
 
 
 Base = declarative.declarative_base(cls=AimBase)
+
+
+@sa.event.listens_for(orm.Mapper, 'after_configured')
+def _reset_attribute_maps():
+    # New mappers might have added backrefs to existing models, the
+    # translation tables will be rebuilt on first use
+    for cls in Base._decl_class_registry.values():
+        if isinstance(cls, type) and '_attribute_maps' in cls.__dict__:
+            del cls._attribute_maps
@@ -277,23 +277,23 @@ class EndpointGroup(model_base.Base, model_base.HasAimId,
     contracts = orm.relationship(EndpointGroupContract,
                                  backref='epg',
                                  cascade='all, delete-orphan',
-                                 lazy='joined')
+                                 lazy='subquery')
     vmm_domains = orm.relationship(EndpointGroupVMMDomain,
                                    backref='epg',
                                    cascade='all, delete-orphan',
-                                   lazy='joined')
+                                   lazy='subquery')
     physical_domains = orm.relationship(EndpointGroupPhysicalDomain,
                                         backref='epg',
                                         cascade='all, delete-orphan',
-                                        lazy='joined')
+                                        lazy='subquery')
     static_paths = orm.relationship(EndpointGroupStaticPath,
                                     backref='epg',
                                     cascade='all, delete-orphan',
-                                    lazy='joined')
+                                    lazy='subquery')
     epg_contract_masters = orm.relationship(EndpointGroupContractMasters,
                                             backref='epg',
                                             cascade='all, delete-orphan',
-                                            lazy='joined')
+                                            lazy='subquery')
 
     def from_attr(self, session, res_attr):
         vmm_domains = [] if any(
@@ -463,7 +463,7 @@ class ContractSubject(model_base.Base, model_base.HasAimId,
     filters = orm.relationship(ContractSubjectFilter,
                                backref='contract',
                                cascade='all, delete-orphan',
-                               lazy='joined')
+                               lazy='subquery')
 
     def from_attr(self, session, res_attr):
         ins = [f for f in self.filters if f.direction == 'in']
@@ -683,11 +683,11 @@ class L3OutInterface(model_base.Base, model_base.HasAimId,
     secondary_addr_a_list = orm.relationship(L3OutInterfaceSecondaryIpA,
                                              backref='interface_a',
                                              cascade='all, delete-orphan',
-                                             lazy='joined')
+                                             lazy='subquery')
     secondary_addr_b_list = orm.relationship(L3OutInterfaceSecondaryIpB,
                                              backref='interface_b',
                                              cascade='all, delete-orphan',
-                                             lazy='joined')
+                                             lazy='subquery')
 
     def from_attr(self, session, res_attr):
         primary_addr_a = res_attr.get('primary_addr_a', '')
@@ -826,7 +826,7 @@ class SecurityGroupRule(model_base.Base, model_base.HasAimId,
     remote_ips = orm.relationship(SecurityGroupRuleRemoteIp,
                                   backref='security_group_rule',
                                   cascade='all, delete-orphan',
-                                  lazy='joined')
+                                  lazy='subquery')
     direction = sa.Column(sa.String(16))
     ethertype = sa.Column(sa.String(16))
     ip_protocol = sa.Column(sa.String(16))
@@ -982,11 +982,11 @@ class VmmInjectedService(model_base.Base, model_base.HasAimId,
     ports = orm.relationship(VmmInjectedServicePort,
                              backref='service',
                              cascade='all, delete-orphan',
-                             lazy='joined')
+                             lazy='subquery')
     eps = orm.relationship(VmmInjectedServiceEndpoint,
                            backref='service',
                            cascade='all, delete-orphan',
-                           lazy='joined')
+                           lazy='subquery')
 
     def from_attr(self, session, res_attr):
         if 'service_ports' in res_attr:
@@ -45,15 +45,10 @@ class Fault(model_base.Base, model_base.AttributeMixin):
         Child classes should override this method to specify a custom
         mapping of model properties to resource attributes.
         """
-        result = {}
-        for k in dir(self):
-            if (not k.startswith('_') and
-                    k not in getattr(self, '_exclude_to', []) and
-                    not callable(getattr(self, k))):
-                if k == 'last_update_timestamp':
-                    result[k] = str(self.get_attr(session, k))
-                else:
-                    result[k] = self.get_attr(session, k)
+        result = super(Fault, self).to_attr(session)
+        if 'last_update_timestamp' in result:
+            result['last_update_timestamp'] = str(
+                result['last_update_timestamp'])
         return result
 
 
@@ -34,6 +34,8 @@ class AgentToHashTreeAssociation(model_base.Base):
         sa.String(64), sa.ForeignKey('aim_tenant_trees.tenant_rn',
                                      ondelete='CASCADE'),
         primary_key=True, name='tree_tenant_rn')
+    # The agent has loaded the ACI state of the tree
+    warm = sa.Column(sa.Boolean, default=False)
 
 
 class Tree(model_base.Base, model_base.AttributeMixin):
@@ -43,6 +45,8 @@ class Tree(model_base.Base, model_base.AttributeMixin):
 
     root_rn = sa.Column(sa.String(64), primary_key=True, name='tenant_rn')
     needs_reset = sa.Column(sa.Boolean, default=False)
+    # Cost of serving the root, published by one of the agents
+    cost = sa.Column(sa.Integer, nullable=True)
     agents = orm.relationship(AgentToHashTreeAssociation,
                               backref='hash_trees',
                               cascade='all, delete-orphan',
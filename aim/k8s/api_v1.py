@@ -36,6 +36,9 @@ from aim.common import utils
 K8S_DEFAULT_NAMESPACE = 'default'
 K8S_API_VERSION_CORE_V1 = 'v1'
 K8S_API_VERSION_EXTENSIONS_V1BETA1 = 'extensions/v1beta1'
+JSON_PATCH = 'application/json-patch+json'
+MERGE_PATCH = 'application/merge-patch+json'
+STRATEGIC_MERGE_PATCH = 'application/strategic-merge-patch+json'
 
 
 class K8sObject(dict):
@@ -539,8 +542,9 @@ class AciContainersV1(object):
         header_params = {
             'Accept': self.api_client.select_header_accept(
                 self.verb_accept_headers[verb]),
-            'Content-Type': self.api_client.select_header_content_type(
-                self.verb_content_type[verb])
+            'Content-Type': params.get(
+                'content_type') or self.api_client.select_header_content_type(
+                    self.verb_content_type[verb])
         }
 
         # Authentication setting
@@ -590,11 +594,14 @@ class AciContainersV1(object):
         return self._exec_rest_operation(k8s_klass, 'GET', namespace=namespace,
                                          name=name, **kwargs)
 
-    def patch(self, k8s_klass, name, namespace, body, **kwargs):
-        # Modify existing object
+    def patch(self, k8s_klass, name, namespace, body, content_type=None,
+              **kwargs):
+        # Modify existing object, content_type selects the patch format
+        # (JSON_PATCH by default)
         return self._exec_rest_operation(k8s_klass, 'PATCH',
                                          namespace=namespace,
-                                         body=body, name=name, **kwargs)
+                                         body=body, name=name,
+                                         content_type=content_type, **kwargs)
 
     def delete_collection(self, k8s_klass, namespace, **kwargs):
         # Delete objects given collection filters
@@ -0,0 +1,230 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+import re
+import threading
+import time
+
+from oslo_config import cfg
+
+
+EVENT_ADDED = 'added'
+EVENT_MODIFIED = 'modified'
+EVENT_DELETED = 'deleted'
+
+
+class CacheMiss(Exception):
+    pass
+
+
+class _TypeCache(object):
+
+    def __init__(self, k8s_klass):
+        self.k8s_klass = k8s_klass
+        self.synced_at = None
+        self.objects = {}
+        self.by_namespace = {}
+        self.by_name = {}
+        self.by_label = {}
+        self.by_aim_id = {}
+
+    def _aim_id(self, item):
+        obj = self.k8s_klass()
+        obj.update(item)
+        try:
+            return obj.aim_id
+        except (AttributeError, KeyError):
+            return None
+
+    def _index(self, key, item):
+        self.by_namespace.setdefault(key[0], set()).add(key)
+        self.by_name.setdefault(key[1], set()).add(key)
+        for label in item['metadata'].get('labels', {}).iteritems():
+            self.by_label.setdefault(label, set()).add(key)
+        aim_id = self._aim_id(item)
+        if aim_id is not None:
+            self.by_aim_id[aim_id] = key
+
+    def _unindex(self, key, item):
+        for index, value in ((self.by_namespace, key[0]),
+                             (self.by_name, key[1])):
+            index.get(value, set()).discard(key)
+            if not index.get(value, True):
+                del index[value]
+        for label in item['metadata'].get('labels', {}).iteritems():
+            self.by_label.get(label, set()).discard(key)
+            if not self.by_label.get(label, True):
+                del self.by_label[label]
+        self.by_aim_id.pop(self._aim_id(item), None)
+
+    def put(self, item):
+        key = _key(item)
+        curr = self.objects.get(key)
+        if curr is not None:
+            if _older(item, curr):
+                return
+            self._unindex(key, curr)
+        self.objects[key] = item
+        self._index(key, item)
+
+    def remove(self, item):
+        key = _key(item)
+        curr = self.objects.pop(key, None)
+        if curr is not None:
+            self._unindex(key, curr)
+
+    def find(self, namespace=None, name=None, labels=None, aim_id=None):
+        if aim_id is not None:
+            candidates = [set([self.by_aim_id.get(aim_id)])]
+        else:
+            candidates = []
+        if namespace is not None:
+            candidates.append(self.by_namespace.get(namespace, set()))
+        if name is not None:
+            candidates.append(self.by_name.get(name, set()))
+        for label in (labels or []):
+            candidates.append(self.by_label.get(label, set()))
+        if not candidates:
+            return self.objects.values()
+        keys = set.intersection(*sorted(candidates, key=len))
+        return [self.objects[k] for k in keys if k in self.objects]
+
+
+def _key(item):
+    metadata = item['metadata']
+    return metadata.get('namespace'), metadata['name']
+
+
+def _older(item, curr):
+    # Resource versions are opaque, but when they are integers (etcd) they
+    # tell us whether an event comes later than an object we already know
+    new = item['metadata'].get('resourceVersion')
+    old = curr['metadata'].get('resourceVersion')
+    try:
+        return int(new) < int(old)
+    except (TypeError, ValueError):
+        return False
+
+
+def parse_label_selector(selector):
+    """Parse equality based label selectors, eg: 'a=b,c=d'."""
+    result = []
+    for part in re.split('[,&]', selector or ''):
+        if not part:
+            continue
+        k, sep, v = part.partition('=')
+        if not sep or k.endswith('!'):
+            # Only equality based selectors are indexed
+            raise CacheMiss()
+        result.append((k.strip(), v.lstrip('=').strip()))
+    return result
+
+
+class K8sObjectCache(object):
+    """Informer-style local cache of Kubernetes objects.
+
+    Filled by the initial list and then the watch streams of the K8S
+    watcher, it serves the K8sStore reads without a round trip to the API
+    server. Every Kubernetes type is only served once it has been listed,
+    and for as long as its watch stream is known to be healthy within the
+    configured staleness bound; otherwise lookups raise CacheMiss and the
+    caller falls back to the API.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._types = {}
+
+    @property
+    def max_staleness(self):
+        return cfg.CONF.aim_k8s.k8s_cache_max_staleness
+
+    def _type_cache(self, k8s_klass):
+        try:
+            return self._types[k8s_klass]
+        except KeyError:
+            return self._types.setdefault(k8s_klass, _TypeCache(k8s_klass))
+
+    def replace(self, k8s_klass, items):
+        """Reset the objects of a type with the result of a list call."""
+        type_cache = _TypeCache(k8s_klass)
+        for item in items:
+            type_cache.put(copy.deepcopy(item))
+        type_cache.synced_at = time.time()
+        with self._lock:
+            self._types[k8s_klass] = type_cache
+
+    def update(self, k8s_klass, event_type, item):
+        """Apply a watch event, or the result of a local write."""
+        if not item or not item.get('metadata', {}).get('name'):
+            return
+        event_type = event_type.lower()
+        with self._lock:
+            type_cache = self._type_cache(k8s_klass)
+            if event_type in [EVENT_ADDED, EVENT_MODIFIED]:
+                type_cache.put(copy.deepcopy(item))
+            elif event_type == EVENT_DELETED:
+                type_cache.remove(item)
+
+    def touch(self, k8s_klasses):
+        """Confirm that the watch streams of these types are still alive."""
+        now = time.time()
+        with self._lock:
+            for k8s_klass in k8s_klasses:
+                type_cache = self._types.get(k8s_klass)
+                if type_cache and type_cache.synced_at is not None:
+                    type_cache.synced_at = now
+
+    def invalidate(self, k8s_klass=None):
+        with self._lock:
+            if k8s_klass:
+                self._types.pop(k8s_klass, None)
+            else:
+                self._types = {}
+
+    def _fresh_type_cache(self, k8s_klass):
+        type_cache = self._types.get(k8s_klass)
+        if (not self.max_staleness or type_cache is None or
+                type_cache.synced_at is None or
+                time.time() - type_cache.synced_at > self.max_staleness):
+            raise CacheMiss()
+        return type_cache
+
+    def get(self, k8s_klass, name, namespace=None):
+        """Return a copy of the object, None if it doesn't exist.
+
+        Raises CacheMiss when the type is not being served.
+        """
+        with self._lock:
+            type_cache = self._fresh_type_cache(k8s_klass)
+            key = (namespace if k8s_klass.namespaced else None, name)
+            return copy.deepcopy(type_cache.objects.get(key))
+
+    def list(self, k8s_klass, namespace=None, name=None, label_selector=None,
+             aim_id=None):
+        """Return copies of the objects matching the selectors.
+
+        Raises CacheMiss when the type is not being served.
+        """
+        labels = parse_label_selector(label_selector)
+        with self._lock:
+            type_cache = self._fresh_type_cache(k8s_klass)
+            return copy.deepcopy(type_cache.find(
+                namespace=namespace if k8s_klass.namespaced else None,
+                name=name, labels=labels, aim_id=aim_id))
+
+
+CACHE = K8sObjectCache()
@@ -55,7 +55,7 @@ class AIMController(object):
 
     def __init__(self, config):
         self.cfg = config
-        self.ctx = context.AimContext(store=api.get_store())
+        self.ctx = context.AimContext(store=api.get_store(read_only=True))
         self.mgr = aim_manager.AimManager()
         self.sneak_name_to_klass = {utils.camel_to_snake(x.__name__): x
                                     for x in self.mgr.aim_resources}
@@ -78,21 +78,24 @@ class AIMController(object):
         # Get status and faults only if explicitly requested
         klasses.discard(api_status.AciStatus)
         klasses.discard(api_status.AciFault)
-        all_resources = []
         data = []
+        batch_size = aim_cfg.CONF.aim.query_batch_size
         for klass in klasses:
-            all_resources.extend(self.mgr.find(
-                self.ctx, klass, include_aim_id=True, **filters))
-        for obj in all_resources:
-            if get_status:
-                status = self.mgr.get_status(self.ctx, obj,
-                                             create_if_absent=False)
-                if status:
-                    faults = status.faults
-                    del status.faults
-                    data.append(self._generate_data_item(status))
-                    data.extend([self._generate_data_item(f) for f in faults])
-            data.append(self._generate_data_item(obj))
+            for objs in utils.chunks(self.mgr.find_iter(
+                    self.ctx, klass, include_aim_id=True,
+                    batch_size=batch_size, **filters), batch_size):
+                statuses = (self.mgr.get_statuses(self.ctx, objs)
+                            if get_status else {})
+                for obj in objs:
+                    if get_status:
+                        status = statuses.get(self.mgr.status_key(obj))
+                        if status:
+                            faults = status.faults
+                            del status.faults
+                            data.append(self._generate_data_item(status))
+                            data.extend([self._generate_data_item(f)
+                                         for f in faults])
+                    data.append(self._generate_data_item(obj))
         return self._generate_response(data)
 
     def POST(self, path_, *args, **kwargs):
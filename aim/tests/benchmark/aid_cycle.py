@@ -0,0 +1,149 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""End-to-end AID reconciliation cycle on a synthetic deployment.
+
+The three universe pairs are in-memory hash trees, one tenant out of
+--changed-every differs between desired and current state. DB and APIC
+round trips are simulated with a --latency sleep: one per status update
+of a tenant, per resource lookup and per pushed object.
+"""
+
+import time
+
+import mock
+
+from aim.agent.aid import event_handler
+from aim.agent.aid import service
+from aim.agent.aid.universes.aci import aci_universe
+from aim.agent.aid.universes.aci import tenant as aci_tenant
+from aim.agent.aid.universes import base_universe
+from aim.common.hashtree import structured_tree
+from aim import config as aim_cfg
+from aim.tests.benchmark import base
+
+
+class SyntheticUniverse(base_universe.HashTreeStoredUniverse):
+
+    def __init__(self, name, latency):
+        self._name = name
+        self.latency = latency
+
+    @property
+    def name(self):
+        return self._name
+
+    def get_state_by_type(self, type):
+        return self.state
+
+    def get_relevant_state_for_read(self):
+        return [self.state]
+
+    def get_resources(self, resource_keys, desired_state=None):
+        time.sleep(self.latency)
+        return [{'key': x} for x in resource_keys]
+
+    def get_resources_for_delete(self, resource_keys):
+        return self.get_resources(resource_keys)
+
+    def push_resources(self, resources):
+        time.sleep(self.latency * sum(len(x) for x in resources.values()))
+
+    def update_status_objects(self, my_state, other_universe, other_state,
+                              raw_diff, transformed_diff, skip_roots=None):
+        time.sleep(self.latency * len(my_state))
+
+    def _action_items_to_aim_resources(self, actions, action):
+        return []
+
+
+def _trees(tenants, nodes, changed_every):
+    desired, current = {}, {}
+
+    def nodes_of(tenant, first=0):
+        return [{'key': ('fvTenant|t%s' % tenant, 'fvBD|bd%s' % j),
+                 'nameAlias': 'bd%s' % j} for j in range(first, nodes)]
+
+    for i in range(tenants):
+        root = 'tn-t%s' % i
+        desired[root] = structured_tree.StructuredHashTree().include(
+            nodes_of(i))
+        if i % changed_every:
+            current[root] = desired[root]
+        else:
+            current[root] = structured_tree.StructuredHashTree().include(
+                nodes_of(i, first=1))
+    return desired, current
+
+
+def _agent(ctx, args, workers):
+    base.CONF.set_override('agent_reconcile_workers', workers, 'aim')
+    base.CONF.set_override('agent_full_sweep_interval', 0, 'aim')
+    aim_cfg.ConfigManager(ctx, '').replace_all(base.CONF)
+    # No APIC, event listener nor heartbeat thread
+    patches = [
+        mock.patch.object(aci_universe.AciUniverse, 'establish_aci_session'),
+        mock.patch.object(aci_tenant, 'get_children_mos'),
+        mock.patch.object(aci_universe, 'get_websocket_context'),
+        mock.patch.object(event_handler.EventHandler, '_spawn_listener'),
+        mock.patch.object(service.AID, '_spawn_heartbeat_loop')]
+    for patch in patches:
+        patch.start()
+    try:
+        agent = service.AID(base.CONF)
+    finally:
+        for patch in patches:
+            patch.stop()
+    # Replace the AIM and ACI universes with synthetic ones
+    desired, current = _trees(args.rows, args.nodes, args.changed_every)
+    for name, pair in zip(('config', 'operational', 'monitored'),
+                          agent.multiverse):
+        for role, state in ((service.DESIRED, desired),
+                            (service.CURRENT, current)):
+            universe = SyntheticUniverse(
+                '%s_%s' % (name, role), args.latency / 1000.0).initialize(
+                    ctx.store, agent.conf_manager, agent.multiverse)
+            universe._state = dict(state)
+            pair[role] = universe
+    return agent
+
+
+def main():
+    parser = base.parser(__doc__, rows=2000)
+    parser.add_argument('--nodes', type=int, default=10,
+                        help='Hash tree nodes per tenant')
+    parser.add_argument('--changed-every', type=int, default=10,
+                        help='One tenant out of this many has differences')
+    parser.add_argument('--latency', type=float, default=1,
+                        help='Milliseconds per simulated round trip')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=[0, 2, 4, 8, 16],
+                        help='agent_reconcile_workers values to compare')
+    args = parser.parse_args()
+    mgr, ctx = base.setup(args)
+
+    for workers in args.workers:
+        agent = _agent(ctx, args, workers)
+
+        def cycle():
+            agent.scheduler.notify(service.PAIR_PRIORITIES)
+            agent._daemon_loop(ctx, False)
+
+        base.report('cycle, %s workers' % workers, args.rows,
+                    base.timeit(cycle, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
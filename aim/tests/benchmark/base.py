@@ -0,0 +1,92 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Common helpers for the AIM micro-benchmarks.
+
+Benchmarks are not collected by the unit test runner, they are executed
+explicitly, eg:
+
+    python -m aim.tests.benchmark.find --rows 100000
+"""
+
+import argparse
+import contextlib
+import time
+
+from oslo_config import cfg
+
+from aim import aim_manager
+from aim import context
+from aim.db import api
+from aim.db import model_base
+from aim.tests import base
+
+CONF = cfg.CONF
+
+
+def parser(description, rows=100000):
+    result = argparse.ArgumentParser(description=description)
+    result.add_argument('--rows', type=int, default=rows,
+                        help='Number of DB rows to benchmark against')
+    result.add_argument('--repeat', type=int, default=3,
+                        help='Number of runs, the best one is reported')
+    result.add_argument('--config-file', default=base.etcdir('aim.conf.test'),
+                        help='AIM configuration file, defaults to an '
+                             'in-memory sqlite DB')
+    return result
+
+
+def setup(args):
+    """Configure AIM and create the DB schema.
+
+    :return: (AimManager, AimContext)
+    """
+    CONF(args=['--config-file', args.config_file], project='aim')
+    CONF.set_override('aim_store', 'sql', 'aim')
+    model_base.Base.metadata.create_all(api.get_engine())
+    return (aim_manager.AimManager(),
+            context.AimContext(store=api.get_store(initialize_hooks=False)))
+
+
+def bulk_insert(model, rows):
+    """Insert raw rows bypassing the ORM and the AIM commit hooks."""
+    with api.get_engine().begin() as conn:
+        conn.execute(model.__table__.insert(), rows)
+
+
+def timeit(func, repeat=3):
+    """Return the best wall-clock time of func across runs."""
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+@contextlib.contextmanager
+def patched(obj, attr, value):
+    old = obj.__dict__[attr]
+    setattr(obj, attr, value)
+    try:
+        yield
+    finally:
+        setattr(obj, attr, old)
+
+
+def report(label, rows, elapsed):
+    print('%-40s %10d rows %8.3fs %12.0f rows/s' % (
+        label, rows, elapsed, rows / elapsed if elapsed else 0))
@@ -0,0 +1,67 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""AimManager.find(EndpointGroup) with realistic collection fan-out.
+
+Compares loading the EPG collections with one query per relationship
+against joining all of them in the parent query.
+"""
+
+from sqlalchemy import orm as sa_orm
+
+from aim import aim_store
+from aim.api import resource
+from aim.tests.benchmark import base
+
+
+def main():
+    parser = base.parser(__doc__, rows=200)
+    parser.add_argument('--static-paths', type=int, default=50)
+    parser.add_argument('--contracts', type=int, default=20)
+    parser.add_argument('--domains', type=int, default=5)
+    args = parser.parse_args()
+    mgr, ctx = base.setup(args)
+    with ctx.store.begin(subtransactions=True):
+        for i in range(args.rows):
+            contracts = ['c-%s' % j for j in range(args.contracts)]
+            mgr.create(ctx, resource.EndpointGroup(
+                tenant_name='t1', app_profile_name='ap', name='epg-%s' % i,
+                provided_contract_names=contracts[::2],
+                consumed_contract_names=contracts[1::2],
+                physical_domains=[{'name': 'ph-%s' % j}
+                                  for j in range(args.domains)],
+                static_paths=[{'path': 'topology/pod-1/paths-%s' % j,
+                               'encap': 'vlan-%s' % j}
+                              for j in range(args.static_paths)]))
+
+    def find():
+        ctx.store.db_session.expunge_all()
+        assert len(mgr.find(ctx, resource.EndpointGroup)) == args.rows
+
+    base.report('find EPG (batched collections)', args.rows,
+                base.timeit(find, args.repeat))
+
+    query = aim_store.SqlAlchemyStore._query
+
+    def joined_query(self, *args, **kwargs):
+        return query(self, *args, **kwargs).options(sa_orm.joinedload('*'))
+
+    with base.patched(aim_store.SqlAlchemyStore, '_query', joined_query):
+        base.report('find EPG (joined collections)', args.rows,
+                    base.timeit(find, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
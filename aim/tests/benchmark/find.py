@@ -0,0 +1,55 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Rows-per-second of AimManager.find on a large table.
+
+Compares the precomputed model attribute maps against the previous
+per-object introspection of the models.
+"""
+
+from aim.api import resource
+from aim.db import model_base
+from aim.db import models
+from aim.tests.benchmark import base
+
+
+def _introspective_to_attr(self, session):
+    return {k: self.get_attr(session, k) for k in dir(self)
+            if (not k.startswith('_') and
+                k not in getattr(self, '_exclude_to', []) and
+                not callable(getattr(self, k)))}
+
+
+def main():
+    args = base.parser(__doc__).parse_args()
+    mgr, ctx = base.setup(args)
+    base.bulk_insert(models.Tenant, [
+        {'name': 'tenant-%s' % i, 'display_name': '', 'descr': '',
+         'monitored': False} for i in range(args.rows)])
+
+    def find():
+        ctx.store.db_session.expunge_all()
+        assert len(mgr.find(ctx, resource.Tenant)) == args.rows
+
+    base.report('find (attribute maps)', args.rows,
+                base.timeit(find, args.repeat))
+    with base.patched(model_base.AttributeMixin, 'to_attr',
+                      _introspective_to_attr):
+        base.report('find (introspection)', args.rows,
+                    base.timeit(find, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tenant assignment of an AID serve cycle.
+
+Compares building a new ConsistentHashRing and assigning tenants one by
+one, as AID used to do on every serve cycle, against a long lived ring
+following the agents membership with bulk key assignment. --rows is the
+number of tenants.
+"""
+
+from aim.common import hashring
+from aim.tests.benchmark import base
+
+
+def main():
+    parser = base.parser(__doc__, rows=20000)
+    parser.add_argument('--agents', type=int, default=20,
+                        help='Number of agents in the ring')
+    args = parser.parse_args()
+    tenants = ['tn-t%s' % i for i in range(args.rows)]
+    agents = dict(('aid-h%s' % i, None) for i in range(args.agents))
+
+    def rebuild():
+        ring = hashring.ConsistentHashRing(agents)
+        for tenant in tenants:
+            ring.assign_key(tenant)
+    base.report('new ring, assign_key', args.rows,
+                base.timeit(rebuild, args.repeat))
+
+    ring = hashring.ConsistentHashRing(agents)
+    base.report('long lived ring, assign_keys', args.rows,
+                base.timeit(lambda: ring.assign_keys(tenants), args.repeat))
+
+    def churn():
+        # One agent leaves and comes back
+        members = dict(agents)
+        members.pop('aid-h0')
+        ring.set_nodes(members)
+        ring.set_nodes(agents)
+    base.report('membership change, %s agents' % args.agents, 2,
+                base.timeit(churn, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
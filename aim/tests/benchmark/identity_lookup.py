@@ -0,0 +1,95 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""AimManager.get and count latency, and SQL compilation time.
+
+Compares the cached (baked) identity and count queries against building
+and compiling a new query for every lookup.
+"""
+
+import time
+
+from aim import aim_store
+from aim.api import resource
+from aim.db import api
+from aim.db import models
+from aim.tests.benchmark import base
+
+
+class CompileTimer(object):
+    """Accumulate the time spent compiling SQL statements."""
+
+    def __init__(self, dialect):
+        self.dialect = dialect
+        self.compiler = dialect.statement_compiler
+        self.elapsed = 0
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        start = time.time()
+        try:
+            return self.compiler(*args, **kwargs)
+        finally:
+            self.elapsed += time.time() - start
+            self.count += 1
+
+    def __enter__(self):
+        self.dialect.statement_compiler = self
+        return self
+
+    def __exit__(self, *args):
+        del self.dialect.statement_compiler
+
+
+def _unbaked_query(self, db_obj_type, lock_update=False, count=False,
+                   **filters):
+    query = self._query(db_obj_type, None, lock_update=lock_update,
+                        replica_ok=True, **filters)
+    return query.from_self(aim_store.func.count()) if count else query
+
+
+def main():
+    args = base.parser(__doc__, rows=10000).parse_args()
+    mgr, ctx = base.setup(args)
+    base.bulk_insert(models.EndpointGroup, [
+        {'tenant_name': 't1', 'app_profile_name': 'ap',
+         'name': 'epg-%s' % i, 'display_name': '', 'monitored': False}
+        for i in range(args.rows)])
+    epgs = [resource.EndpointGroup(tenant_name='t1', app_profile_name='ap',
+                                   name='epg-%s' % i)
+            for i in range(args.rows)]
+
+    def lookups():
+        ctx.store.db_session.expunge_all()
+        for epg in epgs:
+            mgr.get(ctx, epg)
+            mgr.count(ctx, resource.EndpointGroup, name=epg.name)
+
+    def run(label):
+        with CompileTimer(api.get_engine().dialect) as timer:
+            elapsed = base.timeit(lookups, args.repeat)
+        base.report('get + count (%s queries)' % label, args.rows, elapsed)
+        # Connection pool pings are compiled as well
+        print('    %d statements compiled in %.3fs' % (
+            timer.count / args.repeat, timer.elapsed / args.repeat))
+
+    run('cached')
+    with base.patched(aim_store.SqlAlchemyStore, '_baked_query',
+                      _unbaked_query):
+        run('uncached')
+
+
+if __name__ == '__main__':
+    main()
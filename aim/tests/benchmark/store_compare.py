@@ -0,0 +1,67 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""AimManager create, get and find on the SQL and the in-memory stores.
+
+The in-memory KeyValueStore gives the store independent cost of the AIM
+manager operations, the difference is the price of the DB round trips.
+"""
+
+import time
+
+from aim import aim_store
+from aim.api import resource
+from aim import context
+from aim.tests.benchmark import base
+
+
+def _epgs(rows, tenants=10):
+    return [resource.EndpointGroup(
+        tenant_name='t%s' % (i % tenants), app_profile_name='ap',
+        name='epg-%s' % i, bd_name='bd') for i in range(rows)]
+
+
+def _run(label, mgr, ctx, epgs, repeat):
+    start = time.time()
+    with ctx.store.begin(subtransactions=True):
+        for epg in epgs:
+            mgr.create(ctx, epg)
+    base.report('%s create' % label, len(epgs), time.time() - start)
+
+    def get():
+        for epg in epgs:
+            mgr.get(ctx, epg)
+    base.report('%s get' % label, len(epgs), base.timeit(get, repeat))
+
+    def find():
+        for tenant in set(x.tenant_name for x in epgs):
+            mgr.find(ctx, resource.EndpointGroup, tenant_name=tenant,
+                     bd_name='bd')
+    base.report('%s find by tenant' % label, len(epgs),
+                base.timeit(find, repeat))
+
+
+def main():
+    args = base.parser(__doc__, rows=10000).parse_args()
+    mgr, ctx = base.setup(args)
+    epgs = _epgs(args.rows)
+    _run('sql', mgr, ctx, epgs, args.repeat)
+    kv_ctx = context.AimContext(store=aim_store.KeyValueStore(
+        data=aim_store.KeyValueData(), initialize_hooks=False))
+    _run('kv', mgr, kv_ctx, epgs, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
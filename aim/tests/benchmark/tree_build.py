@@ -0,0 +1,82 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""HashTreeBuilder.build over a large set of AIM resources.
+
+Trees are built from scratch on every run, the resources are reused across
+runs so that the DN/root memoization is measured both cold (first run) and
+warm.
+"""
+
+import time
+
+from aim.api import resource
+from aim.common.hashtree import structured_tree as htree
+from aim.common import utils
+from aim.tests.benchmark import base
+from aim import tree_manager
+
+
+def _resources(rows, tenants=50):
+    result = []
+    per_tenant = max(rows / tenants, 3)
+    for t in range(tenants):
+        tn = 'tn-%s' % t
+        result.append(resource.Tenant(name=tn))
+        result.append(resource.ApplicationProfile(tenant_name=tn, name='ap'))
+        for i in range(per_tenant / 3):
+            result.append(resource.BridgeDomain(tenant_name=tn,
+                                                name='bd-%s' % i))
+            result.append(resource.Subnet(tenant_name=tn, bd_name='bd-%s' % i,
+                                          gw_ip_mask='10.0.0.1/28'))
+            result.append(resource.EndpointGroup(
+                tenant_name=tn, app_profile_name='ap', name='epg-%s' % i,
+                bd_name='bd-%s' % i))
+    return result[:rows]
+
+
+def main():
+    args = base.parser(__doc__, rows=50000).parse_args()
+    mgr, _ = base.setup(args)
+    builder = tree_manager.HashTreeBuilder(mgr)
+    resources = _resources(args.rows)
+    roots = set(x.root for x in resources)
+
+    def build():
+        tree_map = {}
+        for kind in (builder.CONFIG, builder.OPER, builder.MONITOR):
+            tree_map[kind] = dict((r, htree.StructuredHashTree())
+                                  for r in roots)
+        builder.build(resources, [], [], tree_map)
+
+    def run(label):
+        start = time.time()
+        build()
+        base.report(label + ' (cold)', len(resources), time.time() - start)
+        base.report(label, len(resources), base.timeit(build, args.repeat))
+
+    caches = (utils.DN_CACHE, resource.AciResourceBase._dn_cache)
+    sizes = [x.size for x in caches]
+    for cache in caches:
+        cache.clear()
+        cache.size = 0
+    run('build (no DN cache)')
+    for cache, size in zip(caches, sizes):
+        cache.size = size
+    run('build')
+
+
+if __name__ == '__main__':
+    main()
@@ -25,6 +25,7 @@ from aim.api import status as aim_status
 from aim.common.hashtree import structured_tree as tree
 from aim import config as aim_cfg
 from aim.db import agent_model  # noqa
+from aim.db import hashtree_db_listener
 from aim.tests import base
 from aim import tree_manager
 
@@ -549,6 +550,65 @@ class TestAimDbUniverse(TestAimDbUniverseBase, base.TestAimDBBase):
         self.assertEqual(ctrl.dn, purge[0][1].dn)
         self.universe.retry_cooldown = old_cooldown
 
+    def test_dirty_tenants(self):
+        mgr = aim_manager.AimManager()
+        self.universe.serve(['tn-t1', 'tn-t2'])
+        self.assertEqual(set(), self.universe.pop_dirty_tenants())
+        # Action logs are caught up at commit time in the tests
+        mgr.create(self.ctx, resource.Tenant(name='t1'))
+        with mock.patch.object(
+                hashtree_db_listener.HashTreeDbListener,
+                'catch_up_with_action_log',
+                return_value=set(['tn-t1'])) as catch_up:
+            # Roots of the caught up action logs are dirty once
+            self.assertEqual(set(['tn-t1']),
+                             self.universe.pop_dirty_tenants())
+            catch_up.assert_called_once_with(
+                self.universe.context.store, set(['tn-t1', 'tn-t2']))
+        self.assertEqual(set(), self.universe.pop_dirty_tenants())
+        # Observing other tenants doesn't load t1
+        with mock.patch.object(
+                hashtree_db_listener.HashTreeDbListener,
+                'catch_up_with_action_log') as catch_up:
+            # The roots caught up by pop_dirty_tenants are reused
+            self.universe.observe(tenants=['tn-t2'])
+            self.assertFalse(catch_up.called)
+        self.assertIsNone(self.universe.state['tn-t1'])
+        self.universe.observe(tenants=['tn-t1'])
+        self.assertIsNotNone(self.universe.state['tn-t1'])
+
+        # Tenants with outstanding failures stay dirty until they converge
+        bd = resource.BridgeDomain(tenant_name='t2', name='bd')
+        self.universe.creation_failed(bd)
+        self.assertEqual(set(['tn-t2']), self.universe.pop_dirty_tenants())
+        self.assertEqual(set(['tn-t2']), self.universe.pop_dirty_tenants())
+        self.universe.creation_succeeded(bd)
+        self.assertEqual(set(), self.universe.pop_dirty_tenants())
+        # And so do tenants with repeated actions
+        self.universe._track_universe_actions({'create': [], 'delete': [bd]})
+        self.assertEqual(set(['tn-t2']), self.universe.pop_dirty_tenants())
+        self.universe._track_universe_actions({'create': [], 'delete': []})
+        self.assertEqual(set(), self.universe.pop_dirty_tenants())
+
+    def test_reconcile_tenants(self):
+        other = mock.Mock(state={
+            'tn-t1': tree.StructuredHashTree().include(
+                [{'key': ('fvTenant|t1', 'fvBD|bd')}]),
+            'tn-t2': tree.StructuredHashTree().include(
+                [{'key': ('fvTenant|t2', 'fvBD|bd')}])})
+        other.get_resources.return_value = []
+        self.universe._state = {'tn-t1': tree.StructuredHashTree(),
+                                'tn-t2': tree.StructuredHashTree()}
+        self.universe.get_resources_for_delete = mock.Mock(return_value=[])
+        with mock.patch.object(self.universe, 'update_status_objects') as upd:
+            self.assertTrue(self.universe.reconcile(other, {},
+                                                    tenants=['tn-t1']))
+        other.get_resources.assert_called_once_with(
+            [('fvTenant|t1', 'fvBD|bd')])
+        # Only the reconciled tenant's status objects are updated
+        self.assertEqual(['tn-t1'], upd.call_args[0][0].keys())
+        self.assertEqual(['tn-t1'], upd.call_args[0][2].keys())
+
 
 class TestAimDbOperationalUniverse(TestAimDbUniverseBase, base.TestAimDBBase):
 
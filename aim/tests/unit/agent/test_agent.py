@@ -21,7 +21,9 @@ from apicapi import apic_client
 from apicapi import exceptions as aexc
 import mock
 
+from aim.agent.aid import event_handler
 from aim.agent.aid import service
+from aim.agent.aid.universes import base_universe
 from aim.agent.aid.universes.aci import aci_universe
 from aim import aim_manager
 from aim import aim_store
@@ -29,6 +31,7 @@ from aim.api import resource
 from aim.api import service_graph
 from aim.api import status as aim_status
 from aim.api import tree as aim_tree
+from aim.common import hashring
 from aim.common.hashtree import structured_tree as tree
 from aim.common import utils
 from aim import config
@@ -162,9 +165,9 @@ class TestAgent(base.TestAimDBBase, test_aci_tenant.TestAciClientMixin):
         for child in children:
             self._tree_to_event(child, result, dn, manager)
 
-    def _create_agent(self, host='h1'):
+    def _create_agent(self, host='h1', worker=None):
         self.set_override('aim_service_identifier', host, 'aim')
-        aid = service.AID(config.CONF)
+        aid = service.AID(config.CONF, worker=worker)
         session = aci_universe.AciUniverse.establish_aci_session(
             self.cfg_manager)
         for pair in aid.multiverse:
@@ -182,6 +185,229 @@ class TestAgent(base.TestAimDBBase, test_aci_tenant.TestAciClientMixin):
         self.assertEqual(1, len(agents))
         self.assertEqual('aid-h1', agents[0].id)
 
+    def test_worker_agents(self):
+        workers = [self._create_agent(worker=x) for x in range(2)]
+        # Workers share the host configuration and are separate agents
+        self.assertEqual(['h1', 'h1'], [x.host for x in workers])
+        self.assertEqual(
+            ['aid-h1-0', 'aid-h1-1'],
+            sorted(x.id for x in self.aim_manager.find(self.ctx,
+                                                       resource.Agent)))
+        for i in range(10):
+            self.tree_manager.update_bulk(self.ctx, [
+                tree.StructuredHashTree().include(
+                    [{'key': ('tn-%s' % i, 'keyB')}])])
+        if not workers[0].single_aid:
+            # Tenants are spread across the workers
+            result = [set(x._calculate_tenants(self.ctx)) for x in workers]
+            self.assertEqual(set('tn-%s' % i for i in range(10)),
+                             result[0] | result[1])
+            self.assertNotEqual(set(), result[0])
+            self.assertNotEqual(set(), result[1])
+
+    def test_tenant_assignment_cache(self):
+        agent = self._create_agent()
+        self.tree_manager.update_bulk(self.ctx, [
+            tree.StructuredHashTree().include([{'key': ('keyA', 'keyB')}])])
+        with mock.patch.object(agent._ring, 'assign_keys',
+                               wraps=agent._ring.assign_keys) as assign:
+            self.assertEqual(['keyA'], agent._calculate_tenants(self.ctx))
+            self.assertEqual(['keyA'], agent._calculate_tenants(self.ctx))
+            self.assertEqual(1, assign.call_count)
+            # New tenants and agents invalidate the assignment
+            self.tree_manager.update_bulk(self.ctx, [
+                tree.StructuredHashTree().include(
+                    [{'key': ('keyA1', 'keyB')}])])
+            agent._calculate_tenants(self.ctx)
+            self.assertEqual(2, assign.call_count)
+            if not agent.single_aid:
+                self._create_agent(host='h2')
+                agent._calculate_tenants(self.ctx)
+                self.assertEqual(3, assign.call_count)
+                self.assertEqual(set(['aid-h1', 'aid-h2']),
+                                 set(agent._ring._nodes))
+
+    def test_load_aware_placement(self):
+        self.set_override('agent_load_factor', 1.25, 'aim')
+        self.set_override('agent_capacity', 3, 'aim')
+        self.tree_manager.update_bulk(self.ctx, [
+            tree.StructuredHashTree().include(
+                [{'key': ('tn-t%s' % i, 'key%s' % x)}
+                 for x in range(1 + (i == 0) * 2000)]) for i in range(10)])
+        agents = [self._create_agent(host=x) for x in ('h1', 'h2', 'h3')]
+        self.assertEqual([3, 3, 3], [
+            x.capacity for x in self.aim_manager.find(self.ctx,
+                                                      resource.Agent)])
+        if agents[0].single_aid:
+            return
+        served = [x._calculate_tenants(self.ctx) for x in agents]
+        costs = self.tree_manager.get_root_costs(
+            self.ctx, ['tn-t%s' % i for i in range(10)])
+        self.assertTrue(costs['tn-t0'] > 1)
+        expected = hashring.ConsistentHashRing(
+            {'aid-h1': 3, 'aid-h2': 3, 'aid-h3': 3}).assign_keys_bounded(
+                costs, 1.25)
+        for agent, tenants in zip(agents, served):
+            self.assertEqual(
+                set(x for x, nodes in expected.iteritems()
+                    if agent.agent_id in nodes), set(tenants))
+
+    def test_load_aware_placement_agreement(self):
+        self.set_override('agent_load_factor', 1.25, 'aim')
+        self.set_override('agent_cost_refresh_interval', 0, 'aim')
+        self.tree_manager.update_bulk(self.ctx, [
+            tree.StructuredHashTree().include(
+                [{'key': ('tn-t%s' % i, 'keyB')}]) for i in range(10)])
+        agents = [self._create_agent(host=x) for x in ('h1', 'h2')]
+        if agents[0].single_aid:
+            return
+        unit = tree_manager.ROOT_COST_UNIT
+        served = []
+        for i, agent in enumerate(agents):
+            # The agents read the tree sizes while they grow, on either side
+            # of a cost bucket boundary
+            sizes = dict(('tn-t%s' % x, (6 + i) * unit if x % 2 else 0)
+                         for x in range(10))
+            with mock.patch.object(tree_manager.TreeManager,
+                                   'get_tree_sizes', return_value=sizes):
+                seen = self.tree_manager.get_root_costs(self.ctx,
+                                                        sizes.keys())
+                self.assertEqual(4 * (1 + i), seen['tn-t1'])
+                served.append(set(agent._calculate_tenants(self.ctx)))
+        # Both agents placed the tenants with the costs published by aid-h1
+        costs = self.tree_manager.get_published_costs(
+            self.ctx, ['tn-t%s' % x for x in range(10)])
+        self.assertEqual(4, costs['tn-t1'])
+        self.assertEqual(1, costs['tn-t2'])
+        expected = hashring.ConsistentHashRing(
+            {'aid-h1': 1, 'aid-h2': 1}).assign_keys_bounded(costs, 1.25)
+        for agent, tenants in zip(agents, served):
+            self.assertEqual(
+                set(x for x, nodes in expected.iteritems()
+                    if agent.agent_id in nodes), tenants)
+        self.assertEqual(set(costs), served[0] | served[1])
+
+    def test_leader_per_tenant(self):
+        self.set_override('agent_leader_per_tenant', True, 'aim')
+        self.set_override('agent_operational_reconcile_interval', 0, 'aim')
+        self.set_override('agent_monitored_reconcile_interval', 0, 'aim')
+        for i in range(10):
+            self.tree_manager.update_bulk(self.ctx, [
+                tree.StructuredHashTree().include(
+                    [{'key': ('tn-t%s' % i, 'keyB')}])])
+        agents = [self._create_agent(host=x) for x in ('h1', 'h2')]
+        if agents[0].single_aid:
+            return
+        served = [set(x._calculate_tenants(self.ctx)) for x in agents]
+        # Every tenant has a single leader, the other replica is standby
+        self.assertEqual(served[0], served[1])
+        self.assertEqual(set(), set(agents[0].standby_tenants) &
+                         set(agents[1].standby_tenants))
+        self.assertEqual(served[0], set(agents[0].standby_tenants) |
+                         set(agents[1].standby_tenants))
+        self.assertEqual(set(['aid-h2']),
+                         set(agents[0].standby_tenants.values()))
+
+        agent = agents[0]
+        reconciled = []
+        for pair in agent.multiverse:
+            pair[service.CURRENT].reconcile = mock.Mock(
+                side_effect=lambda *args, **kwargs: reconciled.append(
+                    kwargs['tenants']) or False)
+        agent._daemon_loop(self.ctx)
+        # Standbys are served and observed, but not reconciled
+        leader = served[0] - set(agent.standby_tenants)
+        self.assertEqual([leader] * 3, reconciled)
+        self.assertEqual(served[0],
+                         set(agent.multiverse[0][service.DESIRED].state))
+        del reconciled[:]
+        for pair in agent.multiverse:
+            pair[service.DESIRED].mark_dirty(served[0])
+        agent.scheduler.notify(service.PAIR_PRIORITIES)
+        agent._daemon_loop(self.ctx, False)
+        self.assertEqual([leader] * 3, reconciled)
+
+        # The standby takes over as soon as the leader is down
+        self.assertFalse(agent._leaders_down(self.ctx))
+        agent._last_leader_check = 0
+        with mock.patch('aim.api.resource.Agent.is_down',
+                        side_effect=lambda ctx: True):
+            self.assertTrue(agent._leaders_down(self.ctx))
+            agent._calculate_tenants(self.ctx)
+        self.assertEqual({}, agent.standby_tenants)
+
+    def test_leader_per_tenant_catch_up(self):
+        self.set_override('agent_leader_per_tenant', True, 'aim')
+        self.tree_manager.update_bulk(self.ctx, [
+            tree.StructuredHashTree().include(
+                [{'key': ('tn-t%s' % i, 'keyB')}]) for i in range(10)])
+        agents = [self._create_agent(host=x) for x in ('h1', 'h2')]
+        if agents[0].single_aid:
+            return
+        for agent in agents:
+            agent._calculate_tenants(self.ctx)
+        standby = [set(x.standby_tenants) for x in agents]
+        self.assertTrue(standby[0] and standby[1])
+        for agent, mine, other in ((agents[0], standby[0], standby[1]),
+                                   (agents[1], standby[1], standby[0])):
+            with mock.patch.object(
+                    hashtree_db_listener.HashTreeDbListener,
+                    'catch_up_with_action_log',
+                    return_value=set()) as catch_up:
+                agent._daemon_loop(self.ctx)
+            # Action logs are only consumed by the tenant's leader, for it
+            # to find its roots dirty
+            self.assertTrue(catch_up.called)
+            for call in catch_up.call_args_list:
+                self.assertEqual(set(), set(call[0][1]) & mine)
+                self.assertEqual(other, set(call[0][1]) & other)
+
+    def test_warm_handoff(self):
+        self.set_override('agent_handoff_window', 600, 'aim')
+        tenants = set('tn-t%s' % i for i in range(10))
+        self.tree_manager.update_bulk(self.ctx, [
+            tree.StructuredHashTree().include([{'key': (x, 'keyB')}])
+            for x in tenants])
+        agent = self._create_agent()
+        self.assertEqual(tenants, set(agent._calculate_tenants(self.ctx)))
+        if agent.single_aid:
+            return
+        others = [self._create_agent(host=x) for x in ('h2', 'h3')]
+        for other in others:
+            other._warm_tenants = mock.Mock(return_value=set())
+        # Moved tenants are served until their new owners are warm
+        self.assertEqual(tenants, set(agent._calculate_tenants(self.ctx)))
+        moved = set(agent.handoff_tenants)
+        self.assertNotEqual(set(), moved)
+        for tenant in moved:
+            self.assertFalse('aid-h1' in agent._allocations[1][tenant])
+        for other in others:
+            other._calculate_tenants(self.ctx)
+        agent._last_handoff_check = 0
+        self.assertFalse(agent._handoffs_done(self.ctx))
+        self.assertEqual(tenants, set(agent._calculate_tenants(self.ctx)))
+        self.assertEqual(moved, set(agent.handoff_tenants))
+        # The hand-off window is bounded
+        agent._last_handoff_check = 0
+        with mock.patch('aim.agent.aid.service.time.time',
+                        return_value=time.time() + 600):
+            self.assertTrue(agent._handoffs_done(self.ctx))
+
+        # New owners report warm tenants with their heartbeat
+        for other in others:
+            other._warm_tenants = mock.Mock(return_value=tenants)
+            other._send_heartbeat(self.ctx)
+            self.assertEqual(
+                set(other.agent.hash_trees),
+                set(self.aim_manager.get(self.ctx,
+                                         other.agent).warm_trees))
+        agent._last_handoff_check = 0
+        self.assertTrue(agent._handoffs_done(self.ctx))
+        self.assertEqual(tenants - moved,
+                         set(agent._calculate_tenants(self.ctx)))
+        self.assertEqual({}, agent.handoff_tenants)
+        self.assertEqual(tenants - moved, set(agent.agent.hash_trees))
+
     @base.requires(['timestamp'])
     def test_send_heartbeat(self):
         agent = self._create_agent()
@@ -489,6 +715,78 @@ class TestAgent(base.TestAimDBBase, test_aci_tenant.TestAciClientMixin):
         agent.conf_manager.subs_mgr._poll_and_execute()
         self.assertEqual(130, agent.report_interval)
 
+    def test_parallel_reconcile(self):
+        self.set_override('agent_reconcile_workers', 2, 'aim')
+        agent = self._create_agent()
+        self.assertEqual(2, agent.reconcile_workers)
+        currents = [pair[service.CURRENT] for pair in agent.multiverse]
+        calls = []
+
+        def fake_reconcile(universe):
+            def reconcile(other_universe, delete_candidates, tenants=None):
+                calls.append((universe, tenants, universe.context))
+                for tenant in tenants:
+                    if tenant == 'tn-b':
+                        delete_candidates.get(tenant, set()).discard(universe)
+                    else:
+                        delete_candidates.setdefault(tenant, set()).add(
+                            universe)
+                return 'tn-a' in tenants
+            return reconcile
+
+        for universe in currents:
+            universe.reconcile = fake_reconcile(universe)
+        agent.delete_candidates = {'tn-b': set(currents)}
+        self.assertTrue(agent._parallel_reconcile(
+            [(pair, set(['tn-a', 'tn-b', 'tn-c']), set())
+             for pair in agent.multiverse]))
+        # 3 pairs, 2 partitions each
+        self.assertEqual(
+            sorted([(x, ['tn-a', 'tn-c']) for x in currents] +
+                   [(x, ['tn-b']) for x in currents]),
+            sorted((x[0], x[1]) for x in calls))
+        # Workers don't use the universe's DB session
+        for universe, _, aim_ctx in calls:
+            self.assertIsNot(universe._context, aim_ctx)
+            self.assertIs(universe._context, universe.context)
+        # Votes are merged back
+        self.assertEqual({'tn-a': set(currents), 'tn-b': set(),
+                          'tn-c': set(currents)}, agent.delete_candidates)
+
+    def test_reconcile_cadence(self):
+        self.set_override('agent_operational_reconcile_interval', 60, 'aim')
+        self.set_override('agent_monitored_reconcile_interval', 0, 'aim')
+        agent = self._create_agent()
+        agent._daemon_loop(self.ctx)
+        reconciled = []
+        for pair in agent.multiverse:
+            pair[service.CURRENT].reconcile = mock.Mock(
+                side_effect=lambda *args, **kwargs: reconciled.append(
+                    args[0]) or False)
+            pair[service.DESIRED].mark_dirty(['tn-a'])
+        oper, monitor = (agent.multiverse[base_universe.OPER_UNIVERSE],
+                         agent.multiverse[base_universe.MONITOR_UNIVERSE])
+        # Events only concern their own universe pair
+        agent.scheduler.notify(service.EVENT_PAIRS[
+            event_handler.EVENT_RECONCILE_MONITORED])
+        agent._daemon_loop(self.ctx, False)
+        self.assertEqual([monitor[service.DESIRED]], reconciled)
+        # The operational pair was reconciled when serving, it's not due yet
+        del reconciled[:]
+        monitor[service.DESIRED].mark_dirty(['tn-a'])
+        agent.scheduler.notify(service.EVENT_PAIRS[
+            event_handler.EVENT_RECONCILE])
+        agent._daemon_loop(self.ctx, False)
+        # By priority
+        self.assertEqual([agent.multiverse[0][service.DESIRED],
+                          monitor[service.DESIRED]], reconciled)
+        self.assertEqual(set([base_universe.OPER_UNIVERSE]),
+                         agent.scheduler._pending)
+        del reconciled[:]
+        agent.scheduler.set_cadence(base_universe.OPER_UNIVERSE, 0)
+        agent._daemon_loop(self.ctx, False)
+        self.assertEqual([oper[service.DESIRED]], reconciled)
+
     def test_monitored_tree_lifecycle(self):
         agent = self._create_agent()
 
@@ -0,0 +1,59 @@
+# Copyright (c) 2016 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from aim.agent.aid import scheduler
+from aim.tests import base
+
+
+class TestReconcileScheduler(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestReconcileScheduler, self).setUp()
+        self.scheduler = scheduler.ReconcileScheduler(
+            ['config', 'monitored', 'operational'],
+            cadences={'monitored': 5, 'operational': 10})
+
+    def test_due(self):
+        self.assertEqual([], self.scheduler.due(now=100))
+        self.assertIsNone(self.scheduler.time_to_next_due(now=100))
+        self.scheduler.notify(['operational', 'config', 'monitored'])
+        # Never reconciled pairs are due, by priority
+        self.assertEqual(['config', 'monitored', 'operational'],
+                         self.scheduler.due(now=100))
+        self.assertEqual(0, self.scheduler.time_to_next_due(now=100))
+        self.scheduler.reconciled(['config', 'monitored', 'operational'],
+                                  now=100)
+        self.assertEqual(set(), self.scheduler._pending)
+
+        # Notifications are held until the cadence elapses
+        self.scheduler.notify(['monitored', 'operational'])
+        self.assertEqual([], self.scheduler.due(now=102))
+        self.assertEqual(3, self.scheduler.time_to_next_due(now=102))
+        self.assertEqual(['monitored'], self.scheduler.pop_due(now=106))
+        self.assertEqual(4, self.scheduler.time_to_next_due(now=106))
+        self.assertEqual([], self.scheduler.pop_due(now=108))
+        self.assertEqual(['operational'], self.scheduler.pop_due(now=110))
+        self.assertIsNone(self.scheduler.time_to_next_due(now=110))
+
+        # Pairs without cadence are due as soon as notified
+        self.scheduler.notify(['config'])
+        self.assertEqual(['config'], self.scheduler.pop_due(now=110))
+
+    def test_set_cadence(self):
+        self.scheduler.reconciled(['operational'], now=100)
+        self.scheduler.notify(['operational'])
+        self.assertEqual([], self.scheduler.due(now=101))
+        self.scheduler.set_cadence('operational', 0)
+        self.assertEqual(['operational'], self.scheduler.due(now=101))
@@ -0,0 +1,61 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from aim.agent.aid import squash
+from aim.tests import base
+
+
+class TestSquashPolicy(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestSquashPolicy, self).setUp()
+        self.policy = squash.SquashPolicy(0.1, 2)
+
+    def test_isolated_events(self):
+        self.assertEqual(0.1, self.policy.squash_time(now=100))
+        self.policy.event(now=100)
+        self.assertEqual(0.1, self.policy.squash_time(now=100))
+        self.policy.event(now=110)
+        self.assertFalse(self.policy.bursting(now=110))
+        self.assertEqual(0.1, self.policy.squash_time(now=110))
+        self.assertEqual(0.1, self.policy.window)
+        # No need to wait between cycles
+        self.assertEqual(0, self.policy.polling_interval(5, now=110))
+
+    def test_bursts(self):
+        for i in range(10):
+            self.policy.event(now=100 + i * 0.4)
+        self.assertTrue(self.policy.bursting(now=104))
+        self.assertAlmostEqual(0.8, self.policy.squash_time(now=104))
+        self.assertEqual(5, self.policy.polling_interval(5, now=104))
+        # Expensive cycles make waiting more worthwhile, up to the maximum
+        self.policy.cycle(3)
+        self.assertEqual(1.5, self.policy.squash_time(now=104))
+        self.policy.cycle(30)
+        self.assertEqual(2, self.policy.squash_time(now=104))
+        self.assertEqual(2, self.policy.window)
+        # Bursts end with a quiet period
+        self.assertFalse(self.policy.bursting(now=110))
+        self.policy.event(now=110)
+        self.assertFalse(self.policy.bursting(now=110))
+        self.assertEqual(0.1, self.policy.squash_time(now=110))
+
+    def test_fixed_window(self):
+        policy = squash.SquashPolicy(0.5, 0)
+        for i in range(10):
+            policy.event(now=100 + i * 0.1)
+        policy.cycle(30)
+        self.assertEqual(0.5, policy.squash_time(now=101))
+        self.assertEqual(5, policy.polling_interval(5, now=200))
@@ -0,0 +1,127 @@
+# Copyright (c) 2016 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import socket
+
+import mock
+
+from aim.agent.aid import supervisor
+from aim.tests import base
+
+
+class TestAIDSupervisor(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestAIDSupervisor, self).setUp()
+        base.CONF.set_override('agent_workers', 2, 'aim')
+        self.worker_main = mock.Mock()
+        self.supervisor = supervisor.AIDSupervisor(base.CONF,
+                                                   self.worker_main)
+        for name in ('fork', 'waitpid', '_exit', 'kill'):
+            patch = mock.patch.object(supervisor.os, name)
+            setattr(self, name, patch.start())
+            self.addCleanup(patch.stop)
+        patch = mock.patch.object(supervisor.signal, 'signal')
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_respawn(self):
+        self.fork.side_effect = [101, 102, 103]
+        self.supervisor._respawn()
+        self.assertEqual({101: 0, 102: 1}, self.supervisor.children)
+        self.assertFalse(self.worker_main.called)
+
+        self.waitpid.side_effect = [(101, 256), (0, 0)]
+        self.supervisor._reap()
+        self.assertEqual({102: 1}, self.supervisor.children)
+        # Workers are not restarted in a tight loop
+        self.supervisor._respawn()
+        self.assertEqual({102: 1}, self.supervisor.children)
+        with mock.patch.object(
+                supervisor.time, 'time',
+                return_value=supervisor.time.time() +
+                supervisor.WORKER_RESPAWN_INTERVAL):
+            self.supervisor._respawn()
+        self.assertEqual({102: 1, 103: 0}, self.supervisor.children)
+
+        self.waitpid.side_effect = [(102, 0), (103, 0)]
+        self.supervisor.run_daemon_loop = False
+        self.supervisor._stop()
+        self.assertEqual(2, self.kill.call_count)
+        self.assertEqual({}, self.supervisor.children)
+
+    def test_worker(self):
+        self.fork.return_value = 0
+        self.supervisor._spawn(1)
+        self.worker_main.assert_called_once_with(base.CONF, worker=1)
+        self._exit.assert_called_once_with(0)
+
+        self._exit.reset_mock()
+        self.worker_main.side_effect = SystemExit(1)
+        self.supervisor._spawn(1)
+        self._exit.assert_called_once_with(1)
+
+    def test_run(self):
+        self.fork.side_effect = [101, 102]
+        self.waitpid.return_value = (0, 0)
+
+        def get_event():
+            self.supervisor.run_daemon_loop = False
+            return 'serve'
+
+        self.supervisor._get_event = mock.Mock(side_effect=get_event)
+        self.supervisor._relay = relay = mock.Mock()
+        self.supervisor._stop = mock.Mock()
+        with mock.patch('aim.config.ConfigManager') as conf_manager:
+            with mock.patch('aim.db.api.get_store') as get_store:
+                self.supervisor.run()
+        relay.assert_called_once_with('serve')
+        # Nothing that could start threads or keep DB connections is
+        # created in the parent of the workers
+        self.assertFalse(conf_manager.called)
+        self.assertFalse(get_store.called)
+        self.assertEqual(base.CONF.aim.unix_socket_path,
+                         self.supervisor.us_path)
+
+    def test_get_event(self):
+        self.supervisor.sock = sock = mock.Mock()
+        sock.recv.side_effect = ['serve', 'unknown', socket.timeout]
+        self.assertEqual('serve', self.supervisor._get_event())
+        self.assertIsNone(self.supervisor._get_event())
+        self.assertIsNone(self.supervisor._get_event())
+        # The socket is bound again after errors
+        sock.recv.side_effect = socket.error
+        with mock.patch.object(supervisor.time, 'sleep'):
+            self.assertIsNone(self.supervisor._get_event())
+        sock.close.assert_called_once_with()
+        self.assertIsNone(self.supervisor.sock)
+        sock.recv.side_effect = ['reconcile']
+        with mock.patch.object(
+                self.supervisor, '_connect',
+                side_effect=lambda: setattr(self.supervisor, 'sock',
+                                            sock)) as connect:
+            self.assertEqual('reconcile', self.supervisor._get_event())
+            connect.assert_called_once_with()
+
+    def test_relay(self):
+        self.supervisor.us_path = '/run/aid/events/aid.sock'
+        self.supervisor.sock = mock.Mock()
+        self.supervisor.sock.sendto.side_effect = [socket.error, None]
+        self.supervisor.children = {101: 0, 102: 1}
+        self.supervisor._relay('serve')
+        self.assertEqual(
+            [mock.call('serve', '/run/aid/events/aid.sock.0'),
+             mock.call('serve', '/run/aid/events/aid.sock.1')],
+            self.supervisor.sock.sendto.call_args_list)
@@ -28,6 +28,7 @@ from jsonschema import exceptions as schema_exc
 import mock
 
 from aim import aim_manager
+from aim import aim_store
 from aim.api import infra
 from aim.api import resource
 from aim.api import resource as aim_res
@@ -38,6 +39,7 @@ from aim.api import tree as api_tree
 from aim.common.hashtree import structured_tree
 from aim.common import utils
 from aim import config  # noqa
+from aim import context
 from aim.db import hashtree_db_listener
 from aim.db import tree_model  # noqa
 from aim import exceptions as exc
@@ -97,6 +99,307 @@ class TestAimManager(base.TestAimDBBase):
         self.assertRaises(exc.InvalidDNForAciResource,
                           bad_resource_3.from_dn, 'uni/tn-coke')
 
+    def test_find_iter(self):
+        for i in range(5):
+            self.mgr.create(self.ctx, resource.Tenant(name='t%s' % i))
+            self.mgr.create(self.ctx, resource.BridgeDomain(
+                tenant_name='t0', name='bd%s' % i))
+        for batch_size in [1, 2, 5, 10]:
+            self.assertEqual(
+                self.mgr.find(self.ctx, resource.Tenant),
+                list(self.mgr.find_iter(self.ctx, resource.Tenant,
+                                        batch_size=batch_size)))
+            self.assertEqual(
+                ['bd0', 'bd1', 'bd2', 'bd3', 'bd4'],
+                [x.name for x in self.mgr.find_iter(
+                    self.ctx, resource.BridgeDomain, tenant_name='t0',
+                    order_by=['name'], batch_size=batch_size)])
+
+    @base.requires(['sql'])
+    def test_find_iter_primary_key_order(self):
+        for i in range(5):
+            self.mgr.create(self.ctx, api_tree.ActionLog(
+                action='create', object_type='Tenant',
+                object_dict='{}', root_rn='tn-t%s' % (4 - i)))
+        expected = sorted(self.mgr.find(self.ctx, api_tree.ActionLog),
+                          key=lambda x: x.id)
+        # Ordering by the primary key alone pages with keysets, not offsets
+        with mock.patch('sqlalchemy.orm.Query.offset') as offset:
+            self.assertEqual(
+                [x.uuid for x in expected],
+                [x.uuid for x in self.mgr.find_iter(
+                    self.ctx, api_tree.ActionLog, order_by=['id'],
+                    batch_size=2)])
+            self.assertFalse(offset.called)
+
+    def _replica_store(self, **kwargs):
+        patch = mock.patch.multiple(aim_store.SqlAlchemyStore,
+                                    _last_write=None, _replica_log_id=0)
+        patch.start()
+        self.addCleanup(patch.stop)
+        replica = self.get_new_context().db_session
+        store = aim_store.SqlAlchemyStore(self.ctx.store.db_session,
+                                          read_session=replica, **kwargs)
+        return context.AimContext(store=store), replica
+
+    def _action_log(self, ctx):
+        # Not a resource type, the log isn't consumed by the tests' catch up
+        log = self.mgr.create(ctx, api_tree.ActionLog(
+            action='create', object_type='Unknown', object_dict='{}',
+            root_rn='tn-t1'))
+        return self.mgr.get(ctx, log)
+
+    @base.requires(['sql'])
+    def test_read_replica_routing(self):
+        ctx, replica = self._replica_store()
+        self.assertTrue(ctx.read_only)
+        self.assertFalse(self.ctx.read_only)
+        tenant = self.mgr.create(ctx, resource.Tenant(name='t1'))
+        # Action log written by this process, replica is caught up
+        log_id = self._action_log(ctx).id
+        aim_store.SqlAlchemyStore._last_write = (time.time(), log_id)
+        with mock.patch.object(
+                replica, 'connection',
+                side_effect=replica.connection) as replica_conn:
+            self.assertEqual([tenant], self.mgr.find(ctx, resource.Tenant))
+            self.assertEqual(2, replica_conn.call_count)
+            replica_conn.reset_mock()
+            # Verified write is not checked again
+            self.assertEqual(tenant, self.mgr.get(ctx, tenant))
+            self.assertEqual(1, replica_conn.call_count)
+            replica_conn.reset_mock()
+            # Locking reads and transactions hit the primary
+            self.assertEqual(tenant, self.mgr.get(ctx, tenant,
+                                                  for_update=True))
+            with ctx.store.begin(subtransactions=True):
+                self.assertEqual(tenant, self.mgr.get(ctx, tenant))
+            self.assertEqual(0, replica_conn.call_count)
+            # Replica falls behind the last write
+            with mock.patch.object(aim_store.SqlAlchemyStore, '_last_write',
+                                   (time.time(), log_id + 1000)):
+                self.assertEqual(tenant, self.mgr.get(ctx, tenant))
+                # Only the staleness check used the replica
+                self.assertEqual(1, replica_conn.call_count)
+                replica_conn.reset_mock()
+                # Until the lag window is over
+                self.set_override('read_replica_lag_window', 0, 'aim')
+                self.assertEqual(tenant, self.mgr.get(ctx, tenant))
+                self.assertEqual(1, replica_conn.call_count)
+
+    @base.requires(['sql'])
+    def test_read_replica_third_party_write(self):
+        ctx, replica = self._replica_store()
+        log = self._action_log(ctx)
+        # Another process writes after this one, and this process' action
+        # log is consumed
+        self._action_log(self.ctx)
+        self.mgr.delete(self.ctx, log)
+        aim_store.SqlAlchemyStore._last_write = (time.time(), log.id)
+        with mock.patch.object(
+                replica, 'connection',
+                side_effect=replica.connection) as replica_conn:
+            self.assertEqual(1, len(self.mgr.find(ctx, api_tree.ActionLog)))
+            # The replica has a later write
+            self.assertEqual(2, replica_conn.call_count)
+
+    @base.requires(['sql'])
+    def test_read_replica_after_write(self):
+        ctx, replica = self._replica_store(initialize_hooks=False)
+        # A plain resource write, without any action log to check the
+        # replica against
+        tenant = self.mgr.create(ctx, resource.Tenant(name='t1'))
+        self.assertIsNotNone(aim_store.SqlAlchemyStore._last_write)
+        aim_store.SqlAlchemyStore._last_write = (time.time(), None)
+        with mock.patch.object(
+                replica, 'connection',
+                side_effect=replica.connection) as replica_conn:
+            self.assertEqual(tenant, self.mgr.get(ctx, tenant))
+            self.assertEqual(0, replica_conn.call_count)
+            # Once the lag window is over, the replica serves reads again
+            self.set_override('read_replica_lag_window', 0, 'aim')
+            self.assertEqual(tenant, self.mgr.get(ctx, tenant))
+            self.assertEqual(1, replica_conn.call_count)
+
+    @base.requires(['sql'])
+    def test_identity_cache(self):
+        session = self.ctx.store.db_session
+        tenant = resource.Tenant(name='t1')
+        with self.ctx.store.begin(subtransactions=True):
+            self.mgr.create(self.ctx, tenant)
+            with mock.patch.object(session, 'connection') as conn:
+                self.assertEqual(tenant, self.mgr.get(self.ctx, tenant))
+                self.assertEqual(tenant, self.mgr.get(self.ctx, tenant,
+                                                      for_update=True))
+                self.assertFalse(conn.called)
+            self.mgr.delete(self.ctx, tenant)
+            self.assertIsNone(self.mgr.get(self.ctx, tenant))
+        self.assertFalse(session.info.get('aim_identity_cache'))
+        # Objects read without lock are locked on first locking read
+        self.mgr.create(self.ctx, tenant)
+        with self.ctx.store.begin(subtransactions=True):
+            self.assertEqual(tenant, self.mgr.get(self.ctx, tenant))
+            with mock.patch.object(session, 'connection',
+                                   side_effect=session.connection) as conn:
+                self.mgr.get(self.ctx, tenant)
+                self.assertFalse(conn.called)
+                self.mgr.get(self.ctx, tenant, for_update=True)
+                self.assertEqual(1, conn.call_count)
+        # Updating an object read without lock doesn't lock it
+        with self.ctx.store.begin(subtransactions=True):
+            db_obj = self.ctx.store.query(
+                self.ctx.store.resource_to_db_type(resource.Tenant),
+                resource.Tenant, name='t1')[0]
+            db_obj.display_name = 'updated'
+            self.ctx.store.add(db_obj)
+            key = self.ctx.store._db_obj_identity_cache_key(db_obj)
+            self.assertIsNone(self.ctx.store._get_cached_identity(
+                key, lock_update=True))
+            self.assertEqual('updated', self.mgr.get(
+                self.ctx, tenant, for_update=True).display_name)
+            self.assertIs(db_obj, self.ctx.store._get_cached_identity(
+                key, lock_update=True))
+        # Rollbacks invalidate the cache
+        try:
+            with self.ctx.store.begin(subtransactions=True):
+                self.mgr.create(self.ctx, resource.Tenant(name='t2'))
+                raise exc.AimException()
+        except exc.AimException:
+            pass
+        self.assertFalse(session.info.get('aim_identity_cache'))
+        self.assertIsNone(self.mgr.get(self.ctx, resource.Tenant(name='t2')))
+
+    @base.requires(['hooks'])
+    def test_update_listener_resource_classes(self):
+        tenant_updates = []
+        all_updates = []
+
+        def tenant_listener(store, added, updated, deleted):
+            tenant_updates.append((added, updated, deleted))
+
+        def listener(store, added, updated, deleted):
+            all_updates.append((added, updated, deleted))
+
+        store = self.ctx.store
+        store.register_update_listener('test_tenant', tenant_listener,
+                                       resource_classes=[resource.Tenant])
+        self.addCleanup(store.unregister_update_listener, 'test_tenant')
+        with self.ctx.store.begin(subtransactions=True):
+            self.mgr.create(self.ctx, resource.Tenant(name='t1'))
+            self.mgr.create(self.ctx, resource.BridgeDomain(
+                tenant_name='t1', name='bd1'))
+        self.assertEqual([resource.Tenant(name='t1')],
+                         [x for y in tenant_updates for x in y[0]])
+        # Agent and trees are of no interest to the registered listeners
+        with mock.patch.object(aim_store.SqlAlchemyStore,
+                               'make_resource') as make_resource:
+            self.mgr.create(self.ctx, resource.Agent(
+                agent_type='aid', host='h1', binary_file='aid.py',
+                hash_trees=['tn-t1'], version='1.0'))
+            # Only to return the created agent
+            self.assertEqual(1, make_resource.call_count)
+        store.register_update_listener('test_all', listener)
+        self.addCleanup(store.unregister_update_listener, 'test_all')
+        self.mgr.delete(self.ctx, resource.BridgeDomain(tenant_name='t1',
+                                                        name='bd1'))
+        self.assertEqual([resource.BridgeDomain(tenant_name='t1',
+                                                name='bd1')],
+                         [x for y in all_updates for x in y[2]
+                          if isinstance(x, resource.BridgeDomain)])
+        self.assertFalse([x for y in tenant_updates[1:] for z in y
+                          for x in z if type(x) != resource.Tenant])
+
+    def test_get_subtree(self):
+        tn = self.mgr.create(self.ctx, resource.Tenant(name='tn1'))
+        ap = self.mgr.create(self.ctx, resource.ApplicationProfile(
+            tenant_name='tn1', name='ap'))
+        epg = self.mgr.create(self.ctx, resource.EndpointGroup(
+            tenant_name='tn1', app_profile_name='ap', name='epg'))
+        bd = self.mgr.create(self.ctx, resource.BridgeDomain(
+            tenant_name='tn1', name='bd'))
+        self.mgr.create(self.ctx, resource.Tenant(name='tn2'))
+        self.mgr.create(self.ctx, resource.BridgeDomain(
+            tenant_name='tn2', name='bd'))
+
+        subtree = self.mgr.get_subtree(self.ctx, tn)
+        self.assertFalse(isinstance(subtree, list))
+        self.assertEqual(sorted([ap.dn, epg.dn, bd.dn]),
+                         sorted(x.dn for x in subtree))
+        self.assertEqual([epg.dn],
+                         [x.dn for x in self.mgr.get_subtree(self.ctx, ap)])
+        self.assertEqual([], list(self.mgr.get_subtree(self.ctx, epg)))
+
+        self.mgr.delete(self.ctx, tn, cascade=True)
+        for res in [tn, ap, epg, bd]:
+            self.assertIsNone(self.mgr.get(self.ctx, res))
+        self.assertEqual(1, len(self.mgr.find(self.ctx,
+                                              resource.BridgeDomain)))
+
+    @base.requires(['sql'])
+    def test_get_subtree_populated_classes(self):
+        tn = self.mgr.create(self.ctx, resource.Tenant(name='tn1'))
+        self.mgr.create(self.ctx, resource.ApplicationProfile(
+            tenant_name='tn1', name='ap'))
+        self.mgr.create(self.ctx, resource.EndpointGroup(
+            tenant_name='tn1', app_profile_name='ap', name='epg'))
+        self.mgr.create(self.ctx, resource.BridgeDomain(
+            tenant_name='tn2', name='bd'))
+        with mock.patch.object(self.mgr, 'find',
+                               side_effect=self.mgr.find) as find:
+            self.assertEqual(2, len(list(self.mgr.get_subtree(self.ctx,
+                                                              tn))))
+        # Only the populated classes are retrieved
+        self.assertEqual(
+            [resource.ApplicationProfile, resource.EndpointGroup],
+            sorted([x[0][1] for x in find.call_args_list],
+                   key=lambda x: x.__name__))
+
+    def test_sync_status_propagation(self):
+        tn = self.mgr.create(self.ctx, resource.Tenant(name='tn1'))
+        ap = self.mgr.create(self.ctx, resource.ApplicationProfile(
+            tenant_name='tn1', name='ap'))
+        epg1 = self.mgr.create(self.ctx, resource.EndpointGroup(
+            tenant_name='tn1', app_profile_name='ap', name='epg1'))
+        epg2 = self.mgr.create(self.ctx, resource.EndpointGroup(
+            tenant_name='tn1', app_profile_name='ap', name='epg2'))
+        # Same names in a different tenant
+        self.mgr.create(self.ctx, resource.Tenant(name='tn2'))
+        self.mgr.create(self.ctx, resource.ApplicationProfile(
+            tenant_name='tn2', name='ap'))
+        other = self.mgr.create(self.ctx, resource.EndpointGroup(
+            tenant_name='tn2', app_profile_name='ap', name='epg1'))
+        self.mgr.set_resource_sync_synced(self.ctx, other)
+
+        def sync_status(res):
+            return self.mgr.get_status(self.ctx, res).sync_status
+
+        self.mgr.set_resource_sync_synced(self.ctx, tn)
+        self.mgr.set_resource_sync_synced(self.ctx, epg1)
+        # EPG2 has no status yet, it is put in error state anyway
+        self.mgr.set_resource_sync_error(self.ctx, ap, message='bad')
+        for res in [ap, epg1, epg2]:
+            self.assertEqual(aim_status.AciStatus.SYNC_FAILED,
+                             sync_status(res))
+        self.assertEqual('bad', self.mgr.get_status(
+            self.ctx, ap).sync_message)
+        self.assertEqual('Parent resource %s is in error state' % ap,
+                         self.mgr.get_status(self.ctx, epg2).sync_message)
+        self.assertEqual(aim_status.AciStatus.SYNCED, sync_status(tn))
+        self.assertEqual(aim_status.AciStatus.SYNCED, sync_status(other))
+
+        # Pending EPG propagates to its failed parent and to the parent's
+        # subtree, but stops at the synced tenant
+        self.mgr.set_resource_sync_pending(self.ctx, epg1)
+        for res in [ap, epg1, epg2]:
+            self.assertEqual(aim_status.AciStatus.SYNC_PENDING,
+                             sync_status(res))
+        self.assertEqual(aim_status.AciStatus.SYNCED, sync_status(tn))
+        self.assertEqual(aim_status.AciStatus.SYNCED, sync_status(other))
+
+        # Synced children are not affected by a pending parent
+        self.mgr.set_resource_sync_synced(self.ctx, epg2)
+        self.mgr.set_resource_sync_pending(self.ctx, ap)
+        self.assertEqual(aim_status.AciStatus.SYNCED, sync_status(epg2))
+
 
 class TestResourceOpsBase(object):
     test_dn = None
@@ -190,6 +493,8 @@ class TestResourceOpsBase(object):
         self.assertEqual(1, len(rs2))
         for k, v in creation_attributes.iteritems():
             self.assertEqual(v, getattr_canonical(rs2[0], k))
+        self.assertEqual(rs2, list(self.mgr.find_iter(
+            self.ctx, resource, batch_size=1, **test_search_attributes)))
 
         # Test update
         r3 = self.mgr.update(self.ctx, res, **test_update_attributes)
@@ -377,6 +682,20 @@ class TestResourceOpsBase(object):
         self.assertEqual(2, len(status.faults))
         self.assertTrue(status.is_error())
 
+        # Bulk retrieval returns the same status and faults
+        statuses = self.mgr.get_statuses(self.ctx, [res])
+        self.assertEqual([self.mgr.status_key(res)], statuses.keys())
+        bulk_status = statuses[self.mgr.status_key(res)]
+        self.assertEqual(status.id, bulk_status.id)
+        self.assertEqual(
+            sorted(f.external_identifier for f in status.faults),
+            sorted(f.external_identifier for f in bulk_status.faults))
+        res_with_id = self.mgr.get(self.ctx, res, include_aim_id=True)
+        self.assertEqual(
+            status.id, self.mgr.get_statuses(
+                self.ctx, [res_with_id])[
+                    self.mgr.status_key(res_with_id)].id)
+
         self.mgr.clear_fault(self.ctx, fault)
         self.mgr.clear_fault(self.ctx, fault_2)
         status = self.mgr.get_status(self.ctx, res)
@@ -497,6 +816,32 @@ class TestAciResourceOpsBase(TestResourceOpsBase):
                           self.resource_class.from_dn,
                           res.dn + '/foo')
 
+    def test_dn_follows_identity(self):
+        res = self.resource_class(**self.test_required_attributes)
+        dn, rn, root = res.dn, res.rn, res.root
+        attr = self.resource_class.identity_attributes.keys()[-1]
+        orig = getattr(res, attr)
+        setattr(res, attr, '%sx' % orig)
+        self.assertEqual('%sx' % orig, res.identity[-1])
+        mo = utils.get_mo_class(res._aci_mo_name)
+        self.assertEqual(mo.dn(*res.identity), res.dn)
+        self.assertNotEqual(dn, res.dn)
+        self.assertNotEqual(rn, res.rn)
+        setattr(res, attr, orig)
+        self.assertEqual((dn, rn, root), (res.dn, res.rn, res.root))
+        # Memoization doesn't leak in the resource itself
+        self.assertEqual(self.resource_class(**self.test_required_attributes),
+                         res)
+
+    def test_fingerprint(self):
+        res = self.resource_class(**self.test_required_attributes)
+        other = self.resource_class(**self.test_required_attributes)
+        self.assertEqual(res.fingerprint, other.fingerprint)
+        self.assertEqual(res.hash, other.hash)
+        other._error = True
+        self.assertNotEqual(res.fingerprint, other.fingerprint)
+        self.assertEqual(res.fingerprint[0], other.fingerprint[0])
+
     def _get_hash_trees(self):
         tenants = self.mgr.find(self.ctx, resource.Tenant)
         result = {}
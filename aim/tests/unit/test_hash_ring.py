@@ -101,3 +101,53 @@ class TestHashRing(base.BaseTestCase):
         ring.add_node('a', 6)
         a_count2 = self._count_replicas(ring, 'a')
         self.assertEqual(6, a_count2 / a_count)
+
+    def test_assign_keys(self):
+        ring = hashring.ConsistentHashRing(
+            dict((str(x), None) for x in range(10)))
+        keys = [str(uuid.uuid4()) for x in range(100)]
+        self.assertEqual(dict((x, ring.assign_key(x)) for x in keys),
+                         ring.assign_keys(keys))
+        ring.remove_node('3')
+        ring.add_node('10', 2)
+        self.assertEqual(dict((x, ring.assign_key(x)) for x in keys),
+                         ring.assign_keys(keys))
+        # Allocations are not shared
+        ring.assign_keys(keys)[keys[0]].append('11')
+        self.assertEqual(2, len(ring.assign_key(keys[0])))
+
+    def test_set_nodes(self):
+        ring = hashring.ConsistentHashRing({'a': None, 'b': None})
+        self.assertFalse(ring.set_nodes({'a': None, 'b': None}))
+        self.assertTrue(ring.set_nodes({'a': 2, 'c': None}))
+        # Nodes with the default weight are removed as well
+        self.assertEqual(0, self._count_replicas(ring, 'b'))
+        self.assertEqual(80, self._count_replicas(ring, 'a'))
+        fresh = hashring.ConsistentHashRing({'a': 2, 'c': None})
+        self.assertEqual([(x.h4sh, x.node) for x in fresh._ring],
+                         [(x.h4sh, x.node) for x in ring._ring])
+
+    def test_assign_keys_bounded(self):
+        ring = hashring.ConsistentHashRing({'a': 1, 'b': 1, 'c': 2})
+        costs = dict((str(x), 1) for x in range(100))
+        costs.update({'big1': 50, 'big2': 50})
+        result = ring.assign_keys_bounded(costs, 1.25)
+        self.assertEqual(set(costs), set(result))
+        loads = dict.fromkeys('abc', 0)
+        for key, nodes in result.iteritems():
+            self.assertEqual(2, len(set(nodes)))
+            for node in nodes:
+                loads[node] += costs[key]
+        # Loads are bounded by the node weight
+        total = sum(costs.values()) * 2
+        for node, weight in (('a', 1), ('b', 1), ('c', 2)):
+            self.assertTrue(loads[node] <= 1.25 * total * weight / 4.0)
+        # Reproducible by different instances
+        self.assertEqual(result, hashring.ConsistentHashRing(
+            {'a': 1, 'b': 1, 'c': 2}).assign_keys_bounded(costs, 1.25))
+
+        # Keys heavier than the bound go to the least loaded nodes
+        result = ring.assign_keys_bounded({'k1': 10, 'k2': 1}, 1)
+        self.assertEqual(2, len(result['k1']))
+        self.assertEqual(set(['a', 'b', 'c']),
+                         set(result['k1'] + result['k2']))
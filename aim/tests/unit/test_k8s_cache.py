@@ -0,0 +1,146 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from aim import aim_store
+from aim.api import resource
+from aim.k8s import api_v1
+from aim.k8s import cache
+from aim.tests import base
+
+
+def _pod(name, namespace='ns', version='1', labels=None, node='h1'):
+    return {'kind': 'Pod',
+            'metadata': {'name': name, 'namespace': namespace,
+                         'uid': 'uid-' + name, 'resourceVersion': version,
+                         'labels': labels or {}},
+            'spec': {'nodeName': node}}
+
+
+class TestK8sObjectCache(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestK8sObjectCache, self).setUp()
+        self.cache = cache.K8sObjectCache()
+
+    def test_miss_until_synced(self):
+        self.cache.update(api_v1.Pod, 'ADDED', _pod('p1'))
+        self.assertRaises(cache.CacheMiss, self.cache.get, api_v1.Pod, 'p1',
+                          'ns')
+        self.cache.replace(api_v1.Pod, [_pod('p1')])
+        self.assertEqual('p1', self.cache.get(
+            api_v1.Pod, 'p1', 'ns')['metadata']['name'])
+        self.assertIsNone(self.cache.get(api_v1.Pod, 'p1', 'other'))
+        self.assertRaises(cache.CacheMiss, self.cache.get, api_v1.Node, 'p1')
+
+        self.cache.invalidate(api_v1.Pod)
+        self.assertRaises(cache.CacheMiss, self.cache.get, api_v1.Pod, 'p1',
+                          'ns')
+
+    def test_staleness(self):
+        self.cache.replace(api_v1.Pod, [_pod('p1')])
+        with mock.patch.object(cache.time, 'time',
+                               return_value=cache.time.time() + 31):
+            self.assertRaises(cache.CacheMiss, self.cache.list, api_v1.Pod)
+            self.cache.touch([api_v1.Pod])
+            self.assertEqual(1, len(self.cache.list(api_v1.Pod)))
+        base.CONF.set_override('k8s_cache_max_staleness', 0, 'aim_k8s')
+        self.assertRaises(cache.CacheMiss, self.cache.list, api_v1.Pod)
+
+    def test_events(self):
+        self.cache.replace(api_v1.Pod, [_pod('p1', labels={'a': 'b'})])
+        self.cache.update(api_v1.Pod, 'MODIFIED',
+                          _pod('p1', version='3', labels={'a': 'c'}))
+        # Older events don't overwrite newer objects
+        self.cache.update(api_v1.Pod, 'MODIFIED',
+                          _pod('p1', version='2', labels={'a': 'd'}))
+        self.cache.update(api_v1.Pod, 'ADDED', _pod('p2', namespace='ns2'))
+        self.assertEqual(
+            [], self.cache.list(api_v1.Pod, label_selector='a=b'))
+        self.assertEqual(
+            ['p1'], [x['metadata']['name'] for x in
+                     self.cache.list(api_v1.Pod, label_selector='a=c')])
+        self.assertEqual(
+            ['p2'], [x['metadata']['name'] for x in
+                     self.cache.list(api_v1.Pod, namespace='ns2')])
+        self.assertEqual(
+            ['p2'], [x['metadata']['name'] for x in
+                     self.cache.list(api_v1.Pod, aim_id='p2 ns2 uid-p2')])
+        self.assertEqual(2, len(self.cache.list(api_v1.Pod)))
+        self.cache.update(api_v1.Pod, 'DELETED', _pod('p1'))
+        self.assertEqual([], self.cache.list(api_v1.Pod, label_selector='a=c'))
+        self.assertIsNone(self.cache.get(api_v1.Pod, 'p1', 'ns'))
+        # Set based selectors are not served
+        self.assertRaises(cache.CacheMiss, self.cache.list, api_v1.Pod,
+                          label_selector='a in (b)')
+
+    def test_copies(self):
+        self.cache.replace(api_v1.Pod, [_pod('p1')])
+        self.cache.get(api_v1.Pod, 'p1', 'ns')['spec']['nodeName'] = 'h2'
+        self.cache.list(api_v1.Pod)[0]['spec']['nodeName'] = 'h2'
+        self.assertEqual('h1', self.cache.get(
+            api_v1.Pod, 'p1', 'ns')['spec']['nodeName'])
+
+
+class TestK8sStoreCache(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestK8sStoreCache, self).setUp()
+        with mock.patch.object(api_v1, 'AciContainersV1'):
+            self.store = aim_store.K8sStore(namespace='kube-system')
+        self.store.cache = cache.K8sObjectCache()
+        self.klient = self.store.klient
+
+    def _query(self, lock_update=False, **filters):
+        return self.store.query(api_v1.Pod, resource.VmmInjectedContGroup,
+                                lock_update=lock_update, **filters)
+
+    def test_query_served_from_cache(self):
+        self.klient.list.return_value = {'items': [_pod('p1')]}
+        self.assertEqual(1, len(self._query(namespace_name='ns')))
+        self.assertEqual(1, self.klient.list.call_count)
+
+        self.store.cache.replace(api_v1.Pod, [_pod('p1'), _pod('p2')])
+        self.assertEqual(2, len(self._query(namespace_name='ns')))
+        self.assertEqual(
+            ['p2'], [x['metadata']['name'] for x in
+                     self._query(namespace_name='ns', name='p2')])
+        self.assertEqual(
+            ['p1'], [x['metadata']['name'] for x in
+                     self._query(namespace_name='ns',
+                                 compute_node_name='h1', name='p1')])
+        self.assertEqual(1, self.store.count(
+            api_v1.Pod, resource.VmmInjectedContGroup, name='p2',
+            namespace_name='ns'))
+        self.assertEqual(1, self.klient.list.call_count)
+        self.assertFalse(self.klient.read.called)
+
+        # Consistent reads always go to the API server
+        self.klient.read.return_value = _pod('p1')
+        self.assertEqual(1, len(self._query(lock_update=True,
+                                            namespace_name='ns',
+                                            name='p1')))
+        self.assertEqual(1, self.klient.read.call_count)
+
+    def test_writes_update_cache(self):
+        self.store.cache.replace(api_v1.Pod, [])
+        pod = api_v1.Pod()
+        pod.update(_pod('p1'))
+        self.klient.patch.return_value = _pod('p1', version='2')
+        self.store.add(pod)
+        self.assertEqual(1, len(self._query(namespace_name='ns', name='p1')))
+        self.store.delete(pod)
+        self.assertEqual([], self._query(namespace_name='ns', name='p1'))
@@ -0,0 +1,135 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from aim import aim_store
+from aim.api import resource
+from aim.k8s import api_v1
+from aim.k8s import cache
+from aim.tests import base
+
+
+class FakeApiException(Exception):
+
+    def __init__(self, status):
+        super(FakeApiException, self).__init__(status)
+        self.status = status
+
+
+class TestK8sStoreWrites(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestK8sStoreWrites, self).setUp()
+        with mock.patch.object(api_v1, 'AciContainersV1'):
+            self.store = aim_store.K8sStore(namespace='kube-system')
+        self.store.cache = cache.K8sObjectCache()
+        self.klient = self.store.klient
+        self.klient.patch.return_value = None
+        self.klient.read.return_value = None
+        # Depending on the client version, the exception may live elsewhere
+        exc_patch = mock.patch.object(
+            api_v1.klient, 'ApiException',
+            getattr(api_v1.klient, 'ApiException', FakeApiException),
+            create=True)
+        exc_patch.start()
+        self.addCleanup(exc_patch.stop)
+
+    def _aci_object(self, **attrs):
+        attrs.setdefault('tenant_name', 't1')
+        attrs.setdefault('name', 'bd1')
+        db_obj = api_v1.AciContainersObject()
+        db_obj.from_attr(resource.BridgeDomain, attrs)
+        return db_obj
+
+    def test_add_patches(self):
+        db_obj = self._aci_object(display_name='bd')
+        db_obj['metadata']['resourceVersion'] = '7'
+        self.store.add(db_obj)
+        self.assertFalse(self.klient.read.called)
+        self.assertFalse(self.klient.replace.called)
+        self.assertEqual(1, self.klient.patch.call_count)
+        args, kwargs = self.klient.patch.call_args
+        self.assertEqual(api_v1.MERGE_PATCH, kwargs['content_type'])
+        self.assertEqual(
+            (api_v1.AciContainersObject, db_obj['metadata']['name'],
+             'kube-system'), args[:3])
+        self.assertEqual(db_obj['spec'], args[3]['spec'])
+        self.assertEqual('7', args[3]['metadata']['resourceVersion'])
+        self.assertEqual(db_obj['metadata']['labels'],
+                         args[3]['metadata']['labels'])
+        self.assertNotIn('status', args[3])
+
+    def test_add_creates_on_404(self):
+        self.klient.patch.side_effect = api_v1.klient.ApiException(
+            status=404)
+        db_obj = self._aci_object()
+        self.store.add(db_obj)
+        self.klient.create.assert_called_once_with(
+            api_v1.AciContainersObject, 'kube-system', db_obj)
+
+    def test_add_retries_patch_on_conflict(self):
+        self.klient.patch.side_effect = [
+            api_v1.klient.ApiException(status=409), None]
+        self.klient.read.return_value = {
+            'metadata': {'resourceVersion': '8'}, 'spec': {}}
+        db_obj = self._aci_object(display_name='bd')
+        db_obj['metadata']['resourceVersion'] = '7'
+        self.store.add(db_obj)
+        # Patched again against the current version, never replaced
+        self.assertFalse(self.klient.replace.called)
+        self.assertEqual(2, self.klient.patch.call_count)
+        args, kwargs = self.klient.patch.call_args
+        self.assertEqual('8', args[3]['metadata']['resourceVersion'])
+        self.assertEqual(db_obj['spec'], args[3]['spec'])
+
+        # Give up after too many conflicts
+        self.klient.patch.reset_mock()
+        self.klient.patch.side_effect = api_v1.klient.ApiException(
+            status=409)
+        self.assertRaises(api_v1.klient.ApiException, self.store.add,
+                          db_obj)
+        self.assertEqual(aim_store.K8S_PATCH_RETRIES,
+                         self.klient.patch.call_count)
+        self.assertFalse(self.klient.replace.called)
+
+    def test_add_replaces_on_null(self):
+        self.klient.read.return_value = {'metadata': {}, 'spec': {}}
+        # Null values would be dropped by a merge patch
+        self.store.add(self._aci_object(display_name=None))
+        self.assertFalse(self.klient.patch.called)
+        self.assertEqual(1, self.klient.replace.call_count)
+
+    def test_delete_all_collection(self):
+        bd1 = self._aci_object(name='bd1', display_name='bd')
+        bd2 = self._aci_object(name='bd2', display_name='bd')
+        self.klient.list.return_value = {'items': [bd1, bd2]}
+        post_delete = mock.Mock()
+        with mock.patch.object(self.store, '_post_delete', new=post_delete):
+            self.store.delete_all(api_v1.AciContainersObject,
+                                  resource.BridgeDomain, tenant_name='t1')
+        self.assertFalse(self.klient.delete.called)
+        self.klient.delete_collection.assert_called_once_with(
+            api_v1.AciContainersObject, 'kube-system',
+            label_selector=api_v1.AciContainersObject().build_selectors(
+                resource.BridgeDomain, {'tenant_name': 't1'})[
+                    'label_selector'])
+        self.assertEqual(2, post_delete.call_count)
+
+        # Filters that aren't labels are deleted one by one
+        self.klient.delete_collection.reset_mock()
+        self.store.delete_all(api_v1.AciContainersObject,
+                              resource.BridgeDomain, display_name='bd')
+        self.assertEqual(2, self.klient.delete_collection.call_count)
@@ -0,0 +1,170 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from oslo_db import exception as db_exc
+
+from aim import aim_manager
+from aim import aim_store
+from aim.api import resource
+from aim.api import tree as aim_tree
+from aim import context
+from aim.db import hashtree_db_listener as ht_db_l
+from aim.tests import base
+
+
+class TestKeyValueStore(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestKeyValueStore, self).setUp()
+        self.store = aim_store.KeyValueStore(
+            data=aim_store.KeyValueData(), initialize_hooks=False)
+        self.ctx = context.AimContext(store=self.store)
+        self.mgr = aim_manager.AimManager()
+        # Listeners are shared by all the stores
+        for listeners in (aim_store.AimStore._update_listeners,
+                          aim_store.AimStore._update_listener_classes,
+                          aim_store.AimStore._postcommit_listeners):
+            patch = mock.patch.dict(listeners, clear=True)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _bd(self, tenant, name, **kwargs):
+        return self.mgr.create(self.ctx, resource.BridgeDomain(
+            tenant_name=tenant, name=name, **kwargs))
+
+    def test_lifecycle(self):
+        bd = self._bd('t1', 'bd1', vrf_name='vrf1')
+        self._bd('t1', 'bd2', vrf_name='vrf2')
+        self._bd('t2', 'bd1', vrf_name='vrf1')
+        self.assertRaises(db_exc.DBDuplicateEntry, self._bd, 't1', 'bd1')
+
+        self.assertEqual(bd, self.mgr.get(self.ctx, bd))
+        self.assertEqual(3, self.mgr.count(self.ctx, resource.BridgeDomain))
+        self.assertEqual(
+            ['bd1', 'bd2'],
+            [x.name for x in self.mgr.find(
+                self.ctx, resource.BridgeDomain, tenant_name='t1',
+                order_by='vrf_name', in_={'vrf_name': ['vrf1', 'vrf2']})])
+        self.assertEqual(
+            [('t1', 'bd2')],
+            [(x.tenant_name, x.name) for x in self.mgr.find(
+                self.ctx, resource.BridgeDomain,
+                notin_={'vrf_name': ['vrf1']})])
+        self.assertEqual(1, self.mgr.count(
+            self.ctx, resource.BridgeDomain, tenant_name='t2',
+            vrf_name='vrf1'))
+
+        bd = self.mgr.update(self.ctx, bd, vrf_name='vrf3')
+        self.assertEqual('vrf3', bd.vrf_name)
+        # Objects returned by the store are copies
+        bd.l3out_names.append('l3out')
+        self.assertEqual([], self.mgr.get(self.ctx, bd).l3out_names)
+
+        with_id = self.mgr.get(self.ctx, bd, include_aim_id=True)
+        self.assertEqual(self.mgr.get(self.ctx, bd), self.mgr.get_by_id(
+            self.ctx, resource.BridgeDomain, with_id._aim_id))
+        self.assertIsNotNone(self.mgr.get_status(self.ctx, bd))
+
+        self.mgr.delete(self.ctx, bd)
+        self.assertIsNone(self.mgr.get(self.ctx, bd))
+        self.assertEqual(1, self.mgr.delete_all(
+            self.ctx, resource.BridgeDomain, name='bd2'))
+        self.assertEqual(1, self.mgr.delete_all(
+            self.ctx, resource.BridgeDomain, tenant_name='t2'))
+        self.assertEqual(0, self.mgr.count(self.ctx, resource.BridgeDomain))
+
+    def test_indexes(self):
+        for i in range(10):
+            self._bd('t%s' % (i % 2), 'bd%s' % i)
+        table = self.store._table(
+            self.store.resource_to_db_type(resource.BridgeDomain))
+        self.assertEqual(set(['tenant_name', 'aim_id']), set(table.indexes))
+        self.assertEqual(5, len(table.indexes['tenant_name']['t0']))
+        # Identity lookups and indexed filters don't scan the table
+        self.assertEqual([('t1', 'bd3')], table._candidates(
+            {}, {'tenant_name': 't1', 'name': 'bd3'}))
+        self.assertEqual(5, len(table._candidates(
+            {'tenant_name': ['t1', 't2']}, {})))
+        self.assertIsNone(table._candidates({}, {'vrf_name': ''}))
+        self.assertEqual(
+            ['bd3'], [x.name for x in self.mgr.find(
+                self.ctx, resource.BridgeDomain, tenant_name='t1',
+                name='bd3')])
+        self.assertEqual(5, self.mgr.count(
+            self.ctx, resource.BridgeDomain,
+            in_={'tenant_name': ['t1', 't2']}))
+        self.mgr.delete_all(self.ctx, resource.BridgeDomain,
+                            tenant_name='t0')
+        self.assertNotIn('t0', table.indexes['tenant_name'])
+
+        log_table = self.store._table(
+            self.store.resource_to_db_type(aim_tree.ActionLog))
+        self.assertIn('root_rn', log_table.indexes)
+
+    def test_rollback(self):
+        self._bd('t1', 'bd1')
+        try:
+            with self.store.begin(subtransactions=True):
+                self._bd('t1', 'bd2')
+                self.mgr.update(self.ctx, resource.BridgeDomain(
+                    tenant_name='t1', name='bd1'), vrf_name='vrf')
+                self.mgr.delete_all(self.ctx, resource.BridgeDomain)
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertEqual(
+            [('bd1', '')], [(x.name, x.vrf_name) for x in self.mgr.find(
+                self.ctx, resource.BridgeDomain)])
+
+    def test_listeners(self):
+        calls = []
+
+        def listener(store, added, updated, deleted):
+            calls.append(([str(x) for x in added], [str(x) for x in updated],
+                          [str(x) for x in deleted]))
+            if [x for x in added if x.name == 't1']:
+                # Changes made by listeners are notified as well
+                self.mgr.create(self.ctx, resource.Tenant(name='t2'))
+
+        self.store.register_update_listener(
+            'test', listener, resource_classes=[resource.Tenant])
+        with self.store.begin(subtransactions=True):
+            self.mgr.create(self.ctx, resource.Tenant(name='t1'))
+            self._bd('t1', 'bd1')
+            self.assertEqual([], calls)
+        self.assertEqual([(['Tenant(t1)'], [], []),
+                          (['Tenant(t2)'], [], [])], calls)
+        del calls[:]
+        self.mgr.update(self.ctx, resource.Tenant(name='t1'),
+                        display_name='tenant')
+        self.mgr.delete(self.ctx, resource.Tenant(name='t2'))
+        self.assertEqual([([], ['Tenant(t1)'], []),
+                          ([], [], ['Tenant(t2)'])], calls)
+
+    def test_hashtree_listener(self):
+        postcommit = mock.Mock(__name__='postcommit')
+        listener = ht_db_l.HashTreeDbListener(self.mgr)
+        self.store.register_update_listener(
+            'hashtree_db_listener_on_commit', listener.on_commit,
+            resource_classes=listener.resource_classes)
+        self.store.register_postcommit_listener('postcommit', postcommit)
+        self._bd('t1', 'bd1')
+        logs = self.mgr.find(self.ctx, aim_tree.ActionLog)
+        self.assertEqual([('tn-t1', 'BridgeDomain')],
+                         [(x.root_rn, x.object_type) for x in logs])
+        self.assertIsNotNone(logs[0].id)
+        postcommit.assert_called_once_with(self.store, [], set(['tn-t1']),
+                                           [])
@@ -0,0 +1,94 @@
+# Copyright (c) 2017 Cisco Systems
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import socket
+
+from six.moves.urllib import request
+
+from aim.common import metrics
+from aim.tests import base
+
+
+class TestMetrics(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestMetrics, self).setUp()
+        self.counter = metrics.Counter('test_requests_total', 'Requests.',
+                                       labels=('method',))
+        self.gauge = metrics.Gauge('test_depth', 'Depth.')
+        self.histogram = metrics.Histogram('test_seconds', 'Time.',
+                                           buckets=(0.5, 1))
+        self.addCleanup(metrics.enable, False)
+        self.addCleanup(metrics.reset)
+
+    def test_disabled(self):
+        self.assertFalse(metrics.is_enabled())
+        self.counter.inc(method='get')
+        self.gauge.set(3)
+        self.histogram.observe(0.1)
+        with self.histogram.time():
+            pass
+        self.assertEqual({}, self.counter.values)
+        self.assertEqual({}, self.gauge.values)
+        self.assertEqual({}, self.histogram.values)
+
+    def test_render(self):
+        metrics.enable()
+        self.counter.inc(method='get')
+        self.counter.inc(2, method='get')
+        self.counter.inc(method='post')
+        self.gauge.set(3)
+        for value in (0.1, 0.5, 0.7, 4):
+            self.histogram.observe(value)
+        with self.histogram.time():
+            pass
+        lines = metrics.render().split('\n')
+        for expected in [
+                '# HELP test_requests_total Requests.',
+                '# TYPE test_requests_total counter',
+                'test_requests_total{method="get"} 3',
+                'test_requests_total{method="post"} 1',
+                '# TYPE test_depth gauge',
+                'test_depth 3',
+                '# TYPE test_seconds histogram',
+                'test_seconds_bucket{le="0.5"} 3',
+                'test_seconds_bucket{le="1"} 4',
+                'test_seconds_bucket{le="+Inf"} 5',
+                'test_seconds_count 5']:
+            self.assertIn(expected, lines)
+        total = [x for x in lines if x.startswith('test_seconds_sum ')]
+        self.assertTrue(5.3 <= float(total[0].split()[1]) < 5.4)
+        metrics.reset()
+        self.assertNotIn('test_depth 3', metrics.render().split('\n'))
+
+    def test_serve(self):
+        server = metrics.serve(0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.assertTrue(metrics.is_enabled())
+        self.gauge.set(7)
+        body = request.urlopen(
+            'http://127.0.0.1:%s/metrics' % server.server_address[1]).read()
+        self.assertIn('test_depth 7', body.split('\n'))
+
+    def test_serve_port_in_use(self):
+        server = metrics.serve(0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        metrics.enable(False)
+        self.assertRaises(socket.error, metrics.serve,
+                          server.server_address[1])
+        # Metrics that can't be exported aren't recorded
+        self.assertFalse(metrics.is_enabled())
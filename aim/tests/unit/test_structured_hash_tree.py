@@ -820,6 +820,43 @@ class TestHashTreeManager(base.TestAimDBBase):
                                                   agent1)
             self.assertEqual(set(['keyA1', 'keyA2']), set(agent1.hash_trees))
 
+    def test_get_root_costs(self):
+        small = tree.StructuredHashTree().include([{'key': ('keyA', 'keyB')}])
+        big = tree.StructuredHashTree().include(
+            [{'key': ('keyA1', 'key%s' % x)} for x in range(1000)])
+        self.mgr.update_bulk(self.ctx, [small, big])
+        sizes = self.mgr.get_tree_sizes(self.ctx)
+        self.assertTrue(0 < sizes['keyA'] < sizes['keyA1'])
+        # All the trees of a root are accounted
+        self.mgr.update(self.ctx, big, tree=tree_manager.OPERATIONAL_TREE)
+        sizes2 = self.mgr.get_tree_sizes(self.ctx)
+        self.assertTrue(sizes2['keyA1'] > 1.9 * sizes['keyA1'])
+        costs = self.mgr.get_root_costs(self.ctx, ['keyA', 'keyA1', 'keyA2'])
+        units = 1 + sizes2['keyA1'] // tree_manager.ROOT_COST_UNIT
+        self.assertEqual({'keyA': 1, 'keyA2': 1, 'keyA1': costs['keyA1']},
+                         costs)
+        self.assertTrue(1 < costs['keyA1'] <= units < 2 * costs['keyA1'])
+        # Costs are coarse, growing trees keep theirs until they double
+        self.assertEqual([1, 2, 2, 4, 4, 4, 4, 8], [
+            tree_manager._cost_bucket(x * tree_manager.ROOT_COST_UNIT)
+            for x in range(8)])
+
+    def test_published_costs(self):
+        self.mgr.update_bulk(self.ctx, [
+            tree.StructuredHashTree().include([{'key': (x, 'keyB')}])
+            for x in ('keyA', 'keyA1')])
+        # Unpublished roots cost 1
+        self.assertEqual({'keyA': 1, 'keyA1': 1, 'keyA2': 1},
+                         self.mgr.get_published_costs(
+                             self.ctx, ['keyA', 'keyA1', 'keyA2']))
+        self.mgr.set_root_costs(self.ctx, {'keyA1': 8, 'keyA2': 4})
+        self.assertEqual({'keyA': 1, 'keyA1': 8},
+                         self.mgr.get_published_costs(
+                             self.get_new_context(), ['keyA', 'keyA1']))
+        self.mgr.set_root_costs(self.ctx, {'keyA1': 2})
+        self.assertEqual({'keyA1': 2}, self.mgr.get_published_costs(
+            self.get_new_context(), ['keyA1']))
+
 
 class TestAimHashTreeMaker(base.TestAimDBBase):
 
@@ -91,6 +91,12 @@ class TestUtils(base.TestAimDBBase):
              ('vzInTerm', 'intmnl'), ('vzRsFiltAtt', 'p')],
             internal_utils.decompose_dn(type, dn))
 
+    def test_chunks(self):
+        self.assertEqual([[0, 1], [2, 3], [4]],
+                         list(internal_utils.chunks(iter(range(5)), 2)))
+        self.assertEqual([[0, 1]], list(internal_utils.chunks([0, 1], 2)))
+        self.assertEqual([], list(internal_utils.chunks([], 2)))
+
     @internal_utils.rlock('test')
     def locked_func(self):
         with internal_utils.get_rlock('test2'):
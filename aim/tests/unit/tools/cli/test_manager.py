@@ -17,10 +17,12 @@ import ast
 
 from aim import aim_manager
 from aim.api import resource
+from aim.common.hashtree import structured_tree as tree
 from aim.common import utils
 from aim.tests.unit import test_aim_manager
 from aim.tests.unit.tools.cli import test_shell as base
 from aim.tools.cli.commands import manager as climanager
+from aim import tree_manager
 
 
 class TestManager(base.TestShell):
@@ -156,6 +158,26 @@ class TestManager(base.TestShell):
                 self.assertEqual(4, len(parsed))
             self.assertEqual(expected[state], set(parsed))
 
+    def test_agent_load(self):
+        tree_mgr = tree_manager.TreeManager(tree.StructuredHashTree)
+        tree_mgr.update_bulk(self.ctx, [
+            tree.StructuredHashTree().include([{'key': ('keyA', 'keyB')}]),
+            tree.StructuredHashTree().include(
+                [{'key': ('keyA1', 'key%s' % x)} for x in range(1000)])])
+        for host, roots in (('h1', ['keyA', 'keyA1']), ('h2', ['keyA'])):
+            self.mgr.create(self.ctx, resource.Agent(
+                id='aid-%s' % host, agent_type='aid', host=host,
+                binary_file='aid', version='1.0', capacity=2,
+                hash_trees=roots))
+        costs = tree_mgr.get_root_costs(self.ctx, ['keyA', 'keyA1'])
+        result = self.run_command('manager agent-load -p')
+        rows = [x.split() for x in result.output.split('\n')[1:-1]]
+        self.assertEqual(
+            [['aid-h1', 'h1', '2', 'up', '2', str(costs['keyA1'] + 1)],
+             ['aid-h2', 'h2', '2', 'up', '1', '1']],
+            [x[:-1] for x in rows])
+        self.assertEqual(100.0, sum(float(x[-1]) for x in rows))
+
 
 class TestManagerResourceOpsBase(object):
     test_default_values = {}
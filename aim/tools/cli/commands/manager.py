@@ -29,6 +29,7 @@ from aim.common import utils
 from aim import context
 from aim.db import api
 from aim.tools.cli.groups import aimcli
+from aim import tree_manager
 
 
 LOG = logging.getLogger(__name__)
@@ -51,16 +52,18 @@ def print_resource(res, plain=False):
 
 
 def print_resources(res_list, attrs=None, plain=False):
-    if not res_list:
+    # res_list can be any iterable, only the table rows are kept in memory
+    header = ['Identity'] + attrs if attrs else None
+    rows = []
+    for res in res_list:
+        if attrs:
+            rows.append([','.join(res.identity)] +
+                        [getattr(res, a, None) for a in attrs])
+        else:
+            header = res.identity_attributes
+            rows.append(res.identity)
+    if not rows:
         return
-    if attrs:
-        header = ['Identity'] + attrs
-        rows = [([','.join(res.identity)] +
-                 [getattr(res, a, None) for a in attrs])
-                for res in res_list]
-    else:
-        header = res_list[0].identity_attributes
-        rows = [res.identity for res in res_list]
     click.echo(tabulate(rows, headers=header,
                         tablefmt='plain' if plain else 'psql'))
 
@@ -69,7 +72,8 @@ def print_resources(res_list, attrs=None, plain=False):
 @click.pass_context
 # Debug utility for ACI web socket
 def manager(ctx):
-    aim_ctx = context.AimContext(store=api.get_store(expire_on_commit=True))
+    aim_ctx = context.AimContext(
+        store=api.get_store(expire_on_commit=True, read_only=True))
     manager = aim_manager.AimManager()
     ctx.obj['manager'] = manager
     ctx.obj['aim_ctx'] = aim_ctx
@@ -172,7 +176,7 @@ def find(klass):
         aim_ctx = ctx.obj['aim_ctx']
         column = list(column) if column else []
         validate_attributes(klass, column, '--column/-c', dn_is_valid=True)
-        results = manager.find(aim_ctx, klass, **kwargs)
+        results = manager.find_iter(aim_ctx, klass, **kwargs)
         print_resources(results, attrs=column, plain=plain)
     return _find
 
@@ -273,11 +277,20 @@ def sync_state_find(ctx, state, plain):
     with aim_ctx.store.begin(subtransactions=True):
         statuses = manager.find(aim_ctx, status_res.AciStatus,
                                 sync_status=state)
-    # Could aggregate the queries to make it more efficient in future
+    # Retrieve the parent resources with one query per resource class
+    ids_by_klass = {}
+    for status in statuses:
+        if status.parent_class:
+            ids_by_klass.setdefault(status.parent_class, set()).add(
+                status.resource_id)
+    parents = {}
+    for klass, ids in ids_by_klass.iteritems():
+        for aim_res in manager.find(aim_ctx, klass, include_aim_id=True,
+                                    in_={'aim_id': list(ids)}):
+            parents[(klass, aim_res._aim_id)] = aim_res
     rows = []
     for status in statuses:
-        aim_res = manager.get_by_id(
-            aim_ctx, status.parent_class, status.resource_id)
+        aim_res = parents.get((status.parent_class, status.resource_id))
         if not aim_res:
             continue
         name = convert(aim_res.__class__.__name__)
@@ -288,6 +301,30 @@ def sync_state_find(ctx, state, plain):
                         tablefmt='plain' if plain else 'psql'))
 
 
+@manager.command(name='agent-load')
+@click.option('--plain', '-p', default=False, is_flag=True)
+@click.pass_context
+def agent_load(ctx, plain):
+    """Show the cost of the tenants served by each agent."""
+    manager = ctx.obj['manager']
+    aim_ctx = ctx.obj['aim_ctx']
+    agents = manager.find(aim_ctx, resource.Agent)
+    costs = tree_manager.HashTreeManager().get_root_costs(
+        aim_ctx, set(x for agent in agents for x in agent.hash_trees))
+    loads = dict((agent.id, sum(costs[x] for x in agent.hash_trees))
+                 for agent in agents)
+    total = float(sum(loads.values())) or 1
+    rows = []
+    for agent in sorted(agents, key=lambda x: x.id):
+        rows.append([agent.id, agent.host, agent.capacity,
+                     'down' if agent.is_down(aim_ctx) else 'up',
+                     len(agent.hash_trees), loads[agent.id],
+                     '%.1f' % (100 * loads[agent.id] / total)])
+    click.echo(tabulate(rows, headers=['Agent', 'Host', 'Capacity', 'State',
+                                       'Tenants', 'Load', 'Load %'],
+                        tablefmt='plain' if plain else 'psql'))
+
+
 @manager.command(name='schema-get')
 def schema_get():
     schema_dict = schema.generate_schema()
@@ -25,6 +25,7 @@ from aim.api import status as aim_status
 from aim.api import tree as tree_res
 from aim.common.hashtree import exceptions as exc
 from aim.common.hashtree import structured_tree
+from aim.common import metrics
 from aim.common import utils
 from aim.db import tree_model
 
@@ -38,6 +39,19 @@ CONFIG_TREE = tree_res.ConfigTree
 OPERATIONAL_TREE = tree_res.OperationalTree
 MONITORED_TREE = tree_res.MonitoredTree
 SUPPORTED_TREES = [CONFIG_TREE, OPERATIONAL_TREE, MONITORED_TREE]
+# Tree bytes worth the fixed cost of serving a root
+ROOT_COST_UNIT = 16 * 1024
+TREE_LOAD_TIME = metrics.Histogram(
+    'aim_tree_load_seconds', 'Time spent loading hash trees from the DB.')
+TREE_SERIALIZE_TIME = metrics.Histogram(
+    'aim_tree_serialize_seconds',
+    'Time spent serializing hash trees to store them.')
+
+
+def _cost_bucket(size):
+    # Largest power of two not above the root cost, in ROOT_COST_UNITs
+    units = 1 + size // ROOT_COST_UNIT
+    return 1 << (units.bit_length() - 1)
 
 
 class TreeManager(object):
@@ -63,7 +77,7 @@ class TreeManager(object):
             for obj in db_objs:
                 hash_tree = trees.pop(obj.root_rn)
                 obj.root_full_hash = hash_tree.root_full_hash
-                obj.tree = str(hash_tree)
+                obj.tree = self._serialize(hash_tree)
                 context.store.add(obj)
 
             for hash_tree in trees.values():
@@ -77,7 +91,7 @@ class TreeManager(object):
                         # Then put the updated tree in it
                         self._create_if_not_exist(
                             context, tree_klass, root_rn,
-                            tree=str(hash_tree),
+                            tree=self._serialize(hash_tree),
                             root_full_hash=hash_tree.root_full_hash or 'none')
                     else:
                         # Attempt to create an empty tree:
@@ -159,16 +173,14 @@ class TreeManager(object):
     @utils.log
     def find(self, context, tree=CONFIG_TREE, **kwargs):
         result = self._find_query(context, tree, in_=kwargs)
-        return [self.tree_klass.from_string(
-            str(x.tree), self.root_key_funct(x.root_rn)) for x in result]
+        return [self._load(x.tree, x.root_rn) for x in result]
 
     @utils.log
     def get(self, context, root_rn, lock_update=False, tree=CONFIG_TREE):
         try:
-            return self.tree_klass.from_string(str(
+            return self._load(
                 self._find_query(context, tree, lock_update=lock_update,
-                                 root_rn=root_rn)[0].tree),
-                self.root_key_funct(root_rn))
+                                 root_rn=root_rn)[0].tree, root_rn)
         except IndexError:
             raise exc.HashTreeNotFound(root_rn=root_rn)
 
@@ -176,9 +188,7 @@ class TreeManager(object):
     def find_changed(self, context, root_map, tree=CONFIG_TREE):
         if not root_map:
             return {}
-        return dict((x.root_rn,
-                     self.tree_klass.from_string(
-                         str(x.tree), self.root_key_funct(x.root_rn)))
+        return dict((x.root_rn, self._load(x.tree, x.root_rn))
                     for x in self._find_query(
                         context, tree, in_={'root_rn': root_map.keys()},
                         notin_={'root_full_hash': root_map.values()}))
@@ -195,6 +205,55 @@ class TreeManager(object):
             db_obj[0].needs_reset = needs_reset
             context.store.add(db_obj[0])
 
+    def get_tree_sizes(self, context):
+        """Size of the serialized trees of each root
+
+        :return: dictionary of root rn to the total size in bytes of its
+                 trees.
+        """
+        result = {}
+        for tree_type in SUPPORTED_TREES:
+            db_type = context.store.resource_to_db_type(tree_type)
+            for root_rn, size in context.store.query_sizes(
+                    db_type, tree_type, 'root_rn', 'tree'):
+                result[root_rn] = result.get(root_rn, 0) + size
+        return result
+
+    def get_root_costs(self, context, roots):
+        """Relative cost of serving each root, based on its trees size
+
+        Costs are rounded down to a power of two, so that they only change
+        when a tree doubled or halved.
+        """
+        sizes = self.get_tree_sizes(context)
+        return dict((x, _cost_bucket(sizes.get(x, 0))) for x in roots)
+
+    @utils.log
+    def set_root_costs(self, context, costs):
+        """Publish the cost of serving each root
+
+        :param costs: dictionary of root rn to its cost.
+        """
+        if not costs:
+            return
+        with context.store.begin(subtransactions=True):
+            for db_obj in self._find_query(context, ROOT_TREE,
+                                           lock_update=True,
+                                           in_={'root_rn': costs.keys()}):
+                if db_obj.cost != costs[db_obj.root_rn]:
+                    db_obj.cost = costs[db_obj.root_rn]
+                    context.store.add(db_obj)
+
+    def get_published_costs(self, context, roots):
+        """Cost of serving each root, as last published
+
+        Unlike the tree sizes, which change at every write, all the readers
+        get the same published costs. Roots never published cost 1.
+        """
+        published = dict((x.root_rn, x.cost)
+                         for x in self._find_query(context, ROOT_TREE))
+        return dict((x, published.get(x) or 1) for x in roots)
+
     def retrieve_uninitialized_roots(self, context):
         # Only works with sql store
         if 'sql' in context.store.features:
@@ -247,6 +306,15 @@ class TreeManager(object):
                 db_obj = context.store.make_db_obj(resource)
                 context.store.add(db_obj)
 
+    def _load(self, tree, root_rn):
+        with TREE_LOAD_TIME.time():
+            return self.tree_klass.from_string(str(tree),
+                                               self.root_key_funct(root_rn))
+
+    def _serialize(self, hash_tree):
+        with TREE_SERIALIZE_TIME.time():
+            return str(hash_tree)
+
     def _find_query(self, context, tree_type, in_=None, notin_=None,
                     lock_update=False, **kwargs):
         db_type = context.store.resource_to_db_type(tree_type)
@@ -514,7 +582,7 @@ class HashTreeBuilder(object):
         eg: {'config': {'tn1': <root hashtree>}}
         :return: tree updates
         """
-        LOG.debug('Builder called with %s %s %s' % (added, updated, deleted))
+        LOG.debug('Builder called with %s %s %s', added, updated, deleted)
         # Segregate updates by root
         updates_by_root = {}
         all_updates = [added, updated, deleted]